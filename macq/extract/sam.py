@@ -1,4 +1,4 @@
-from .learned_sort import Sort, sort_inference_by_fluents
+from .learned_sort import Sort
 from ..trace import Action, Fluent, State
 from ..extract import LearnedLiftedAction
 from ..extract.model import Model
@@ -6,6 +6,7 @@ from ..extract.esam import make_param_bound_fluent_set
 from ..extract.learned_fluent import LearnedLiftedFluent, PHashLearnedLiftedFluent
 from ..observation import Observation, ObservedTraceList
 from collections import Counter
+from typing import List, Union
 class FluentInfo:
 
     def __init__(self, name: str, param_sorts: list[str], param_act_inds: list[int]):
@@ -22,9 +23,10 @@ class FluentInfo:
 
 class SAMgenerator:
     """DESCRIPTION
-    an object that handles all traces data and manipulates it in order to generate a model based on SAM algorithm
+    an object that handles all traces data and manipulates it in order to generate a model based on SAM algorithm.
+    traces can also be fed one at a time with `update`, and a model can be generated at any point in between
     """
-    obs_trace_list: ObservedTraceList
+    obs_trace_list: ObservedTraceList  # the traces given on initialization
     L_bLA: dict[str, set[PHashLearnedLiftedFluent]] # represents all parameter bound literals mapped by action
     effA_add: dict[str, set[PHashLearnedLiftedFluent]]  # dict like preA that holds delete and add biding for each action
     # name
@@ -37,7 +39,12 @@ class SAMgenerator:
     learned_lifted_action: set[LearnedLiftedAction]
     action_2_sort: dict[str, list[str]]
     sort_dict: dict[str, Sort]
+    fluent_types: dict[str, list[str]] = None
+    sorts: list[Sort] = None
     debug = False
+    seen_fluents: set[Fluent]  # all grounded fluents observed so far
+    seen_actions: set[Action]  # all grounded actions observed so far
+    learned_actions: set[str]  # names of the actions that have had transitions processed
     # =======================================Initialization of data structures======================================
     def __init__(self,
                  obs_trace_list: ObservedTraceList = None,
@@ -51,49 +58,55 @@ class SAMgenerator:
         """Creates a new SAMgenerator instance.
                Args:
                     obs_trace_list(ObservedTraceList):
-                        observed traces from the same domain.
+                        observed traces from the same domain. may be omitted and fed later with `update`.
                 """
         self.effA_add = dict()
         self.effA_delete = dict()
         self.preA = dict()
+        self.L_bLA = dict()
         self.learned_lifted_fluents = set()
         self.learned_lifted_action = set()
+        self.seen_fluents = set()
+        self.seen_actions = set()
+        self.learned_actions = set()
 
-        obj_name_2_type: dict[str, str] = dict()
         self.debug = debug
         self.obs_trace_list = obs_trace_list
         if any(diction is None for diction in [fluent_types, action_2_sort, sorts]):
             untyped = True
-            obj_name_2_type = sort_inference_by_fluents(obs_trace_list)
             self.action_2_sort = dict()
             self.sort_dict = dict()
-            for act in obs_trace_list.get_actions():
-                if act.name not in self.action_2_sort.keys():
-                    self.action_2_sort[act.name] = [obj_name_2_type[ob.name] for ob in act.obj_params]
         else:
             self.sort_dict = sort_dict
             self.action_2_sort = action_2_sort
             self.fluent_types = fluent_types
             self.sorts = sorts
 
-
         if untyped:
+            # the sorts of the observed actions and objects are added by `update_l_b_la`, so the traces given here
+            # and the ones fed later with `update` are typed the same way
             for act, act_sorts in self.action_2_sort.items():
-                s = []
-                for _ in act_sorts:
-                    s.append("object")
-                self.action_2_sort[act] = s
-
-            if isinstance(obj_name_2_type, dict):
-                for obj, _ in obj_name_2_type.items():
-                    self.sort_dict[obj] = Sort("object", None)
-        else:
-            for obj, obj_type in obj_name_2_type.items():
-                self.sort_dict[obj] = Sort(obj_type, None)
+                self.action_2_sort[act] = ["object" for _ in act_sorts]
 
-        self.update_l_b_la()
+        self.untyped = untyped
+        if obs_trace_list is not None:
+            self.update(obs_trace_list)
 
     # =======================================UPDATE FUNCTIONS========================================================
+    def update(self, obs_trace: Union[List[Observation], ObservedTraceList]):
+        """refines preA, effA_add and effA_delete using only the transitions of the new observations.
+        new actions and fluents extend L_bLA, the previously fed traces are never processed again.
+            Args:
+                obs_trace(List[Observation] | ObservedTraceList):
+                    a single observed trace, or a list of them, from the same domain as the previous ones.
+        """
+        if not isinstance(obs_trace, ObservedTraceList):
+            if not obs_trace:
+                return
+            obs_trace = ObservedTraceList(observations=[obs_trace])
+        self.update_l_b_la(obs_trace)
+        self.loop_over_action_triplets(obs_trace)
+
     def update_l_b_la2(self):
         """collects all parameter bound literals and maps them based on action name
                 values of dict is a set[(fluent.name: str, sorts:list[str], param_inds:set[int])]"""
@@ -123,17 +136,39 @@ class SAMgenerator:
                                                         sorts,
                                                         param_indexes_in_literal))
         self.preA = self.L_bLA.copy()
-    def update_l_b_la(self):
-        actions_in_traces: set[Action] = self.obs_trace_list.get_actions()
-        self.L_bLA: dict[str, set[PHashLearnedLiftedFluent]] = {act.name: set() for act in actions_in_traces}
-        for f in self.obs_trace_list.get_fluents():  # for every fluent in the acts fluents
-            for act in actions_in_traces:
-                if all(ob in act.obj_params for ob in f.objects):
-                    self.L_bLA[act.name].update(make_param_bound_fluent_set(action=act,
-                                                                               flu=f,
-                                                                               action_2_sort=self.action_2_sort,
-                                                                               fluent_types=self.fluent_types))
-        self.preA = self.L_bLA.copy()
+    def update_l_b_la(self, obs_trace_list: ObservedTraceList):
+        """extends L_bLA with the parameter bound literals of the actions and fluents first seen in obs_trace_list.
+        a new literal of an action that already had transitions processed is not added to its preA: its groundings
+        were never observed, so all the previous transitions would have removed it anyway.
+        when untyped, the parameters of the new actions and the objects of the new fluents are given the "object"
+        sort, whether the traces are given on initialization or fed later."""
+        new_actions: set[Action] = obs_trace_list.get_actions() - self.seen_actions
+        new_fluents: set[Fluent] = obs_trace_list.get_fluents() - self.seen_fluents
+        for act in new_actions:
+            if act.name not in self.L_bLA:
+                self.L_bLA[act.name] = set()
+                self.preA[act.name] = set()
+            if self.untyped and act.name not in self.action_2_sort:
+                self.action_2_sort[act.name] = ["object" for _ in act.obj_params]
+        if self.untyped:
+            for f in new_fluents:
+                for obj in f.objects:
+                    if obj.name not in self.sort_dict:
+                        self.sort_dict[obj.name] = Sort("object", None)
+        self.seen_actions.update(new_actions)
+        self.seen_fluents.update(new_fluents)
+        # only the new fluents with every action, and every fluent with the new actions, make new literals
+        pairs = [(f, act) for f in new_fluents for act in self.seen_actions]
+        pairs.extend((f, act) for f in self.seen_fluents - new_fluents for act in new_actions)
+        for f, act in pairs:
+            if all(ob in act.obj_params for ob in f.objects):
+                literals = make_param_bound_fluent_set(action=act,
+                                                       flu=f,
+                                                       action_2_sort=self.action_2_sort,
+                                                       fluent_types=self.fluent_types)
+                self.L_bLA[act.name].update(literals)
+                if act.name not in self.learned_actions:
+                    self.preA[act.name].update(literals)
 
     # =======================================ALGORITHM LOGIC========================================================
     def remove_redundant_preconditions(self, act: Action, transitions: list[list[Observation]]):
@@ -229,13 +264,13 @@ class SAMgenerator:
                             else:
                                 self.effA_delete[act.name] = {lifted_fluent}
 
-    def loop_over_action_triplets(self):
+    def loop_over_action_triplets(self, obs_trace_list: ObservedTraceList):
         """implement lines 5-11 in the SAM paper
         calls dd_surely_effects and remove_redundant_preconditions to make pre-con(A) , Eff(A)"""
-        self.obs_trace_list.get_all_transitions()
-        for act, transitions in self.obs_trace_list.get_all_transitions().items():  # sas is state-action-state
+        for act, transitions in obs_trace_list.get_all_transitions().items():  # sas is state-action-state
             if isinstance(act, Action):
                 self.remove_redundant_preconditions(act, transitions)
+                self.learned_actions.add(act.name)
                 counts = Counter(act.obj_params)
                 if any(count > 1 for count in counts.values()):
                     # ignore effects due to injective action# binding assumption,
@@ -274,11 +309,12 @@ class SAMgenerator:
         for action_name in self.L_bLA.keys():
             learned_act_fluents: dict[str, set[PHashLearnedLiftedFluent]] = dict()
             # make all action's pre-condition fluents and add to set
-            learned_act_fluents["precond"] = self.preA[action_name] if action_name in self.preA else {}
+            # (copies, so that models already generated are not changed by later updates)
+            learned_act_fluents["precond"] = set(self.preA[action_name]) if action_name in self.preA else {}
             # make all action's add_eff fluents and add to set
-            learned_act_fluents["add"] = self.effA_add.get(action_name) if action_name in self.effA_add else {}
+            learned_act_fluents["add"] = set(self.effA_add[action_name]) if action_name in self.effA_add else {}
             # make all action's delete_eff fluents and add to set
-            learned_act_fluents["delete"] = self.effA_delete[action_name] if action_name in self.effA_delete else {}
+            learned_act_fluents["delete"] = set(self.effA_delete[action_name]) if action_name in self.effA_delete else {}
             # make learned lifted action instance
             lifted_act = LearnedLiftedAction(name=action_name,
                                              param_sorts=self.action_2_sort[action_name],
@@ -291,9 +327,9 @@ class SAMgenerator:
         self.make_learned_fluent_set()
 
     def generate_model(self) -> Model:
-        if self.debug:
-            print("initiating iteration over transition")
-        self.loop_over_action_triplets()
+        """generates a model from all the transitions processed so far, can be called again after more updates"""
+        self.learned_lifted_fluents = set()
+        self.learned_lifted_action = set()
         if self.debug:
             print("making all lifted instances")
         self.make_lifted_instances()
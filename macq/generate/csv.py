@@ -2,7 +2,8 @@
 from macq.trace import (
     Action,
     Fluent,
-    State,
+    FluentUniverse,
+    PackedState,
     Step,
     Trace,
     TraceList,
@@ -55,17 +56,19 @@ def load(fname: str, act_col: str, plan_id_col: str = None):
             plans[line[plan_id_col]] = []
         plans[line[plan_id_col]].append(line)
 
+    # Every state of the file ranges over the fluent columns of the header
+    fluent_cols = [f for f in lines[0] if f not in [act_col, plan_id_col]]
+    universe = FluentUniverse(Fluent(f, []) for f in fluent_cols)
+    columns = {f: universe.index[Fluent(f, [])] for f in fluent_cols}
+
     # Turn the plan data into a list of traces
     traces = TraceList()
     for plan_id in plans:
         trace = Trace()
         for i, bitvec in enumerate(plans[plan_id]):
-            state = State(
-                {
-                    Fluent(f, []): bitvec[f] == "1"
-                    for f in bitvec
-                    if f not in [act_col, plan_id_col]
-                }
+            state = PackedState(
+                universe,
+                universe.from_indices(j for f, j in columns.items() if bitvec[f] == "1"),
             )
             act = Action(bitvec[act_col], [])
             step = Step(state, act, i)
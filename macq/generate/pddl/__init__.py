@@ -3,5 +3,10 @@ from .vanilla_sampling import VanillaSampling
 from .trace_from_goal import TraceFromGoal
 from .random_goal_sampling import RandomGoalSampling
 from .fd_random_walk import FDRandomWalkSampling
+from .planners import Planner, LocalPlanner, RemotePlanner
+from .plan_cache import PlanCache
+from .batched_walker import BatchedWalker
+from .coverage import CoverageIndex
 
-__all__ = ["Generator", "VanillaSampling", "TraceFromGoal", "RandomGoalSampling", "FDRandomWalkSampling"]
+__all__ = ["Generator", "VanillaSampling", "TraceFromGoal", "RandomGoalSampling", "FDRandomWalkSampling",
+           "Planner", "LocalPlanner", "RemotePlanner", "PlanCache", "BatchedWalker", "CoverageIndex"]
@@ -0,0 +1,168 @@
+from typing import Optional, Tuple
+import numpy as np
+
+from .successor_generator import SuccessorGenerator
+from ...utils import Deadline
+
+
+def _bits_to_row(bits: int, num_facts: int) -> np.ndarray:
+    """Unpacks a bit array of facts into a boolean row."""
+    data = np.frombuffer(bits.to_bytes((num_facts + 7) >> 3, "little"), dtype=np.uint8)
+    return np.unpackbits(data, count=num_facts, bitorder="little").astype(bool)
+
+
+class BatchedWalker:
+    """Samples many random walks at once over the compiled operators of a problem.
+
+    The walks are advanced together, one step at a time, over a boolean state matrix with
+    one row per walk and one column per fact of the successor generator. The preconditions
+    and effects of the operators are compiled into boolean matrices, so finding the
+    applicable operators of every walk is a pair of matrix products, and progressing every
+    walk is a pair of masked row updates.
+
+    As in `VanillaSampling`, each walk picks uniformly among its applicable operators, and
+    starts over from the state it got stuck in when it reaches a dead end.
+
+    Attributes:
+        successors (SuccessorGenerator):
+            The compiled successor generator the walks run on.
+        num_facts (int):
+            The number of facts (columns of the state matrix).
+        num_fluents (int):
+            The number of fluents of the fluent universe, the first facts.
+        pre_pos (np.ndarray):
+            The positive preconditions, as an (operators x facts) matrix.
+        pre_neg (np.ndarray):
+            The negative preconditions, as an (operators x facts) matrix.
+        adds (np.ndarray):
+            The add effects, as an (operators x facts) boolean matrix.
+        deletes (np.ndarray):
+            The delete effects, as an (operators x facts) boolean matrix.
+    """
+
+    def __init__(self, successors: SuccessorGenerator):
+        """Compiles the operators of a successor generator into matrices.
+
+        Args:
+            successors (SuccessorGenerator):
+                The compiled successor generator the walks run on.
+        """
+        self.successors = successors
+        self.num_facts = len(successors.facts)
+        self.num_fluents = successors.universe_mask.bit_length()
+        num_ops = len(successors.operators)
+        # the preconditions are summed by the matrix products, so they are kept as floats
+        # to go through BLAS (the counts stay exact well beyond any number of facts)
+        self.pre_pos = np.zeros((num_ops, self.num_facts), dtype=np.float32)
+        self.pre_neg = np.zeros((num_ops, self.num_facts), dtype=np.float32)
+        for op, (pos, neg) in enumerate(zip(successors.pre_pos, successors.pre_neg)):
+            self.pre_pos[op, pos] = 1
+            self.pre_neg[op, neg] = 1
+        self.adds = np.zeros((num_ops, self.num_facts), dtype=bool)
+        self.deletes = np.zeros((num_ops, self.num_facts), dtype=bool)
+        for op, (add, delete) in enumerate(zip(successors.adds, successors.deletes)):
+            self.adds[op] = _bits_to_row(add, self.num_facts)
+            self.deletes[op] = _bits_to_row(delete, self.num_facts)
+
+    def applicable(self, states: np.ndarray) -> np.ndarray:
+        """Computes the operators applicable in a batch of states.
+
+        Args:
+            states (np.ndarray):
+                The states, as a (walks x facts) boolean matrix.
+
+        Returns:
+            An (walks x operators) boolean matrix of the applicable operators.
+        """
+        missing = (~states).astype(np.float32) @ self.pre_pos.T
+        violated = states.astype(np.float32) @ self.pre_neg.T
+        return (missing == 0) & (violated == 0)
+
+    def successors_of(self, states: np.ndarray, ops: np.ndarray) -> np.ndarray:
+        """Progresses a batch of states, each through its own operator (assumed to be
+        applicable). Delete effects are applied before add effects.
+
+        Args:
+            states (np.ndarray):
+                The states, as a (walks x facts) boolean matrix.
+            ops (np.ndarray):
+                The index of the operator applied in each state.
+
+        Returns:
+            The resulting states, as a (walks x facts) boolean matrix.
+        """
+        return (states & ~self.deletes[ops]) | self.adds[ops]
+
+    def walk(
+        self,
+        start: int,
+        num_walks: int,
+        plan_len: int,
+        rng: np.random.Generator,
+        deadline: Optional[Deadline] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Samples a batch of walks of the same length from the same state.
+
+        Args:
+            start (int):
+                The state to start from, as a bit array of facts (see
+                `SuccessorGenerator.encode`).
+            num_walks (int):
+                The number of walks to sample.
+            plan_len (int):
+                The number of states in each walk.
+            rng (np.random.Generator):
+                The random number generator the operators are picked with.
+            deadline (Deadline):
+                Optional; The time budget of the batch, checked at every step. Defaults to
+                no time limit.
+
+        Returns:
+            The states visited over the fluent universe, as a (walks x plan_len x fluents)
+            boolean array, and the indices of the operators applied, as a
+            (walks x plan_len - 1) integer array.
+
+        Raises:
+            ValueError:
+                Raised if `plan_len` is less than 1, as every walk visits its start.
+        """
+        if plan_len < 1:
+            raise ValueError("The walks must visit at least one state.")
+        # facts added after the compilation (e.g. by encoding states) are never
+        # mentioned by the operators
+        start &= (1 << self.num_facts) - 1
+        states = np.tile(_bits_to_row(start, self.num_facts), (num_walks, 1))
+        visited = np.zeros((num_walks, plan_len, self.num_fluents), dtype=bool)
+        ops = np.full((num_walks, max(plan_len - 1, 0)), -1, dtype=np.int64)
+        # the number of states each walk has visited so far
+        lengths = np.zeros(num_walks, dtype=np.int64)
+        active = np.arange(num_walks)
+        while active.size:
+            if deadline is not None:
+                deadline.check()
+            current = states[active]
+            visited[active, lengths[active]] = current[:, : self.num_fluents]
+            # walks that reached their last state are complete
+            last = lengths[active] == plan_len - 1
+            lengths[active[last]] += 1
+            active = active[~last]
+            current = current[~last]
+            if not active.size:
+                break
+
+            applicable = self.applicable(current)
+            keys = rng.random(applicable.shape)
+            keys[~applicable] = -1
+            chosen = keys.argmax(axis=1)
+            # walks in a dead end start over from the state they got stuck in
+            stuck = ~applicable.any(axis=1)
+            lengths[active[stuck]] = 0
+            active = active[~stuck]
+            chosen = chosen[~stuck]
+            current = current[~stuck]
+
+            ops[active, lengths[active]] = chosen
+            states[active] = self.successors_of(current, chosen)
+            lengths[active] += 1
+            active = np.flatnonzero(lengths < plan_len)
+        return visited, ops
@@ -0,0 +1,114 @@
+from typing import Dict, Hashable, List, Sequence
+
+
+class CoverageIndex:
+    """An index of the states and transitions visited by the walks of a sampler, used to
+    steer the walks towards transitions they have not taken yet (see the `coverage_guided`
+    option of `VanillaSampling`).
+
+    States are given small integer ids as they are visited, and a transition, an operator
+    applied in a state, is stored as a single integer combining the id of the state and the
+    index of the operator.
+
+    Attributes:
+        num_operators (int):
+            The number of ground operators of the problem.
+        steps (int):
+            The number of transitions recorded, including repeated ones.
+    """
+
+    def __init__(self, num_operators: int):
+        """Initializes an empty index.
+
+        Args:
+            num_operators (int):
+                The number of ground operators of the problem.
+        """
+        self.num_operators = num_operators
+        self.steps = 0
+        self._states: Dict[Hashable, int] = {}
+        self._transitions = set()
+
+    @property
+    def num_states(self) -> int:
+        """The number of distinct states visited."""
+        return len(self._states)
+
+    @property
+    def num_transitions(self) -> int:
+        """The number of distinct transitions taken."""
+        return len(self._transitions)
+
+    def seen(self, state: Hashable, op: int) -> bool:
+        """Checks whether a transition was taken.
+
+        Args:
+            state (Hashable):
+                The state the operator is applied in.
+            op (int):
+                The index of the operator.
+
+        Returns:
+            True if the transition is in the index, False otherwise.
+        """
+        sid = self._states.get(state)
+        return sid is not None and sid * self.num_operators + op in self._transitions
+
+    def unseen(self, state: Hashable, ops: List[int]) -> List[int]:
+        """Filters the operators applicable in a state down to those whose transitions were
+        never taken.
+
+        Args:
+            state (Hashable):
+                The state the operators are applicable in.
+            ops (List[int]):
+                The indices of the operators.
+
+        Returns:
+            The indices of the operators whose transitions are not in the index, in order.
+        """
+        sid = self._states.get(state)
+        if sid is None:
+            return ops
+        base = sid * self.num_operators
+        transitions = self._transitions
+        return [op for op in ops if base + op not in transitions]
+
+    def add(self, states: Sequence[Hashable], ops: Sequence[int]):
+        """Records the states and transitions of a walk.
+
+        Args:
+            states (Sequence[Hashable]):
+                The states visited.
+            ops (Sequence[int]):
+                The indices of the operators applied, one less than the states (or as many,
+                if the last state is left out).
+        """
+        ids = self._states
+        for state, op in zip(states, ops):
+            sid = ids.setdefault(state, len(ids))
+            self._transitions.add(sid * self.num_operators + op)
+        for state in states[len(ops):]:
+            ids.setdefault(state, len(ids))
+        self.steps += len(ops)
+
+    def stats(self) -> dict:
+        """Retrieves the coverage statistics of the index.
+
+        Returns:
+            A dictionary with the number of `steps` recorded, of distinct `states` and
+            `transitions`, and the fraction of the steps that took a new transition
+            (`novelty`, 0 before any step).
+        """
+        return {
+            "steps": self.steps,
+            "states": self.num_states,
+            "transitions": self.num_transitions,
+            "novelty": self.num_transitions / self.steps if self.steps else 0.0,
+        }
+
+    def clear(self):
+        """Empties the index."""
+        self._states.clear()
+        self._transitions.clear()
+        self.steps = 0
@@ -2,6 +2,9 @@
 import random
 
 from . import VanillaSampling
+from .plan_cache import PlanCache
+from .planners import Planner
+from ...utils import set_num_traces
 
 class FDRandomWalkSampling(VanillaSampling):
     """Random Walk Sampler -- inherits from the VanillaSampling base class.
@@ -25,6 +28,8 @@ class FDRandomWalkSampling(VanillaSampling):
             The number of traces to be generated.
         traces (TraceList):
             The list of traces generated.
+        workers (int):
+            The number of processes traces are generated with.
     """
 
     def __init__(
@@ -38,6 +43,12 @@ class FDRandomWalkSampling(VanillaSampling):
         init_h: int = None,
         num_traces: int = 1,
         seed: int = None,
+        workers: int = 1,
+        cache_dir: str = None,
+        planner: Planner = None,
+        plan_cache: PlanCache = None,
+        delta_traces: bool = False,
+        coverage_guided: bool = False,
     ):
         """
         Initializes the fd random walk sampler.
@@ -62,6 +73,20 @@ class FDRandomWalkSampling(VanillaSampling):
                 The number of traces to generate. Defaults to 1.
             seed (int):
                 The seed for the random number generator.
+            workers (int):
+                The number of processes to generate traces with. Defaults to 1.
+            cache_dir (str):
+                Optional; A directory to cache the grounded problem in. Defaults to no caching.
+            planner (Planner):
+                Optional; The planner used to generate plans. Defaults to a `RemotePlanner`.
+            plan_cache (PlanCache):
+                Optional; A cache of the plans generated. Defaults to no caching.
+            delta_traces (bool):
+                Optional; Whether to generate `DeltaTrace`s, storing the states as deltas.
+                Defaults to False.
+            coverage_guided (bool):
+                Optional; Whether walks should prefer the transitions they have not taken
+                yet. Defaults to False. See `VanillaSampling`.
         """
 
         super().__init__(
@@ -70,10 +95,18 @@ class FDRandomWalkSampling(VanillaSampling):
             problem_id=problem_id,
             observe_pres_effs=observe_pres_effs,
             observe_static_fluents=observe_static_fluents,
-            num_traces=num_traces,
+            # the traces are generated below, once the walk length is known
+            num_traces=0,
             seed=seed,
             max_time=max_time,
+            workers=workers,
+            cache_dir=cache_dir,
+            planner=planner,
+            plan_cache=plan_cache,
+            delta_traces=delta_traces,
+            coverage_guided=coverage_guided,
         )
+        self.num_traces = set_num_traces(num_traces)
 
         if init_h is None:
             self.init_h = 10
@@ -94,7 +127,8 @@ class FDRandomWalkSampling(VanillaSampling):
         self.traces = self.generate_traces()
 
     def _plan_len(self):
-        """Samples the target plan length from the heuristic value"""
+        """Samples the target plan length from the heuristic value. A walk of no steps
+        still visits the initial state, so the length is at least 1."""
 
         p = 0.5
 
@@ -103,7 +137,7 @@ class FDRandomWalkSampling(VanillaSampling):
         for i in range(self.init_h):
             if random.random() < p:
                 depth += 1
-        return depth
+        return max(depth, 1)
 
     def _avg_op_cost(self):
         """Computes the average operator cost"""
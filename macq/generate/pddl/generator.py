@@ -1,6 +1,4 @@
-import re
-from time import sleep
-from typing import Set, List, Union
+from typing import Iterable, Optional, Set, List, Union
 from tarski.grounding.common import StateVariableLite
 from tarski.io import PDDLReader
 from tarski.search import GroundForwardSearchModel
@@ -21,16 +19,27 @@ from tarski.io import fstrips as iofs
 import requests
 from tarski.util import SymbolIndex
 
-from .planning_domains_api import get_problem, get_plan
+from .planning_domains_api import get_problem
+from .grounding_cache import grounding_key, load_grounding, save_grounding
+from .plan_cache import PlanCache
+from .planners import Planner, PlanningDomainsAPIError, RemotePlanner
+from .successor_generator import (
+    SuccessorGenerator,
+    TarskiSuccessorGenerator,
+    UncompilableOperator,
+    true_atom_keys,
+)
 from ..plan import Plan
-from ...trace import Action, State, PlanningObject, Fluent, Trace, Step
-
-
-class PlanningDomainsAPIError(Exception):
-    """Raised when a valid response cannot be obtained from the planning.domains solver."""
-
-    def __init__(self, message):
-        super().__init__(message)
+from ...trace import (
+    Action,
+    PlanningObject,
+    Fluent,
+    FluentUniverse,
+    PackedState,
+    Trace,
+    DeltaTrace,
+    Step,
+)
 
 
 class InvalidGoalFluent(Exception):
@@ -65,10 +74,27 @@ class Generator:
             The grounded instance of the problem.
         grounded_fluents (list):
             A list of all grounded (macq) fluents extracted from the given problem definition.
+        fluent_universe (FluentUniverse):
+            The indexed grounded fluents, shared by every state this generator produces.
+        atom_index (dict):
+            A mapping of each grounded fluent, as a tarski atom key (the predicate name and
+            the names of its constants), to its index in the fluent universe.
         op_dict (dict):
             The problem's ground operators, formatted to a dictionary for easy access during plan generation.
+        op_index (dict):
+            A mapping of the name of each ground operator to its position in the grounded instance.
         observe_pres_effs (bool):
             Option to observe action preconditions and effects upon generation.
+        cache_dir (str):
+            The directory grounded problems are cached in, if any.
+        planner (Planner):
+            The planner used to generate plans.
+        plan_cache (PlanCache):
+            The cache of the plans generated, if any.
+        modified (bool):
+            Whether the initial state or goal of the problem was changed since it was read.
+        delta_traces (bool):
+            Whether the traces generated are `DeltaTrace`s.
     """
 
     def __init__(
@@ -77,7 +103,11 @@ class Generator:
         prob: str = None,
         problem_id: int = None,
         observe_pres_effs: bool = False,
-        observe_static_fluents: bool = False
+        observe_static_fluents: bool = False,
+        cache_dir: str = None,
+        planner: Planner = None,
+        plan_cache: PlanCache = None,
+        delta_traces: bool = False,
     ):
         """Creates a basic PDDL state trace generator. Takes either the raw filenames
         of the domain and problem, or a problem ID.
@@ -91,8 +121,27 @@ class Generator:
                 The ID of the problem to access.
             observe_pres_effs (bool):
                 Option to observe action preconditions and effects upon generation.
+            cache_dir (str):
+                Optional; A directory to cache the grounded problem in. Grounding the same
+                domain and problem again (with the same `observe_static_fluents` option) then
+                loads the grounded operators and fluents from the cache instead of running the
+                grounder. Defaults to no caching.
+            planner (Planner):
+                Optional; The planner used to generate plans, e.g. a `LocalPlanner` to plan offline.
+                Defaults to a `RemotePlanner`, using the planning.domains solver.
+            plan_cache (PlanCache):
+                Optional; A cache to look plans up in before solving a problem with the planner, and to store the
+                plans found in. Can be shared by several generators. Defaults to no caching.
+            delta_traces (bool):
+                Optional; Whether to generate `DeltaTrace`s, which store the initial state and the fluents each step
+                adds and deletes instead of a full state per step. Defaults to False.
         """
         # get attributes
+        self.cache_dir = cache_dir
+        self.planner = RemotePlanner() if planner is None else planner
+        self.plan_cache = plan_cache
+        self.delta_traces = delta_traces
+        self.modified = False
         self.observe_static_fluents = observe_static_fluents
         self.pddl_dom = dom
         self.pddl_prob = prob
@@ -103,17 +152,62 @@ class Generator:
         if not problem_id:
             reader.parse_domain(dom)
             self.problem = reader.parse_instance(prob)
+            if cache_dir is not None:
+                with open(dom, "r") as dom_file, open(prob, "r") as prob_file:
+                    key = grounding_key(
+                        dom_file.read(), prob_file.read(), observe_static_fluents
+                    )
         else:
             dom = requests.get(get_problem(problem_id, formalism='classical')["domain_url"]).text
             prob = requests.get(get_problem(problem_id, formalism='classical')["problem_url"]).text
             reader.parse_domain_string(dom)
             self.problem = reader.parse_instance_string(prob)
+            if cache_dir is not None:
+                key = grounding_key(dom, prob, observe_static_fluents)
         self.lang = self.problem.language
-        # ground the problem
-        operators = ground_problem_schemas_into_plain_operators(self.problem)
+        # ground the problem, or load the grounding from the cache
+        grounding = None
+        if cache_dir is not None:
+            grounding = load_grounding(cache_dir, key, self.lang)
+        if grounding is None:
+            operators = ground_problem_schemas_into_plain_operators(self.problem)
+            grounded_fluents = self.__get_all_grounded_fluents()
+            if cache_dir is not None:
+                save_grounding(cache_dir, key, operators, grounded_fluents)
+        else:
+            operators, grounded_fluents = grounding
         self.instance = GroundForwardSearchModel(self.problem, operators)
-        self.grounded_fluents = self.__get_all_grounded_fluents()
+        self.grounded_fluents = grounded_fluents
+        self.fluent_universe = FluentUniverse(self.grounded_fluents)
+        self.atom_index = {
+            (f.name, tuple(o.name for o in f.objects)): i
+            for i, f in enumerate(self.fluent_universe)
+        }
         self.op_dict = self.__get_op_dict()
+        self.op_index = {op.name: i for i, op in enumerate(self.instance.operators)}
+        # the macq action of each ground operator, converted on first use
+        self._op_actions: List[Optional[Action]] = [None] * len(self.instance.operators)
+        self._successor_generator = None
+
+    def get_successor_generator(self):
+        """Retrieves the successor generator of the grounded problem, compiling it on first
+        use. Problems whose operators cannot be compiled fall back to evaluating the tarski
+        preconditions directly.
+
+        Returns:
+            A `SuccessorGenerator` (or `TarskiSuccessorGenerator`) over the ground operators.
+        """
+        successors = self._successor_generator
+        if successors is None or successors.operators is not self.instance.operators:
+            try:
+                successors = SuccessorGenerator(self.instance.operators, self.atom_index)
+            except UncompilableOperator:
+                successors = TarskiSuccessorGenerator(
+                    self.instance.operators,
+                    lambda state: self.tarski_state_to_macq(state).bits,
+                )
+            self._successor_generator = successors
+        return successors
 
     def extract_action_typing(self):
         """Retrieves a dictionary mapping all of this problem's actions and the types
@@ -242,22 +336,42 @@ class Generator:
                 The supplied state, defined using the tarski Model class.
 
         Returns:
-            A state, defined using the macq State class.
+            A state, defined using the macq PackedState class over the generator's
+            fluent universe.
         """
-        state_fluents = {}
-        true_fluents = set()
-        for f in tarski_state.as_atoms():
-            fluent = self.__tarski_atom_to_macq_fluent(f)
-            # ignore functions for now
-            if fluent:
-                true_fluents.add(str(fluent))
-        for grounded_fluent in self.grounded_fluents:
-            state_fluents[grounded_fluent] = str(grounded_fluent) in true_fluents
-
-        return State(state_fluents)
+        index = self.atom_index
+        # functions are ignored for now
+        true_fluents = [
+            index[key] for key in true_atom_keys(tarski_state) if key in index
+        ]
+        return PackedState(
+            self.fluent_universe, self.fluent_universe.from_indices(true_fluents)
+        )
+
+    def macq_fluents_to_tarski_state(self, fluents: Iterable[Fluent]) -> Model:
+        """Converts the fluents that hold in a state to a state as defined by tarski.
+
+        Args:
+            fluents (Iterable[Fluent]):
+                The fluents that hold in the state.
+
+        Returns:
+            The state, defined using the tarski Model class.
+        """
+        state = create(self.lang)
+        for f in fluents:
+            # convert fluents to tarski Atoms
+            atom = Atom(
+                self.lang.get_predicate(f.name),
+                [self.lang.get(o.name) for o in f.objects],
+            )
+            state.add(atom.predicate, *atom.subterms)
+        return state
 
     def tarski_act_to_macq(self, tarski_act: PlainOperator):
         """Converts an action as defined by tarski to an action as defined by macq.
+        The ground operators of the problem are only converted once, so every step taking
+        the same operator shares the same `Action`.
 
         Args:
             tarski_act (PlainOperator):
@@ -266,9 +380,33 @@ class Generator:
         Returns:
             An action, defined using the macq Action class.
         """
+        i = self.op_index.get(tarski_act.name)
+        if i is None:
+            return self.__convert_operator(tarski_act)
+        return self.operator_action(i)
+
+    def operator_action(self, i: int) -> Action:
+        """Retrieves the macq action of a ground operator of the problem.
+
+        Args:
+            i (int):
+                The position of the operator in the grounded instance.
+
+        Returns:
+            The action of the operator, shared by every step that takes it.
+        """
+        action = self._op_actions[i]
+        if action is None:
+            action = self._op_actions[i] = self.__convert_operator(
+                self.instance.operators[i]
+            )
+        return action
+
+    def __convert_operator(self, tarski_act: PlainOperator) -> Action:
         name_split = tarski_act.name.replace(")", "").split("(")
         name = name_split[0]
-        obj_names = name_split[1].split(", ")
+        # actions without parameters are named "name()"
+        obj_names = name_split[1].split(", ") if name_split[1] else []
 
         tarski_objs_mapping = {}
         precond = set()
@@ -301,56 +439,45 @@ class Generator:
             else Action(name=name, obj_params=obj_params)
         )
 
-
     def change_init(
         self,
         init_fluents: Union[Set[Fluent], List[Fluent]],
-        new_domain: str = "new_domain.pddl",
-        new_prob: str = "new_prob.pddl",
+        new_domain: str = None,
+        new_prob: str = None,
     ):
-        """Changes the initial state of the `Generator`. The domain and problem PDDL files
-        are rewritten to accomodate the new goal for later use by a planner.
+        """Changes the initial state of the `Generator`. Only the problem in memory is
+        updated (planners solve it directly), unless new PDDL files are requested.
 
         Parameters:
             init_fluents (Union[Set[Fluent], List[Fluent]]):
                 The collection of fluents that will make up the new initial state.
             new_domain (str):
-                The name of the new domain file.
+                Optional; The name of a new domain file to write the domain to.
             new_prob (str):
-                The name of the new problem file.
+                Optional; The name of a new problem file to write the problem to.
         """
-        init = create(self.lang)
-        for f in init_fluents:
-            # convert fluents to tarski Atoms
-            atom = Atom(
-                self.lang.get_predicate(f.name),
-                [self.lang.get(o.name) for o in f.objects],
-            )
-            init.add(atom.predicate, *atom.subterms)
-        self.problem.init = init
+        self.problem.init = self.macq_fluents_to_tarski_state(init_fluents)
+        self.modified = True
 
-        # rewrite PDDL files appropriately
-        writer = iofs.FstripsWriter(self.problem)
-        writer.write(new_domain, new_prob)
-        self.pddl_dom = new_domain
-        self.pddl_prob = new_prob
+        if new_domain is not None or new_prob is not None:
+            self.write_pddl(new_domain, new_prob)
 
     def change_goal(
         self,
         goal_fluents: Union[Set[Fluent], List[Fluent]],
-        new_domain: str = "new_domain.pddl",
-        new_prob: str = "new_prob.pddl",
+        new_domain: str = None,
+        new_prob: str = None,
     ):
-        """Changes the goal of the `Generator`. The domain and problem PDDL files
-        are rewritten to accomodate the new goal for later use by a planner.
+        """Changes the goal of the `Generator`. Only the problem in memory is updated
+        (planners solve it directly), unless new PDDL files are requested.
 
         Args:
             goal_fluents (Union[Set[Fluent], List[Fluent]]):
                 The collection of fluents that will make up the new goal.
             new_domain (str):
-                The name of the new domain file.
+                Optional; The name of a new domain file to write the domain to.
             new_prob (str):
-                The name of the new problem file.
+                Optional; The name of a new problem file to write the problem to.
 
         Raises:
             InvalidGoalFluent:
@@ -377,75 +504,78 @@ class Generator:
             )
         # reset the goal
         self.problem.goal = flatten(goal)
+        self.modified = True
+
+        if new_domain is not None or new_prob is not None:
+            self.write_pddl(new_domain, new_prob)
+
+    def write_pddl(self, new_domain: str = None, new_prob: str = None):
+        """Writes the domain and (possibly changed) problem of the `Generator` to PDDL files,
+        which become the generator's PDDL files.
 
-        # rewrite PDDL files appropriately
+        Args:
+            new_domain (str):
+                Optional; The name of the new domain file. Defaults to "new_domain.pddl".
+            new_prob (str):
+                Optional; The name of the new problem file. Defaults to "new_prob.pddl".
+        """
+        if new_domain is None:
+            new_domain = "new_domain.pddl"
+        if new_prob is None:
+            new_prob = "new_prob.pddl"
         writer = iofs.FstripsWriter(self.problem)
         writer.write(new_domain, new_prob)
         self.pddl_dom = new_domain
         self.pddl_prob = new_prob
 
-    def generate_plan(self, from_ipc_file: bool = False, filename: str = None):
-        """Generates a plan. If reading from an IPC file, the `Plan` is read directly. Otherwise, if the initial state or
-        goal was changed, these changes are taken into account through the updated PDDL files. If no changes were made, the
-        default nitial state/goal in the initial problem file is used.
+    def generate_plan(
+        self,
+        from_ipc_file: bool = False,
+        filename: str = None,
+        planner: Planner = None,
+    ):
+        """Generates a plan. If reading from an IPC file, the `Plan` is read directly. Otherwise, the problem is looked up
+        in the plan cache, if any, or solved by a planner, taking changes to the initial state or goal into account. If no changes were made, the default
+        initial state/goal in the initial problem file is used.
 
         Args:
             from_ipc_file (bool):
                 Option to read a `Plan` from an IPC file instead of the `Generator`'s problem file. Defaults to False.
             filename (str):
                 The name of the file to read the plan from.
+            planner (Planner):
+                Optional; The planner to solve the problem with. Defaults to the generator's planner.
 
         Returns:
             A `Plan` object that holds all the actions taken.
         """
         if not from_ipc_file:
-            # if the files are only being generated from the problem ID and are unaltered, retrieve the existing plan (note that
-            # if any changes were made, the local files would be used as the PDDL files are rewritten when changes are made).
-            if self.problem_id and not self.pddl_dom and not self.pddl_prob:
-                plan = get_plan(self.problem_id, formalism='classical')
-            # if you are not just using the unaltered files, use the local files instead
-            else:
-                data = {
-                    "domain": open(self.pddl_dom, "r").read(),
-                    "problem": open(self.pddl_prob, "r").read(),
-                }
-
-                headers = {"persistent": "true"}
-
-                def get_api_response(delays: List[int]):
-                    if delays:
-                        sleep(delays[0])
-                        try:
-                            service_url = "https://solver.planning.domains:5001/package/lama-first/solve"
-                            solve_request = requests.post(service_url, json=data, headers=headers).json()
-                            celery_result = requests.get("https://solver.planning.domains:5001/" +
-                                                         solve_request['result'])
-                            while celery_result.json().get("status", "") == 'PENDING':
-                                sleep(delays[0])
-                                celery_result = requests.get("https://solver.planning.domains:5001/" +
-                                                             solve_request['result'])
-                            sas_plan = celery_result.json()['result']['output']['sas_plan']
-                            actions_with_objects = re.findall(r'\((.*?)\)', sas_plan)
-
-                            plan_list = [f'({action})' for action in actions_with_objects]
-                            return plan_list
-
-                        except KeyError:
-                            return get_api_response(delays[1:])
-
-                plan = get_api_response([0, 1, 3, 5, 10])
-                if plan is None:
-                    raise PlanningDomainsAPIError(
-                        "Could not get a valid response from the planning.domains solver after 5 attempts.",
-                    )
-
-        else:
-            f = open(filename, "r")
+            if self.plan_cache is not None:
+                plan = self.plan_cache.get(self)
+                if plan is not None:
+                    return plan
+            plan = (self.planner if planner is None else planner).solve(self)
+            if self.plan_cache is not None:
+                self.plan_cache.put(self, plan)
+            return plan
+
+        with open(filename, "r") as f:
             plan = list(filter(lambda x: ";" not in x, f.read().splitlines()))
 
         # convert to a list of tarski PlainOperators (actions)
         return Plan([self.op_dict[p] for p in plan if p in self.op_dict])
 
+    def new_trace(self) -> Trace:
+        """Creates an empty trace to generate steps into.
+
+        Returns:
+            A `DeltaTrace` over the fluent universe if `delta_traces` is set, or else an
+            empty `Trace`.
+        """
+        if self.delta_traces:
+            return DeltaTrace(self.fluent_universe)
+        return Trace()
+
     def generate_single_trace_from_plan(self, plan: Plan):
         """Generates a single trace from the plan taken as input.
 
@@ -454,9 +584,9 @@ class Generator:
                 The plan to generate a trace from.
 
         Returns:
-            The trace generated from the plan.
+            The trace generated from the plan, a `DeltaTrace` if `delta_traces` is set.
         """
-        trace = Trace()
+        trace = self.new_trace()
         actions = plan.actions
         plan_len = len(actions)
         # get initial state
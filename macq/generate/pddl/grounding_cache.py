@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple
+import tarski
+from tarski.fol import FirstOrderLanguage
+from tarski.fstrips.action import PlainOperator
+from tarski.fstrips.fstrips import AddEffect, DelEffect
+from tarski.syntax import Constant
+from tarski.syntax.builtins import BuiltinPredicateSymbol
+from tarski.syntax.formulas import (
+    Atom,
+    CompoundFormula,
+    Connective,
+    Contradiction,
+    Tautology,
+    bot,
+    top,
+)
+
+from ...trace import Fluent, PlanningObject
+
+# bump whenever the format of the cached groundings changes
+CACHE_VERSION = 1
+
+
+class UncacheableGrounding(Exception):
+    """Raised when a grounded problem uses features the grounding cache cannot store
+    (e.g. functional or universal effects)."""
+
+    def __init__(self, feature):
+        super().__init__(f"Cannot cache a grounding with {feature}.")
+
+
+def grounding_key(dom: str, prob: str, observe_static_fluents: bool) -> str:
+    """Computes the key a grounding is cached under, from the contents of the problem.
+
+    Args:
+        dom (str):
+            The PDDL domain.
+        prob (str):
+            The PDDL problem.
+        observe_static_fluents (bool):
+            Whether the grounded fluents include the static ones.
+
+    Returns:
+        The hexadecimal digest identifying the grounding.
+    """
+    digest = hashlib.sha256()
+    header = f"{CACHE_VERSION} {tarski.__version__} {bool(observe_static_fluents)}"
+    for part in (header, dom, prob):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def load_grounding(
+    cache_dir: str, key: str, lang: FirstOrderLanguage
+) -> Optional[Tuple[List[PlainOperator], List[Fluent]]]:
+    """Loads a cached grounding, rebuilding its operators in the given language.
+
+    Args:
+        cache_dir (str):
+            The directory of the cache.
+        key (str):
+            The key of the grounding, see `grounding_key`.
+        lang (FirstOrderLanguage):
+            The language of the (parsed) problem the grounding belongs to.
+
+    Returns:
+        The grounded operators and fluents, or None if the grounding is not cached.
+    """
+    path = Path(cache_dir) / f"{key}.json"
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != CACHE_VERSION:
+        return None
+
+    operators = [
+        PlainOperator(
+            lang,
+            name,
+            _load_formula(precondition, lang),
+            [
+                (AddEffect if add else DelEffect)(
+                    _load_atom(atom, lang), _load_formula(condition, lang)
+                )
+                for add, atom, condition in effects
+            ],
+        )
+        for name, precondition, effects in data["operators"]
+    ]
+    fluents = [
+        Fluent(name, [PlanningObject(obj_type, obj) for obj_type, obj in objects])
+        for name, objects in data["fluents"]
+    ]
+    return operators, fluents
+
+
+def save_grounding(
+    cache_dir: str, key: str, operators: List[PlainOperator], fluents: List[Fluent]
+):
+    """Stores a grounding in the cache. Groundings the cache cannot represent are skipped.
+
+    Args:
+        cache_dir (str):
+            The directory of the cache. Created if it does not exist.
+        key (str):
+            The key of the grounding, see `grounding_key`.
+        operators (List[PlainOperator]):
+            The grounded operators.
+        fluents (List[Fluent]):
+            The grounded fluents.
+    """
+    try:
+        data = {
+            "version": CACHE_VERSION,
+            "operators": [
+                [op.name, _dump_formula(op.precondition), _dump_effects(op)]
+                for op in operators
+            ],
+            "fluents": [
+                [f.name, [[o.obj_type, o.name] for o in f.objects]] for f in fluents
+            ],
+        }
+    except UncacheableGrounding:
+        return
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # write to a temporary file first so readers never see a partial grounding
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, Path(cache_dir) / f"{key}.json")
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def _dump_effects(op: PlainOperator):
+    effects = []
+    for effect in op.effects:
+        if not isinstance(effect, (AddEffect, DelEffect)):
+            raise UncacheableGrounding(type(effect).__name__)
+        effects.append(
+            [
+                isinstance(effect, AddEffect),
+                _dump_atom(effect.atom),
+                _dump_formula(effect.condition),
+            ]
+        )
+    return effects
+
+
+def _dump_atom(atom: Atom):
+    if not all(isinstance(term, Constant) for term in atom.subterms):
+        raise UncacheableGrounding("non-constant terms")
+    symbol = atom.predicate.name
+    builtin = isinstance(symbol, BuiltinPredicateSymbol)
+    return [
+        symbol.value if builtin else symbol,
+        builtin,
+        [term.name for term in atom.subterms],
+    ]
+
+
+def _load_atom(data, lang: FirstOrderLanguage) -> Atom:
+    symbol, builtin, terms = data
+    if builtin:
+        symbol = BuiltinPredicateSymbol(symbol)
+    return Atom(lang.get_predicate(symbol), [lang.get_constant(t) for t in terms])
+
+
+def _dump_formula(formula):
+    if isinstance(formula, Tautology):
+        return "T"
+    if isinstance(formula, Contradiction):
+        return "F"
+    if isinstance(formula, Atom):
+        return _dump_atom(formula)
+    if isinstance(formula, CompoundFormula):
+        return {
+            formula.connective.name: [_dump_formula(f) for f in formula.subformulas]
+        }
+    raise UncacheableGrounding(type(formula).__name__)
+
+
+def _load_formula(data, lang: FirstOrderLanguage):
+    if data == "T":
+        return top
+    if data == "F":
+        return bot
+    if isinstance(data, dict):
+        ((connective, subformulas),) = data.items()
+        return CompoundFormula(
+            Connective[connective], [_load_formula(f, lang) for f in subformulas]
+        )
+    return _load_atom(data, lang)
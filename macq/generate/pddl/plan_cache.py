@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
+from weakref import WeakKeyDictionary
+from tarski.io import fstrips as iofs
+from tarski.syntax.formulas import CompoundFormula, Connective
+
+from ..plan import Plan
+
+if TYPE_CHECKING:
+    from .generator import Generator
+
+# bump whenever the format of the cached plans changes
+PLAN_CACHE_VERSION = 1
+
+
+class PlanCache:
+    """A cache of the plans found for (domain, initial state, goal) triples, consulted by
+    `Generator.generate_plan` before solving a problem with a planner.
+
+    Plans are kept in memory with least-recently-used eviction and, if a cache directory
+    is given, also stored on disk (one JSON file per problem), so later runs reuse them.
+    Plans are stored as the names of their ground operators; a cached plan using an
+    operator the asking generator did not ground is treated as a miss.
+
+    Attributes:
+        capacity (int):
+            The maximum number of plans kept in memory.
+        cache_dir (str | None):
+            The directory plans are stored in, if any.
+        hits (int):
+            The number of lookups answered from memory.
+        disk_hits (int):
+            The number of lookups answered from disk.
+        misses (int):
+            The number of lookups that were not answered.
+    """
+
+    def __init__(self, capacity: int = 1024, cache_dir: Optional[str] = None):
+        """Initializes an empty plan cache.
+
+        Args:
+            capacity (int):
+                Optional; The maximum number of plans kept in memory. Defaults to 1024.
+            cache_dir (str):
+                Optional; The directory to store plans in. Created when the first plan is
+                stored. Defaults to keeping plans in memory only.
+
+        Raises:
+            ValueError:
+                Raised if the capacity is not positive.
+        """
+        if capacity <= 0:
+            raise ValueError("The capacity of a plan cache must be positive.")
+        self.capacity = capacity
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._plans: "OrderedDict[str, List[str]]" = OrderedDict()
+        # the domain part of the keys, computed once per generator
+        self._domain_keys: "WeakKeyDictionary[Generator, str]" = WeakKeyDictionary()
+
+    def __len__(self):
+        return len(self._plans)
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of lookups answered from memory or disk (0 before any lookup)."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        """Retrieves the statistics of the cache.
+
+        Returns:
+            A dictionary with the number of `hits`, `disk_hits`, `misses`, the `hit_rate`,
+            and the number of plans in memory (`size`).
+        """
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "size": len(self),
+        }
+
+    def key(self, generator: "Generator") -> str:
+        """Computes the key of the current problem of a generator: a digest of its domain
+        and objects, the atoms of its initial state, and the atoms of its goal.
+
+        Args:
+            generator (Generator):
+                The generator whose problem to compute the key of.
+
+        Returns:
+            The hexadecimal digest identifying the problem.
+        """
+        domain_key = self._domain_keys.get(generator)
+        if domain_key is None:
+            domain_key = self._domain_keys[generator] = _digest(
+                iofs.FstripsWriter(generator.problem).print_domain(),
+                *sorted(f"{c.sort.name} {c.name}" for c in generator.lang.constants()),
+            )
+        init = sorted(str(atom) for atom in generator.problem.init.as_atoms())
+        return _digest(
+            f"{PLAN_CACHE_VERSION}", domain_key, *init, "\0goal", *_goal_parts(generator)
+        )
+
+    def get(self, generator: "Generator") -> Optional[Plan]:
+        """Looks up the plan of the current problem of a generator.
+
+        Args:
+            generator (Generator):
+                The generator whose problem to look up.
+
+        Returns:
+            The cached plan, made of the generator's ground operators, or None if the
+            problem has no usable cached plan.
+        """
+        key = self.key(generator)
+        names = self._plans.get(key)
+        if names is not None:
+            self._plans.move_to_end(key)
+            plan = self._to_plan(generator, names)
+            if plan is not None:
+                self.hits += 1
+                return plan
+        else:
+            names = self._load(key)
+            if names is not None:
+                self._remember(key, names)
+                plan = self._to_plan(generator, names)
+                if plan is not None:
+                    self.disk_hits += 1
+                    return plan
+        self.misses += 1
+        return None
+
+    def put(self, generator: "Generator", plan: Plan):
+        """Stores the plan of the current problem of a generator.
+
+        Args:
+            generator (Generator):
+                The generator whose problem the plan solves.
+            plan (Plan):
+                The plan.
+        """
+        key = self.key(generator)
+        names = [op.name for op in plan.actions]
+        self._remember(key, names)
+        if self.cache_dir is not None:
+            self._save(key, names)
+
+    def clear(self):
+        """Empties the in-memory cache and resets the statistics. Stored plans are kept."""
+        self._plans.clear()
+        self.hits = self.disk_hits = self.misses = 0
+
+    def _remember(self, key: str, names: List[str]):
+        self._plans[key] = names
+        self._plans.move_to_end(key)
+        while len(self._plans) > self.capacity:
+            self._plans.popitem(last=False)
+
+    @staticmethod
+    def _to_plan(generator: "Generator", names: List[str]) -> Optional[Plan]:
+        index = generator.op_index
+        if not all(name in index for name in names):
+            return None
+        operators = generator.instance.operators
+        return Plan([operators[index[name]] for name in names])
+
+    def _path(self, key: str) -> Path:
+        return Path(self.cache_dir) / f"{key}.plan.json"
+
+    def _load(self, key: str) -> Optional[List[str]]:
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._path(key), "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != PLAN_CACHE_VERSION:
+            return None
+        return data["plan"]
+
+    def _save(self, key: str, names: List[str]):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # write to a temporary file first so readers never see a partial plan
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"version": PLAN_CACHE_VERSION, "plan": names}, f)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+
+def _goal_parts(generator: "Generator") -> List[str]:
+    goal = generator.problem.goal
+    if isinstance(goal, CompoundFormula) and goal.connective == Connective.And:
+        return sorted(str(formula) for formula in goal.subformulas)
+    return [str(goal)]
+
+
+def _digest(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
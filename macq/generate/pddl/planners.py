@@ -0,0 +1,331 @@
+import heapq
+import re
+from itertools import count
+from time import sleep
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+import requests
+from tarski.io import fstrips as iofs
+from tarski.syntax.formulas import Atom, CompoundFormula, Connective, Tautology
+
+from .planning_domains_api import get_plan
+from .successor_generator import SuccessorGenerator, atom_key
+from ..plan import Plan
+
+if TYPE_CHECKING:
+    from .generator import Generator
+
+
+class PlanningDomainsAPIError(Exception):
+    """Raised when a valid response cannot be obtained from the planning.domains solver."""
+
+    def __init__(self, message):
+        super().__init__(message)
+
+
+class PlanNotFound(Exception):
+    """Raised when a planner cannot find a plan for the problem of a generator."""
+
+    def __init__(self, message):
+        super().__init__(message)
+
+
+class Planner:
+    """A planner `Generator.generate_plan` can use to solve the problem of a generator
+    (with its current initial state and goal, see `Generator.change_init` and
+    `Generator.change_goal`)."""
+
+    def solve(self, generator: "Generator") -> Plan:
+        """Solves the problem of a generator.
+
+        Args:
+            generator (Generator):
+                The generator whose problem to solve.
+
+        Returns:
+            The plan found, made of the generator's ground operators.
+        """
+        raise NotImplementedError()
+
+
+class RemotePlanner(Planner):
+    """Solves problems with the online planning.domains solver (LAMA, first solution).
+
+    Unaltered problems loaded from a problem ID get the plan stored in the
+    planning.domains API instead. Otherwise the generator's PDDL files are sent to the
+    solver if the problem is unaltered, or else the problem in memory, serialized to PDDL.
+
+    Attributes:
+        delays (List[int]):
+            The delays (in seconds) before each attempt at getting a plan from the solver.
+    """
+
+    SERVICE_URL = "https://solver.planning.domains:5001"
+
+    def __init__(self, delays: List[int] = None):
+        """Initializes the remote planner.
+
+        Args:
+            delays (List[int]):
+                Optional; The delays (in seconds) before each attempt at getting a plan
+                from the solver. Defaults to 5 attempts, 0, 1, 3, 5 and 10 seconds apart.
+        """
+        self.delays = [0, 1, 3, 5, 10] if delays is None else delays
+
+    def solve(self, generator: "Generator") -> Plan:
+        """Solves the problem of a generator.
+
+        Args:
+            generator (Generator):
+                The generator whose problem to solve.
+
+        Returns:
+            The plan found, made of the generator's ground operators.
+
+        Raises:
+            PlanningDomainsAPIError:
+                Raised if no valid response could be obtained from the solver.
+        """
+        # if the problem was loaded from a problem ID and is unaltered, retrieve the existing plan
+        if generator.problem_id and not generator.modified:
+            plan = get_plan(generator.problem_id, formalism="classical")
+        else:
+            # send altered problems as they are in memory, without going through files
+            if generator.modified or not generator.pddl_dom:
+                writer = iofs.FstripsWriter(generator.problem)
+                data = {"domain": writer.print_domain(), "problem": writer.print_instance()}
+            else:
+                with open(generator.pddl_dom, "r") as dom, open(generator.pddl_prob, "r") as prob:
+                    data = {"domain": dom.read(), "problem": prob.read()}
+            plan = self._get_api_response(data, self.delays)
+            if plan is None:
+                raise PlanningDomainsAPIError(
+                    f"Could not get a valid response from the planning.domains solver after {len(self.delays)} attempts.",
+                )
+        # convert to a list of tarski PlainOperators (actions)
+        return Plan([generator.op_dict[p] for p in plan if p in generator.op_dict])
+
+    def _get_api_response(self, data: Dict[str, str], delays: List[int]):
+        headers = {"persistent": "true"}
+        if delays:
+            sleep(delays[0])
+            try:
+                solve_request = requests.post(
+                    f"{self.SERVICE_URL}/package/lama-first/solve", json=data, headers=headers
+                ).json()
+                celery_result = requests.get(f"{self.SERVICE_URL}/{solve_request['result']}")
+                while celery_result.json().get("status", "") == "PENDING":
+                    sleep(delays[0])
+                    celery_result = requests.get(f"{self.SERVICE_URL}/{solve_request['result']}")
+                sas_plan = celery_result.json()["result"]["output"]["sas_plan"]
+                actions_with_objects = re.findall(r"\((.*?)\)", sas_plan)
+
+                plan_list = [f"({action})" for action in actions_with_objects]
+                return plan_list
+
+            except KeyError:
+                return self._get_api_response(data, delays[1:])
+
+
+class LocalPlanner(Planner):
+    """Solves problems offline, with a greedy best-first search over the compiled
+    successor generator of the generator's grounded problem (see
+    `Generator.get_successor_generator`).
+
+    States are evaluated with a delete-relaxation heuristic: either h_add (the sum of the
+    relaxed costs of the goal facts) or h_FF (the length of a relaxed plan extracted from
+    the h_add supporters). Negative preconditions and goals are ignored by the heuristic.
+    Plans are not guaranteed to be optimal.
+
+    Attributes:
+        heuristic (str):
+            The heuristic, "ff" or "add".
+        max_expansions (int | None):
+            The maximum number of states to expand before giving up, if any.
+    """
+
+    HEURISTICS = ("ff", "add")
+
+    def __init__(self, heuristic: str = "ff", max_expansions: Optional[int] = None):
+        """Initializes the local planner.
+
+        Args:
+            heuristic (str):
+                Optional; The heuristic, "ff" or "add". Defaults to "ff".
+            max_expansions (int):
+                Optional; The maximum number of states to expand before giving up.
+                Defaults to no limit.
+
+        Raises:
+            ValueError:
+                Raised if the heuristic is unknown.
+        """
+        if heuristic not in self.HEURISTICS:
+            raise ValueError(
+                f"Unknown heuristic {heuristic}, expected one of {', '.join(self.HEURISTICS)}."
+            )
+        self.heuristic = heuristic
+        self.max_expansions = max_expansions
+
+    def solve(self, generator: "Generator") -> Plan:
+        """Solves the problem of a generator.
+
+        Args:
+            generator (Generator):
+                The generator whose problem to solve.
+
+        Returns:
+            The plan found, made of the generator's ground operators.
+
+        Raises:
+            PlanNotFound:
+                Raised if the problem is unsolvable, cannot be compiled, has a goal that is
+                not a conjunction of (possibly negated) atoms, or if no plan was found within
+                `max_expansions` expansions.
+        """
+        successors = generator.get_successor_generator()
+        if not isinstance(successors, SuccessorGenerator):
+            raise PlanNotFound(
+                "The local planner can only solve problems with a compiled successor generator."
+            )
+        goal_pos: List[int] = []
+        goal_neg: List[int] = []
+        self._encode_goal(successors, generator.problem.goal, goal_pos, goal_neg)
+        search = _GreedyBestFirstSearch(successors, goal_pos, goal_neg, self.heuristic)
+        ops = search.run(successors.encode(generator.problem.init), self.max_expansions)
+        return Plan([generator.instance.operators[op] for op in ops])
+
+    def _encode_goal(
+        self, successors: SuccessorGenerator, formula, pos: List[int], neg: List[int]
+    ):
+        facts = successors.facts
+        if isinstance(formula, Tautology):
+            return
+        if isinstance(formula, Atom):
+            pos.append(facts.setdefault(atom_key(formula), len(facts)))
+        elif isinstance(formula, CompoundFormula) and formula.connective == Connective.And:
+            for subformula in formula.subformulas:
+                self._encode_goal(successors, subformula, pos, neg)
+        elif (
+            isinstance(formula, CompoundFormula)
+            and formula.connective == Connective.Not
+            and isinstance(formula.subformulas[0], Atom)
+        ):
+            neg.append(facts.setdefault(atom_key(formula.subformulas[0]), len(facts)))
+        else:
+            raise PlanNotFound(f"The local planner does not support the goal {formula}.")
+
+
+class _GreedyBestFirstSearch:
+    def __init__(
+        self,
+        successors: SuccessorGenerator,
+        goal_pos: List[int],
+        goal_neg: List[int],
+        heuristic: str,
+    ):
+        self.successors = successors
+        self.goal_pos = goal_pos
+        self.goal_pos_mask = sum(1 << fact for fact in goal_pos)
+        self.goal_neg_mask = sum(1 << fact for fact in goal_neg)
+        self.ff = heuristic == "ff"
+        self.add_facts = [
+            [fact for fact in facts if (add >> fact) & 1]
+            for facts, add in zip(successors.effect_facts, successors.adds)
+        ]
+        self.num_pre = [len(pos) for pos in successors.pre_pos]
+        self.no_pre = [op for op, n in enumerate(self.num_pre) if n == 0]
+
+    def is_goal(self, state: int) -> bool:
+        return state & self.goal_pos_mask == self.goal_pos_mask and not (
+            state & self.goal_neg_mask
+        )
+
+    def run(self, start: int, max_expansions: Optional[int]) -> List[int]:
+        parents: Dict[int, Optional[Tuple[int, int]]] = {start: None}
+        h = self.evaluate(start)
+        if h is None:
+            raise PlanNotFound("The goal is unreachable from the initial state.")
+        tie = count()
+        frontier = [(h, next(tie), start)]
+        expansions = 0
+        while frontier:
+            _, _, state = heapq.heappop(frontier)
+            if self.is_goal(state):
+                return self.extract_plan(parents, state)
+            if max_expansions is not None and expansions >= max_expansions:
+                raise PlanNotFound(f"No plan found within {max_expansions} expansions.")
+            expansions += 1
+            for op in self.successors.applicable_in(state):
+                succ = self.successors.successor(state, op)
+                if succ in parents:
+                    continue
+                parents[succ] = (state, op)
+                h = self.evaluate(succ)
+                if h is not None:
+                    heapq.heappush(frontier, (h, next(tie), succ))
+        raise PlanNotFound("The problem is unsolvable.")
+
+    def extract_plan(self, parents, state: int) -> List[int]:
+        ops = []
+        parent = parents[state]
+        while parent is not None:
+            state, op = parent
+            ops.append(op)
+            parent = parents[state]
+        ops.reverse()
+        return ops
+
+    def evaluate(self, state: int) -> Optional[int]:
+        """Computes the heuristic value of a state, or None if it is a (relaxed) dead end."""
+        successors = self.successors
+        costs: Dict[int, int] = {}
+        supporters: Dict[int, int] = {}
+        frontier = []
+        bits = state
+        while bits:
+            low = bits & -bits
+            fact = low.bit_length() - 1
+            costs[fact] = 0
+            frontier.append((0, fact))
+            bits ^= low
+        unsat = list(self.num_pre)
+        op_costs = [0] * len(unsat)
+
+        def apply(op: int, cost: int):
+            for fact in self.add_facts[op]:
+                if cost < costs.get(fact, cost + 1):
+                    costs[fact] = cost
+                    supporters[fact] = op
+                    heapq.heappush(frontier, (cost, fact))
+
+        for op in self.no_pre:
+            apply(op, 1)
+        remaining = {fact for fact in self.goal_pos if fact not in costs}
+        while remaining and frontier:
+            cost, fact = heapq.heappop(frontier)
+            if cost > costs[fact]:
+                continue
+            remaining.discard(fact)
+            for op in successors.pos_index.get(fact, ()):
+                op_costs[op] += cost
+                unsat[op] -= 1
+                if unsat[op] == 0:
+                    apply(op, op_costs[op] + 1)
+        if remaining:
+            return None
+
+        if not self.ff:
+            return sum(costs[fact] for fact in self.goal_pos)
+        relaxed_plan = set()
+        stack = [fact for fact in self.goal_pos if costs[fact] > 0]
+        seen = set()
+        while stack:
+            fact = stack.pop()
+            if fact in seen:
+                continue
+            seen.add(fact)
+            op = supporters[fact]
+            if op not in relaxed_plan:
+                relaxed_plan.add(op)
+                stack.extend(f for f in successors.pre_pos[op] if costs[f] > 0)
+        return len(relaxed_plan)
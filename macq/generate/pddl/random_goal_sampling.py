@@ -1,10 +1,32 @@
+import multiprocessing
 import random
-from typing import Dict
+from typing import Dict, Iterator, List, Optional, Tuple, Type, Union
 from tarski.syntax.formulas import Atom
-from collections import OrderedDict
+from collections import OrderedDict, deque
+from warnings import warn
 from . import VanillaSampling
-from ...trace import TraceList, State
-from ...utils import PercentError, basic_timer, progress
+from .plan_cache import PlanCache
+from .planners import Planner, PlanNotFound
+from ..plan import Plan
+from ...trace import Fluent, PackedState, TraceList, State, Step, Trace
+from ...observation import Observation
+from ...utils import Deadline, PercentError, TraceSearchTimeOut, progress
+
+
+# the sampler of a worker process, see `RandomGoalSampling.goal_sampling`
+_worker_sampler: Optional["RandomGoalSampling"] = None
+
+
+def _init_worker(sampler: "RandomGoalSampling"):
+    global _worker_sampler
+    _worker_sampler = sampler
+
+
+def _evaluate_goal(task: Tuple[int, Optional[List[Fluent]]]):
+    """Evaluates a candidate goal in a worker process, see `RandomGoalSampling._evaluate_goal`."""
+    seed, init = task
+    random.seed(seed)
+    return _worker_sampler._evaluate_goal(init)
 
 
 class RandomGoalSampling(VanillaSampling):
@@ -26,6 +48,8 @@ class RandomGoalSampling(VanillaSampling):
         goals_inits_plans (List[Dict]):
             A list of dictionaries, where each dictionary stores the generated goal state as the key and the initial state and plan used to
             reach the goal as values.
+        num_chains (int):
+            The number of independent hill-climbing chains goals are sampled from, with `enforced_hill_climbing_sampling`.
     """
 
     def __init__(
@@ -39,6 +63,14 @@ class RandomGoalSampling(VanillaSampling):
         problem_id: int = None,
         max_time: float = 30,
         observe_pres_effs: bool = False,
+        observe_static_fluents: bool = False,
+        seed: int = None,
+        workers: int = 1,
+        num_chains: int = 1,
+        cache_dir: str = None,
+        planner: Planner = None,
+        plan_cache: PlanCache = None,
+        delta_traces: bool = False,
     ):
         """
         Initializes a random goal state trace sampler using the plan length, number of traces,
@@ -65,12 +97,32 @@ class RandomGoalSampling(VanillaSampling):
                 The maximum time allowed for a trace to be generated.
             observe_pres_effs (bool):
                 Option to observe action preconditions and effects upon generation.
+            observe_static_fluents (bool):
+                Option to include the static fluents in the generated states.
+            seed (int):
+                The seed for the random number generator.
+            workers (int):
+                The number of processes to evaluate candidate goals with. Defaults to 1, evaluating them in this
+                process. See `goal_sampling`.
+            num_chains (int):
+                The number of independent hill-climbing chains to sample goals from, with
+                `enforced_hill_climbing_sampling`. Defaults to 1. See `goal_sampling`.
+            cache_dir (str):
+                Optional; A directory to cache the grounded problem in. Defaults to no caching.
+            planner (Planner):
+                Optional; The planner used to generate plans. Defaults to a `RemotePlanner`.
+            plan_cache (PlanCache):
+                Optional; A cache of the plans generated. Defaults to no caching.
+            delta_traces (bool):
+                Optional; Whether to generate `DeltaTrace`s, storing the states as deltas.
+                Defaults to False.
         """
         if subset_size_perc < 0 or subset_size_perc > 1:
             raise PercentError()
         self.steps_deep = steps_deep
         self.enforced_hill_climbing_sampling = enforced_hill_climbing_sampling
         self.subset_size_perc = subset_size_perc
+        self.num_chains = num_chains
         self.goals_inits_plans = []
         super().__init__(
             dom=dom,
@@ -78,102 +130,283 @@ class RandomGoalSampling(VanillaSampling):
             problem_id=problem_id,
             num_traces=num_traces,
             observe_pres_effs=observe_pres_effs,
+            observe_static_fluents=observe_static_fluents,
+            seed=seed,
             max_time=max_time,
+            workers=workers,
+            cache_dir=cache_dir,
+            planner=planner,
+            plan_cache=plan_cache,
+            delta_traces=delta_traces,
         )
 
-    def goal_sampling(self):
+    def goal_sampling(self, num_goals: int = None):
         """Samples goals by randomly generating candidate goal states k (`steps_deep`) steps deep, then running planners on those
         goal states to ensure the goals are complex enough (i.e. cannot be reached in too few steps). Candidate
         goal states are generated for a set amount of time indicated by MAX_GOAL_SEARCH_TIME, and the goals with the
         longest plans (the most complex goals) are selected.
 
+        If `workers` is greater than 1, candidate goals are evaluated concurrently by a pool of forked processes within
+        the same `max_time` budget. With `enforced_hill_climbing_sampling`, each of the `num_chains` chains has one candidate
+        under evaluation at a time, starting from the goal state of the last goal found on that chain; otherwise candidates
+        all start from the current initial state.
+
+        Args:
+            num_goals (int):
+                Optional; The number of goals to select. Defaults to `num_traces`.
+
         Returns: An OrderedDict holding the longest goal states along with the initial state and plans used to reach them.
         """
+        if num_goals is None:
+            num_goals = self.num_traces
         goal_states = {}
-        self.generate_goals_setup(num_seconds=self.max_time, goal_states=goal_states)()
+        if self.workers > 1 or self.num_chains > 1:
+            self._sample_goals_concurrently(goal_states, num_goals)
+        else:
+            self.generate_goals_setup(
+                num_seconds=self.max_time, goal_states=goal_states, num_goals=num_goals
+            )()
         # sort the results by plan length and get the k largest ones
         filtered_goals = OrderedDict(
             sorted(goal_states.items(), key=lambda x: len(x[1]["plan"].actions))
         )
-        to_del = list(filtered_goals.keys())[: len(filtered_goals) - self.num_traces]
+        to_del = list(filtered_goals.keys())[: len(filtered_goals) - num_goals]
         for d in to_del:
             del filtered_goals[d]
         return filtered_goals
 
-    def generate_goals_setup(self, num_seconds: float, goal_states: Dict):
-        @basic_timer(num_seconds=num_seconds)
+    def generate_goals_setup(self, num_seconds: float, goal_states: Dict, num_goals: int = None):
+        if num_goals is None:
+            num_goals = self.num_traces
+
         def generate_goals(self=self, goal_states=goal_states):
             """Helper function for `goal_sampling`. Generates as many goals as possible within the specified max_time seconds (timing is
-            enforced by the basic_timer wrapper).
+            enforced by a deadline, checked between goals and at every step of the walks, and interrupting the planner if possible).
 
-            The outside function is a wrapper that provides parameters for both the timer
-            wrapper and the function.
+            The outside function provides the parameters of both the deadline and the function.
 
-            Given the specified number of traces `num_traces`, if `num_traces` plans of length k (`steps_deep`) are found before
+            Given the specified number of goals `num_goals`, if `num_goals` plans of length k (`steps_deep`) are found before
             the time is up, exit early.
 
             Args:
                 goal_states (Dict):
                     The dictionary to fill with the values of each goal state, initial state, and plan.
             """
-            # create a sampler to test the complexity of the new goal by running a planner on it
-            k_length_plans = 0
-            while True:
-                # generate a trace of the specified length and retrieve the state of the last step
-                state = self.generate_single_trace_setup(
-                    num_seconds, self.steps_deep
-                )()[-1].state
-
-                # get all positive fluents (only positive fluents can be used for a goal)
-                goal_f = [f for f in state if state[f]]
-                # get next initial state (only used for enforced hill climbing sampling)
-                next_init_f = goal_f.copy()
-                # get the subset size
-                subset_size = int(len(state.fluents) * self.subset_size_perc)
-                # if necessary, take a subset of the fluents
-                if len(goal_f) > subset_size:
-                    random.shuffle(goal_f)
-                    goal_f = goal_f[:subset_size]
-
-                self.change_goal(goal_fluents=goal_f)
-
-                # ensure that the goal doesn't hold in the initial state; restart if it does
-                init_state = {str(a) for a in self.problem.init.as_atoms()}
-                goal = {str(a) for a in self.problem.goal.subformulas}
-
-                if goal.issubset(init_state):
-                    continue
-
-                try:
-                    # attempt to generate a plan, and find a new goal if a plan can't be found
-                    # should only crash if there are server issues
-                    test_plan = self.generate_plan()
-                except KeyError:
-                    continue
-
-                # create a State and add it to the dictionary
-                state_dict = {}
-                for f in goal_f:
-                    state_dict[f] = True
-                # map each goal to the initial state and plan used to achieve it
-                goal_states[State(state_dict)] = {
-                    "plan": test_plan,
-                    "initial state": self.problem.init,
-                }
-
-                # optionally change the initial state of the sampler for the next iteration to the goal state just generated (ensures more diversity in goals/plans)
-                # use the full state the goal was extracted from as the initial state to prevent planning errors from incomplete initial states
-                if self.enforced_hill_climbing_sampling:
-                    self.change_init(next_init_f)
-
-                # keep track of the number of plans of length k; if we get enough of them, exit early
-                if len(test_plan.actions) >= self.steps_deep:
-                    k_length_plans += 1
-                if k_length_plans >= self.num_traces:
-                    break
+            deadline = Deadline(num_seconds, TraceSearchTimeOut, max_time=num_seconds)
+            try:
+                with deadline.hard():
+                    self._generate_goals(goal_states, num_goals, deadline)
+            except TraceSearchTimeOut:
+                pass
 
         return generate_goals
 
+    def _generate_goals(self, goal_states: Dict, num_goals: int, deadline: Deadline):
+        """Generates goals until `num_goals` plans of length k (`steps_deep`) are found, see `generate_goals_setup`.
+
+        Args:
+            goal_states (Dict):
+                The dictionary to fill with the values of each goal state, initial state, and plan.
+            num_goals (int):
+                The number of plans of length k to find before stopping.
+            deadline (Deadline):
+                The time budget of the goal sampling.
+
+        Raises:
+            TraceSearchTimeOut:
+                Raised once the time budget runs out.
+        """
+        # create a sampler to test the complexity of the new goal by running a planner on it
+        k_length_plans = 0
+        while True:
+            # generate a trace of the specified length and retrieve the state of the last step
+            states, _ = self._random_walk(self.steps_deep, deadline)
+            state = PackedState(
+                self.fluent_universe,
+                self.get_successor_generator().packed_bits(states[-1]),
+            )
+
+            # get all positive fluents (only positive fluents can be used for a goal)
+            goal_f = [f for f in state if state[f]]
+            # get next initial state (only used for enforced hill climbing sampling)
+            next_init_f = goal_f.copy()
+            # get the subset size
+            subset_size = int(len(state.fluents) * self.subset_size_perc)
+            # if necessary, take a subset of the fluents
+            if len(goal_f) > subset_size:
+                random.shuffle(goal_f)
+                goal_f = goal_f[:subset_size]
+            # an empty goal always holds
+            if not goal_f:
+                continue
+
+            self.change_goal(goal_fluents=goal_f)
+
+            # ensure that the goal doesn't hold in the initial state; restart if it does
+            init_state = {str(a) for a in self.problem.init.as_atoms()}
+            goal = {str(a) for a in self.problem.goal.subformulas}
+
+            if goal.issubset(init_state):
+                continue
+
+            try:
+                # attempt to generate a plan, and find a new goal if a plan can't be found
+                # should only crash if there are server issues
+                test_plan = self.generate_plan()
+            except (KeyError, PlanNotFound):
+                continue
+
+            # create a State and add it to the dictionary
+            state_dict = {}
+            for f in goal_f:
+                state_dict[f] = True
+            # map each goal to the initial state and plan used to achieve it
+            goal_states[State(state_dict)] = {
+                "plan": test_plan,
+                "initial state": self.problem.init,
+            }
+
+            # optionally change the initial state of the sampler for the next iteration to the goal state just generated (ensures more diversity in goals/plans)
+            # use the full state the goal was extracted from as the initial state to prevent planning errors from incomplete initial states
+            if self.enforced_hill_climbing_sampling:
+                self.change_init(next_init_f)
+
+            # keep track of the number of plans of length k; if we get enough of them, exit early
+            if len(test_plan.actions) >= self.steps_deep:
+                k_length_plans += 1
+            if k_length_plans >= num_goals:
+                break
+
+    def _sample_goals_concurrently(self, goal_states: Dict, num_goals: int):
+        """Evaluates candidate goals with a pool of `workers` processes if possible, or else in this process, until
+        `num_goals` plans of length k (`steps_deep`) are found or `max_time` seconds have passed. Candidates evaluated
+        in this process are interrupted once the time is up if possible (see `Deadline.hard`), or else between goals.
+
+        Args:
+            goal_states (Dict):
+                The dictionary to fill with the values of each goal state, initial state, and plan.
+            num_goals (int):
+                The number of plans of length k to find before stopping early.
+        """
+        deadline = Deadline(self.max_time)
+        self._sampling_init = self.problem.init
+        # the seeds keep being spawned from the sequence of the sampler, so every pass
+        # evaluates new candidates
+        seeds = self._walk_seeds()
+        pool = None
+        if self.workers > 1:
+            if "fork" in multiprocessing.get_all_start_methods():
+                # forked workers inherit this sampler, so only seeds, initial states and results are pickled
+                self.get_successor_generator()
+                pool = multiprocessing.get_context("fork").Pool(
+                    self.workers, initializer=_init_worker, initargs=(self,)
+                )
+            else:
+                warn(
+                    "Evaluating goals in a single process, as the 'fork' start method is not available."
+                )
+
+        def submit(chain: int, init: Optional[List[Fluent]]):
+            task = (next(seeds), init)
+            pending.append(
+                (chain, init, pool.apply_async(_evaluate_goal, (task,)) if pool else task)
+            )
+
+        # each chain holds the fluents of its initial state, or None for the current initial state
+        if self.enforced_hill_climbing_sampling:
+            chains: List[Optional[List[Fluent]]] = [None] * self.num_chains
+        else:
+            chains = [None] * (2 * self.workers if pool else 1)
+        pending = deque()
+        k_length_plans = 0
+        try:
+            for chain, init in enumerate(chains):
+                submit(chain, init)
+            while k_length_plans < num_goals:
+                if deadline.expired:
+                    break
+                chain, init, result = pending.popleft()
+                if pool:
+                    try:
+                        result = result.get(deadline.remaining())
+                    except multiprocessing.TimeoutError:
+                        break
+                else:
+                    seed, _ = result
+                    random.seed(seed)
+                    try:
+                        with deadline.hard():
+                            result = self._evaluate_goal(init)
+                    except TimeoutError:
+                        break
+
+                if result is not None:
+                    goal_f, next_init_f, ops = result
+                    plan = Plan([self.instance.operators[op] for op in ops])
+                    goal_states[State({f: True for f in goal_f})] = {
+                        "plan": plan,
+                        "initial state": self._sampling_init
+                        if init is None
+                        else self.macq_fluents_to_tarski_state(init),
+                    }
+                    if self.enforced_hill_climbing_sampling:
+                        chains[chain] = next_init_f
+                    if len(ops) >= self.steps_deep:
+                        k_length_plans += 1
+                submit(chain, chains[chain])
+        finally:
+            if pool:
+                pool.terminate()
+            self.problem.init = self._sampling_init
+
+    def _evaluate_goal(
+        self, init: Optional[List[Fluent]]
+    ) -> Optional[Tuple[List[Fluent], List[Fluent], List[int]]]:
+        """Generates a candidate goal state k (`steps_deep`) steps deep and plans for it, see `generate_goals_setup`.
+
+        Args:
+            init (List[Fluent] | None):
+                The fluents of the initial state to start from, or None for the initial state at the start of the
+                goal sampling.
+
+        Returns:
+            The goal fluents, the fluents of the full goal state, and the indices of the operators of the plan to the
+            goal, or None if no valid goal was found.
+        """
+        if init is None:
+            self.problem.init = self._sampling_init
+        else:
+            self.change_init(init)
+        try:
+            states, _ = self._sample_walk(self.steps_deep)
+        except TraceSearchTimeOut:
+            return None
+        state = PackedState(self.fluent_universe, states[-1])
+
+        # get all positive fluents (only positive fluents can be used for a goal)
+        goal_f = [f for f in state if state[f]]
+        next_init_f = goal_f.copy()
+        # if necessary, take a subset of the fluents
+        subset_size = int(len(state.fluents) * self.subset_size_perc)
+        if len(goal_f) > subset_size:
+            random.shuffle(goal_f)
+            goal_f = goal_f[:subset_size]
+        # an empty goal always holds
+        if not goal_f:
+            return None
+        self.change_goal(goal_fluents=goal_f)
+
+        # ensure that the goal doesn't hold in the initial state
+        init_state = {str(a) for a in self.problem.init.as_atoms()}
+        goal = {str(a) for a in self.problem.goal.subformulas}
+        if goal.issubset(init_state):
+            return None
+        try:
+            plan = self.generate_plan()
+        except (KeyError, PlanNotFound):
+            return None
+        return goal_f, next_init_f, [self.op_index[op.name] for op in plan.actions]
+
     def generate_traces(self):
         """Generates traces based on the sampled goals. Traces are generated using the initial state and plan used to achieve the goal.
 
@@ -185,10 +418,49 @@ class RandomGoalSampling(VanillaSampling):
         self.goals_inits_plans = self.goal_sampling()
         # iterate through all plans corresponding to the goals, generating traces
         for goal in progress(self.goals_inits_plans.values()):
-            # update the initial state if necessary
-            if self.enforced_hill_climbing_sampling:
-                self.problem.init = goal["initial state"]
-            # generate a plan based on the new goal/initial state, then generate a trace based on that plan
-            traces.append(self.generate_single_trace_from_plan(goal["plan"]))
+            traces.append(self._goal_trace(goal))
         self.traces = traces
         return traces
+
+    def iter_traces(
+        self, num_traces: int = None, Token: Type[Observation] = None, **kwargs
+    ) -> Iterator[Union[Trace, List[Observation]]]:
+        """Samples goals, then generates the traces of their plans one at a time, without
+        keeping them in memory. See `generate_traces`.
+
+        Args:
+            num_traces (int):
+                Optional; The number of goals to sample traces for. Defaults to `num_traces`.
+            Token (Type[Observation]):
+                Optional; A subclass of `Observation` to tokenize each trace with.
+            **kwargs (keyword arguments):
+                Keyword arguments to pass into the Token function as parameters.
+
+        Returns:
+            An iterator over the traces, or over their observation traces if a Token is given.
+        """
+        self.goals_inits_plans = self.goal_sampling(num_traces)
+        for goal in self.goals_inits_plans.values():
+            trace = self._goal_trace(goal)
+            yield trace.tokenize(Token, **kwargs) if Token else trace
+
+    def iter_steps(
+        self, num_traces: int = None, Token: Type[Observation] = None, **kwargs
+    ) -> Iterator[Tuple[int, Union[Step, Observation]]]:
+        """Generates the steps of the traces of `iter_traces` one at a time. Takes the same
+        arguments as `iter_traces`.
+
+        Returns:
+            An iterator over (trace number, step) pairs, or (trace number, observation)
+            pairs if a Token is given.
+        """
+        for i, trace in enumerate(self.iter_traces(num_traces)):
+            for step in trace:
+                yield i, Token(step=step, **kwargs) if Token else step
+
+    def _goal_trace(self, goal: Dict) -> Trace:
+        # update the initial state if necessary
+        if self.enforced_hill_climbing_sampling:
+            self.problem.init = goal["initial state"]
+        # generate a plan based on the new goal/initial state, then generate a trace based on that plan
+        return self.generate_single_trace_from_plan(goal["plan"])
@@ -0,0 +1,361 @@
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+from tarski.evaluators.simple import evaluate
+from tarski.fstrips.action import PlainOperator
+from tarski.fstrips.fstrips import AddEffect, DelEffect, FunctionalEffect
+from tarski.model import Model, unwrap_tuple
+from tarski.search.operations import progress
+from tarski.syntax.builtins import BuiltinPredicateSymbol
+from tarski.syntax.formulas import Atom, CompoundFormula, Connective, Tautology
+
+
+# a fact that never holds, required by operators with an unsatisfiable (in)equality
+FALSE_FACT = ("", ())
+
+
+class UncompilableOperator(Exception):
+    """Raised when a ground operator uses features the compiled successor generator does
+    not support (e.g. disjunctive preconditions or conditional effects)."""
+
+    def __init__(self, operator: PlainOperator, feature: str):
+        super().__init__(f"Cannot compile {operator} with {feature}.")
+
+
+def atom_key(atom: Atom) -> Tuple[str, Tuple[str, ...]]:
+    """Retrieves the key of a ground atom: its predicate and the names of its constants."""
+    return atom.predicate.name, tuple(term.name for term in atom.subterms)
+
+
+def true_atom_keys(model: Model) -> Iterator[Tuple[str, Tuple[str, ...]]]:
+    """Iterates over the keys (see `atom_key`) of the atoms that hold in a tarski state.
+    Reads the predicate extensions of the state directly, without building the atoms."""
+    for signature, extension in model.predicate_extensions.items():
+        name = signature[0]
+        for point in extension:
+            yield name, tuple(term.name for term in unwrap_tuple(point))
+
+
+class SuccessorGenerator:
+    """A compiled successor generator for the ground operators of a problem.
+
+    Facts (ground atoms) are encoded as integers, and a state as a bit array (an `int`)
+    of the facts that hold in it. The first facts are the fluents of the fluent universe,
+    in the same order, so the packed state of a walk state is only a mask away.
+
+    Applicable operators are found through an index from each fact to the operators
+    whose preconditions mention it: a `SuccessorWalk` keeps the number of unsatisfied
+    preconditions of every operator, and only updates the operators touched by the facts
+    that change along each step.
+
+    Attributes:
+        operators (List[PlainOperator]):
+            The ground operators, in the order of the grounded instance.
+        facts (Dict[Tuple[str, Tuple[str, ...]], int]):
+            A mapping of each fact, as (predicate, constant names), to its integer.
+        universe_mask (int):
+            The facts that are fluents of the universe.
+    """
+
+    def __init__(
+        self,
+        operators: List[PlainOperator],
+        atom_index: Dict[Tuple[str, Tuple[str, ...]], int],
+    ):
+        """Compiles the ground operators of a problem.
+
+        Args:
+            operators (List[PlainOperator]):
+                The ground operators.
+            atom_index (Dict[Tuple[str, Tuple[str, ...]], int]):
+                The index of each fluent of the universe the packed states of the walks
+                range over, by atom key (see `Generator.atom_index`).
+
+        Raises:
+            UncompilableOperator:
+                Raised if an operator has a precondition that is not a conjunction of
+                (possibly negated) atoms, a built-in predicate other than (in)equality, or
+                a conditional effect.
+        """
+        self.operators = operators
+        self.facts: Dict[Tuple[str, Tuple[str, ...]], int] = dict(atom_index)
+        self.universe_mask = (1 << len(atom_index)) - 1
+
+        self.pre_pos: List[List[int]] = []
+        self.pre_neg: List[List[int]] = []
+        self.pre_pos_masks: List[int] = []
+        self.pre_neg_masks: List[int] = []
+        self.adds: List[int] = []
+        self.deletes: List[int] = []
+        # the facts each operator may change
+        self.effect_facts: List[List[int]] = []
+        self.pos_index: Dict[int, List[int]] = {}
+        self.neg_index: Dict[int, List[int]] = {}
+        for i, op in enumerate(operators):
+            pos: Set[int] = set()
+            neg: Set[int] = set()
+            self._compile_precondition(op, op.precondition, pos, neg)
+            add = 0
+            delete = 0
+            changed = set()
+            for effect in op.effects:
+                if isinstance(effect, FunctionalEffect):
+                    # preconditions are only atoms, so functions never affect the walk
+                    continue
+                if not isinstance(effect, (AddEffect, DelEffect)):
+                    raise UncompilableOperator(op, type(effect).__name__)
+                if not isinstance(effect.condition, Tautology):
+                    raise UncompilableOperator(op, "conditional effects")
+                fact = self._fact(op, effect.atom)
+                changed.add(fact)
+                if isinstance(effect, AddEffect):
+                    add |= 1 << fact
+                else:
+                    delete |= 1 << fact
+            self.pre_pos.append(sorted(pos))
+            self.pre_neg.append(sorted(neg))
+            self.pre_pos_masks.append(sum(1 << fact for fact in pos))
+            self.pre_neg_masks.append(sum(1 << fact for fact in neg))
+            self.adds.append(add)
+            self.deletes.append(delete)
+            self.effect_facts.append(sorted(changed))
+            for fact in pos:
+                self.pos_index.setdefault(fact, []).append(i)
+            for fact in neg:
+                self.neg_index.setdefault(fact, []).append(i)
+        self._start = None
+
+    def _fact(self, op: PlainOperator, atom: Atom) -> int:
+        if isinstance(atom.predicate.name, BuiltinPredicateSymbol):
+            raise UncompilableOperator(op, "built-in predicates")
+        return self.facts.setdefault(atom_key(atom), len(self.facts))
+
+    def _static_value(self, op: PlainOperator, atom: Atom) -> Optional[bool]:
+        """Evaluates the (in)equalities of ground operators, which never change along a
+        walk. Returns None for the atoms that are not built-in."""
+        symbol = atom.predicate.name
+        if not isinstance(symbol, BuiltinPredicateSymbol):
+            return None
+        if symbol not in (BuiltinPredicateSymbol.EQ, BuiltinPredicateSymbol.NE):
+            raise UncompilableOperator(op, f"the built-in predicate {symbol.value}")
+        left, right = (term.name for term in atom.subterms)
+        return (left == right) == (symbol == BuiltinPredicateSymbol.EQ)
+
+    def _compile_precondition(self, op: PlainOperator, formula, pos: Set[int], neg: Set[int]):
+        if isinstance(formula, Tautology):
+            return
+        if isinstance(formula, Atom):
+            value = self._static_value(op, formula)
+            if value is None:
+                pos.add(self._fact(op, formula))
+            elif not value:
+                pos.add(self.facts.setdefault(FALSE_FACT, len(self.facts)))
+        elif isinstance(formula, CompoundFormula) and formula.connective == Connective.And:
+            for subformula in formula.subformulas:
+                self._compile_precondition(op, subformula, pos, neg)
+        elif (
+            isinstance(formula, CompoundFormula)
+            and formula.connective == Connective.Not
+            and isinstance(formula.subformulas[0], Atom)
+        ):
+            value = self._static_value(op, formula.subformulas[0])
+            if value is None:
+                neg.add(self._fact(op, formula.subformulas[0]))
+            elif value:
+                pos.add(self.facts.setdefault(FALSE_FACT, len(self.facts)))
+        else:
+            raise UncompilableOperator(op, f"the precondition {formula}")
+
+    def encode(self, model: Model) -> int:
+        """Encodes a tarski state.
+
+        Args:
+            model (Model):
+                The state to encode.
+
+        Returns:
+            The facts that hold in the state, as a bit array.
+        """
+        facts = [
+            self.facts.setdefault(key, len(self.facts)) for key in true_atom_keys(model)
+        ]
+        bits = bytearray((len(self.facts) + 7) >> 3)
+        for fact in facts:
+            bits[fact >> 3] |= 1 << (fact & 7)
+        return int.from_bytes(bits, "little")
+
+    def start(self, model: Model) -> "SuccessorWalk":
+        """Starts a walk from a tarski state.
+
+        Args:
+            model (Model):
+                The state to start from.
+
+        Returns:
+            The walk, positioned at the given state.
+        """
+        state = self.encode(model)
+        start = self._start
+        if start is None or start[0] != state:
+            bits = format(state, "b")[::-1]
+            held = {i for i, bit in enumerate(bits) if bit == "1"}
+            unsat = [
+                sum(1 for fact in pos if fact not in held)
+                + sum(1 for fact in neg if fact in held)
+                for pos, neg in zip(self.pre_pos, self.pre_neg)
+            ]
+            applicable = {i for i, n in enumerate(unsat) if n == 0}
+            # walks usually start from the same state, so keep its counts around
+            start = self._start = (state, unsat, applicable)
+        return SuccessorWalk(self, start[0], list(start[1]), set(start[2]))
+
+    def applicable_in(self, state: int) -> List[int]:
+        """Retrieves the operators applicable in an arbitrary state. Walks keep track of
+        their applicable operators incrementally instead, see `SuccessorWalk.applicable`.
+
+        Args:
+            state (int):
+                The state, as a bit array of facts.
+
+        Returns:
+            The indices of the applicable operators, in ascending order.
+        """
+        return [
+            i
+            for i, (pos, neg) in enumerate(zip(self.pre_pos_masks, self.pre_neg_masks))
+            if state & pos == pos and not state & neg
+        ]
+
+    def successor(self, state: int, op: int) -> int:
+        """Progresses a state through an operator, assumed to be applicable.
+
+        Args:
+            state (int):
+                The state, as a bit array of facts.
+            op (int):
+                The index of the operator.
+
+        Returns:
+            The resulting state, as a bit array of facts.
+        """
+        return (state & ~self.deletes[op]) | self.adds[op]
+
+    def packed_bits(self, state: int) -> int:
+        """Retrieves the bits of a walk state over the fluent universe.
+
+        Args:
+            state (int):
+                The walk state.
+
+        Returns:
+            The fluents that hold in the state, as a `PackedState` bit array.
+        """
+        return state & self.universe_mask
+
+
+class SuccessorWalk:
+    """A walk through the state space of a compiled problem. See `SuccessorGenerator`.
+
+    Attributes:
+        state (int):
+            The current state, as a bit array of facts.
+    """
+
+    __slots__ = ("generator", "state", "unsat", "applicable_ops")
+
+    def __init__(
+        self,
+        generator: SuccessorGenerator,
+        state: int,
+        unsat: List[int],
+        applicable_ops: Set[int],
+    ):
+        self.generator = generator
+        self.state = state
+        self.unsat = unsat
+        self.applicable_ops = applicable_ops
+
+    def applicable(self) -> List[int]:
+        """Retrieves the operators applicable in the current state.
+
+        Returns:
+            The indices of the applicable operators, in ascending order.
+        """
+        return sorted(self.applicable_ops)
+
+    def apply(self, op: int):
+        """Progresses the current state through an operator. The operator is assumed to
+        be applicable. As in tarski, delete effects are applied before add effects.
+
+        Args:
+            op (int):
+                The index of the operator.
+        """
+        generator = self.generator
+        state = self.state
+        new = (state & ~generator.deletes[op]) | generator.adds[op]
+        changed = state ^ new
+        if changed:
+            for fact in generator.effect_facts[op]:
+                if (changed >> fact) & 1:
+                    self._update(fact, (new >> fact) & 1)
+        self.state = new
+
+    def _update(self, fact: int, holds: int):
+        unsat = self.unsat
+        applicable = self.applicable_ops
+        step = -1 if holds else 1
+        for op in self.generator.pos_index.get(fact, ()):
+            if unsat[op] == 0:
+                applicable.discard(op)
+            unsat[op] += step
+            if unsat[op] == 0:
+                applicable.add(op)
+        for op in self.generator.neg_index.get(fact, ()):
+            if unsat[op] == 0:
+                applicable.discard(op)
+            unsat[op] -= step
+            if unsat[op] == 0:
+                applicable.add(op)
+
+
+class TarskiSuccessorGenerator:
+    """The successor generator used for problems that cannot be compiled. Walks evaluate
+    the tarski preconditions of every operator at each step.
+
+    Attributes:
+        operators (List[PlainOperator]):
+            The ground operators, in the order of the grounded instance.
+    """
+
+    def __init__(
+        self, operators: List[PlainOperator], packed_bits: Callable[[Model], int]
+    ):
+        """Initializes the successor generator of uncompilable ground operators.
+
+        Args:
+            operators (List[PlainOperator]):
+                The ground operators.
+            packed_bits (Callable[[Model], int]):
+                A function retrieving the bits of a tarski state over the fluent universe.
+        """
+        self.operators = operators
+        self.packed_bits = packed_bits
+
+    def start(self, model: Model) -> "TarskiWalk":
+        return TarskiWalk(self.operators, model)
+
+
+class TarskiWalk:
+    __slots__ = ("operators", "state")
+
+    def __init__(self, operators: List[PlainOperator], state: Model):
+        self.operators = operators
+        self.state = state
+
+    def applicable(self) -> List[int]:
+        state = self.state
+        return [
+            i for i, op in enumerate(self.operators) if evaluate(op.precondition, state)
+        ]
+
+    def apply(self, op: int):
+        self.state = progress(self.state, self.operators[op])
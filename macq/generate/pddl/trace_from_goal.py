@@ -1,4 +1,6 @@
 from .generator import Generator
+from .plan_cache import PlanCache
+from .planners import Planner
 
 
 class TraceFromGoal(Generator):
@@ -8,7 +10,11 @@ class TraceFromGoal(Generator):
         prob: str = None,
         problem_id: int = None,
         observe_pres_effs: bool = False,
-        observe_static_fluents: bool = False
+        observe_static_fluents: bool = False,
+        cache_dir: str = None,
+        planner: Planner = None,
+        plan_cache: PlanCache = None,
+        delta_traces: bool = False,
     ):
         """
         Initializes a goal state trace sampler using the domain and problem. This method of sampling
@@ -23,13 +29,26 @@ class TraceFromGoal(Generator):
                 The ID of the problem to access.
             observe_pres_effs (bool):
                 Option to observe action preconditions and effects upon generation.
+            cache_dir (str):
+                Optional; A directory to cache the grounded problem in. Defaults to no caching.
+            planner (Planner):
+                Optional; The planner used to generate plans. Defaults to a `RemotePlanner`.
+            plan_cache (PlanCache):
+                Optional; A cache of the plans generated. Defaults to no caching.
+            delta_traces (bool):
+                Optional; Whether to generate `DeltaTrace`s, storing the states as deltas.
+                Defaults to False.
         """
         super().__init__(
             dom=dom,
             prob=prob,
             problem_id=problem_id,
             observe_pres_effs=observe_pres_effs,
-            observe_static_fluents=observe_static_fluents
+            observe_static_fluents=observe_static_fluents,
+            cache_dir=cache_dir,
+            planner=planner,
+            plan_cache=plan_cache,
+            delta_traces=delta_traces,
         )
         self.trace = self.generate_trace()
 
@@ -1,8 +1,17 @@
-from tarski.search.operations import progress
+import multiprocessing
 import random
+from itertools import count, islice
+from typing import Any, Iterator, List, Optional, Tuple, Type, Union
+from warnings import warn
+import numpy as np
 from . import Generator
+from .plan_cache import PlanCache
+from .planners import Planner
+from .batched_walker import BatchedWalker
+from .successor_generator import SuccessorGenerator
+from .coverage import CoverageIndex
 from ...utils import (
-    set_timer_throw_exc,
+    Deadline,
     TraceSearchTimeOut,
     InvalidTime,
     set_num_traces,
@@ -10,10 +19,32 @@ from ...utils import (
     progress as print_progress,
 )
 from ...trace import (
+    DeltaTrace,
+    PackedState,
     Step,
     Trace,
     TraceList,
 )
+from ...observation import Observation
+
+
+# the generator of a worker process, see `VanillaSampling.iter_traces`
+_worker_generator: Optional["VanillaSampling"] = None
+
+
+def _init_worker(generator: "VanillaSampling"):
+    global _worker_generator
+    _worker_generator = generator
+
+
+def _sample_walk(seed: int) -> Optional[Tuple[List[int], List[int]]]:
+    """Samples a walk in a worker process, see `VanillaSampling._sample_walk`. Returns None
+    on a timeout."""
+    random.seed(seed)
+    try:
+        return _worker_generator._sample_walk()
+    except TraceSearchTimeOut:
+        return None
 
 
 class VanillaSampling(Generator):
@@ -31,6 +62,16 @@ class VanillaSampling(Generator):
             The number of traces to be generated.
         traces (TraceList):
             The list of traces generated.
+        seed (int):
+            The seed for the random number generator.
+        workers (int):
+            The number of processes traces are generated with.
+        batch_size (int | None):
+            The number of walks sampled at once by a `BatchedWalker`, if any.
+        coverage_guided (bool):
+            Whether walks prefer the transitions they have not taken yet.
+        coverage (CoverageIndex | None):
+            The states and transitions visited by the coverage-guided walks.
     """
 
     def __init__(
@@ -43,7 +84,14 @@ class VanillaSampling(Generator):
         num_traces: int = 0,
         seed: int = None,
         max_time: float = 30,
-        observe_static_fluents=False
+        observe_static_fluents=False,
+        workers: int = 1,
+        cache_dir: str = None,
+        planner: Planner = None,
+        plan_cache: PlanCache = None,
+        delta_traces: bool = False,
+        batch_size: int = None,
+        coverage_guided: bool = False,
     ):
         """
         Initializes a vanilla state trace sampler using the plan length, number of traces,
@@ -64,18 +112,57 @@ class VanillaSampling(Generator):
                 The length of each generated trace. Defaults to 1.
             num_traces (int):
                 The number of traces to generate. Defaults to 1.
+            seed (int):
+                The seed for the random number generator.
+            workers (int):
+                The number of processes to generate traces with. Defaults to 1, generating
+                the traces in this process. See `generate_traces`.
+            cache_dir (str):
+                Optional; A directory to cache the grounded problem in. Defaults to no caching.
+            planner (Planner):
+                Optional; The planner used to generate plans. Defaults to a `RemotePlanner`.
+            plan_cache (PlanCache):
+                Optional; A cache of the plans generated. Defaults to no caching.
+            delta_traces (bool):
+                Optional; Whether to generate `DeltaTrace`s, storing the states as deltas.
+                Defaults to False.
+            batch_size (int):
+                Optional; The number of walks to sample at once with a `BatchedWalker`,
+                instead of one at a time. Defaults to sampling walks one at a time. See
+                `iter_walk_batches`.
+            coverage_guided (bool):
+                Optional; Whether walks should prefer the transitions they have not taken
+                yet, to cover more distinct transitions with fewer traces. Defaults to False,
+                sampling applicable actions uniformly. See `_random_walk`.
         """
         super().__init__(
             dom=dom,
             prob=prob,
             problem_id=problem_id,
             observe_pres_effs=observe_pres_effs,
-            observe_static_fluents=observe_static_fluents
+            observe_static_fluents=observe_static_fluents,
+            cache_dir=cache_dir,
+            planner=planner,
+            plan_cache=plan_cache,
+            delta_traces=delta_traces,
         )
         if max_time <= 0:
             raise InvalidTime()
         if seed:
             random.seed(seed)
+        self.seed = seed
+        self.workers = workers
+        self.batch_size = batch_size
+        self._batched_walker = None
+        # seeded once, so that successive batches keep drawing new walks
+        self._walk_rng = np.random.default_rng(seed)
+        # the seeds of the walks sampled one at a time are spawned from it, so that
+        # successive calls keep drawing new walks
+        self._seed_sequence = np.random.SeedSequence(seed)
+        self.coverage_guided = coverage_guided
+        self.coverage = (
+            CoverageIndex(len(self.instance.operators)) if coverage_guided else None
+        )
         self.max_time = max_time
         self.plan_len = set_plan_length(plan_len)
         self.num_traces = set_num_traces(num_traces)
@@ -90,6 +177,12 @@ class VanillaSampling(Generator):
         """Generates traces randomly by uniformly sampling applicable actions to find plans
         of the given length.
 
+        If `workers` is greater than 1, the traces are generated by a pool of forked processes,
+        each with its own copy of the grounded problem. If `seed` is given, every trace is sampled
+        with its own seed, spawned from `seed`, whether in a pool or in this process. The traces
+        generated (in order) then only depend on `seed` and on the traces generated before, and
+        not on the number of workers.
+
         Returns:
             A TraceList object with the list of traces generated.
         """
@@ -97,60 +190,353 @@ class VanillaSampling(Generator):
         traces.generator = self.generate_single_trace_setup(
             num_seconds=self.max_time, plan_len=self.plan_len
         )
+        stream = self.iter_traces(self.num_traces)
         for _ in print_progress(range(self.num_traces)):
-            traces.append(traces.generator())
+            traces.append(next(stream))
+        stream.close()
         self.traces = traces
         return traces
 
+    def iter_traces(
+        self, num_traces: int = None, Token: Type[Observation] = None, **kwargs
+    ) -> Iterator[Union[Trace, List[Observation]]]:
+        """Generates traces one at a time, in the same way as `generate_traces`, without
+        keeping them in memory.
+
+        Args:
+            num_traces (int):
+                Optional; The number of traces to generate. Defaults to generating traces
+                indefinitely.
+            Token (Type[Observation]):
+                Optional; A subclass of `Observation` to tokenize each trace with.
+            **kwargs (keyword arguments):
+                Keyword arguments to pass into the Token function as parameters.
+
+        Returns:
+            An iterator over the traces, or over their observation traces if a Token is given.
+
+        Raises:
+            TraceSearchTimeOut:
+                Raised if a trace could not be generated within `max_time`.
+        """
+        for states, ops in self._iter_walks(num_traces):
+            trace = self._walk_to_trace(states, ops)
+            yield trace.tokenize(Token, **kwargs) if Token else trace
+
+    def iter_steps(
+        self, num_traces: int = None, Token: Type[Observation] = None, **kwargs
+    ) -> Iterator[Tuple[int, Union[Step, Observation]]]:
+        """Generates the steps of traces one at a time. Each step is only converted to a
+        macq step once it is reached. See `iter_traces`.
+
+        Args:
+            num_traces (int):
+                Optional; The number of traces to generate. Defaults to generating traces
+                indefinitely.
+            Token (Type[Observation]):
+                Optional; A subclass of `Observation` to tokenize each step with.
+            **kwargs (keyword arguments):
+                Keyword arguments to pass into the Token function as parameters.
+
+        Returns:
+            An iterator over (trace number, step) pairs, or (trace number, observation)
+            pairs if a Token is given.
+
+        Raises:
+            TraceSearchTimeOut:
+                Raised if a trace could not be generated within `max_time`.
+        """
+        for i, (states, ops) in enumerate(self._iter_walks(num_traces)):
+            for j in range(len(states)):
+                step = self._walk_step(states, ops, j)
+                yield i, Token(step=step, **kwargs) if Token else step
+
+    def _iter_walks(self, num_traces: int = None) -> Iterator[Tuple[List[int], List[int]]]:
+        """Samples walks one at a time, with a pool of `workers` processes if possible.
+
+        Args:
+            num_traces (int):
+                Optional; The number of walks to sample. Defaults to sampling indefinitely.
+
+        Returns:
+            An iterator over the walks, see `_sample_walk`.
+        """
+        if self.coverage_guided:
+            if self.batch_size or self.workers > 1:
+                warn(
+                    "Sampling coverage-guided walks one at a time, in a single process."
+                )
+            walks = count() if num_traces is None else range(num_traces)
+            for _ in walks:
+                yield self._sample_walk()
+            return
+        if self.batch_size:
+            if isinstance(self.get_successor_generator(), SuccessorGenerator):
+                for visited, ops in self.iter_walk_batches(num_traces):
+                    packed = np.packbits(visited, axis=-1, bitorder="little")
+                    for states, walk_ops in zip(packed, ops):
+                        yield (
+                            [int.from_bytes(state.tobytes(), "little") for state in states],
+                            walk_ops.tolist(),
+                        )
+                return
+            warn(
+                "Sampling walks one at a time, as the operators of the problem cannot be compiled."
+            )
+        if self.workers > 1 and (num_traces is None or num_traces > 1):
+            if "fork" in multiprocessing.get_all_start_methods():
+                yield from self._iter_walks_in_pool(num_traces)
+                return
+            warn(
+                "Generating traces in a single process, as the 'fork' start method is not available."
+            )
+        if self.seed is not None:
+            # sample the walks from the same seeds as a pool would
+            for seed in self._walk_seeds(num_traces):
+                random.seed(seed)
+                yield self._sample_walk()
+            return
+        walks = count() if num_traces is None else range(num_traces)
+        for _ in walks:
+            yield self._sample_walk()
+
+    def _walk_seeds(self, num_traces: int = None) -> Iterator[int]:
+        """Spawns the seeds of the next walks from `seed`.
+
+        Args:
+            num_traces (int):
+                Optional; The number of seeds to spawn. Defaults to spawning seeds
+                indefinitely.
+
+        Returns:
+            An iterator over the seeds, spawning each one as it is reached.
+        """
+        # spawning the children of a seed sequence one at a time gives the same seeds as
+        # spawning them all at once
+        for _ in count() if num_traces is None else range(num_traces):
+            yield int(self._seed_sequence.spawn(1)[0].generate_state(1, np.uint64)[0])
+
+    def iter_walk_batches(
+        self, num_traces: int = None, batch_size: int = None
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Samples walks in batches with a `BatchedWalker`, in this process. The walks of a
+        batch are kept in columnar form, as arrays, without converting them to traces.
+
+        The operators are picked with a NumPy generator seeded with `seed` on initialization,
+        so the walks differ from those sampled one at a time. The generator is shared by all
+        the calls, so successive calls sample new walks, and the walks only depend on `seed`
+        and on the calls made before. If `plan_len` is a function, it is sampled once per
+        batch.
+
+        Args:
+            num_traces (int):
+                Optional; The number of walks to sample. Defaults to sampling indefinitely.
+            batch_size (int):
+                Optional; The number of walks per batch. Defaults to `batch_size`, or else
+                to 256.
+
+        Returns:
+            An iterator over the batches. Each batch holds the states visited by its walks
+            over the fluent universe, as a (walks x plan_len x fluents) boolean array, and
+            the indices of the operators applied, as a (walks x plan_len - 1) array.
+
+        Raises:
+            TraceSearchTimeOut:
+                Raised if a batch could not be sampled within `max_time`.
+            TypeError:
+                Raised if the operators of the problem cannot be compiled.
+        """
+        successors = self.get_successor_generator()
+        if not isinstance(successors, SuccessorGenerator):
+            raise TypeError("Batched walks require compilable operators.")
+        walker = self._batched_walker
+        if walker is None or walker.successors is not successors:
+            walker = self._batched_walker = BatchedWalker(successors)
+        batch_size = batch_size or self.batch_size or 256
+        rng = self._walk_rng
+        start = successors.encode(self.problem.init)
+        plan_len = self.plan_len
+        remaining = num_traces
+        while remaining is None or remaining > 0:
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            deadline = Deadline(self.max_time, TraceSearchTimeOut, max_time=self.max_time)
+            yield walker.walk(
+                start, size, plan_len() if callable(plan_len) else plan_len, rng, deadline
+            )
+            if remaining is not None:
+                remaining -= size
+
+    def _iter_walks_in_pool(self, num_traces: int = None) -> Iterator[Tuple[List[int], List[int]]]:
+        """Samples walks with a pool of `workers` forked processes. Walks are sent to the pool
+        in batches, so that memory stays bounded however many walks are sampled.
+
+        Args:
+            num_traces (int):
+                Optional; The number of walks to sample. Defaults to sampling indefinitely.
+
+        Returns:
+            An iterator over the walks, in the order of their seeds.
+
+        Raises:
+            TraceSearchTimeOut:
+                Raised if a walk could not be sampled within `max_time`.
+        """
+        seeds = self._walk_seeds(num_traces)
+        workers = self.workers if num_traces is None else min(self.workers, num_traces)
+        chunksize = 4
+        batch_size = workers * chunksize * 4
+
+        # forked workers inherit this generator (and its compiled successor generator), so
+        # nothing but seeds and walks needs to be pickled
+        self.get_successor_generator()
+        with multiprocessing.get_context("fork").Pool(
+            workers, initializer=_init_worker, initargs=(self,)
+        ) as pool:
+            batch = pool.imap(_sample_walk, list(islice(seeds, batch_size)), chunksize)
+            while batch is not None:
+                # keep the workers busy with the next batch while this one is consumed
+                seed_batch = list(islice(seeds, batch_size))
+                next_batch = (
+                    pool.imap(_sample_walk, seed_batch, chunksize) if seed_batch else None
+                )
+                for walk in batch:
+                    if walk is None:
+                        raise TraceSearchTimeOut(max_time=self.max_time)
+                    yield walk
+                batch = next_batch
+
+    def _sample_walk(self, plan_len=None) -> Tuple[List[int], List[int]]:
+        """Samples a walk within `max_time`.
+
+        Args:
+            plan_len (int | Callable):
+                Optional; The number of states in the walk, or a function sampling it.
+                Defaults to `plan_len`.
+
+        Returns:
+            The `PackedState` bits of the states visited, and the indices of the operators
+            applied (one less than the states).
+
+        Raises:
+            TraceSearchTimeOut:
+                Raised if the walk could not be sampled within `max_time`.
+        """
+
+        deadline = Deadline(self.max_time, TraceSearchTimeOut, max_time=self.max_time)
+        states, ops = self._random_walk(plan_len, deadline)
+        packed_bits = self.get_successor_generator().packed_bits
+        return [packed_bits(state) for state in states], ops
+
+    def _walk_step(self, states: List[int], ops: List[int], i: int) -> Step:
+        action = self.operator_action(ops[i]) if i < len(ops) else None
+        return Step(PackedState(self.fluent_universe, states[i]), action, i + 1)
+
+    def _walk_to_trace(self, states: List[int], ops: List[int]) -> Trace:
+        if self.delta_traces:
+            # encode the walk directly, without building its states
+            trace = DeltaTrace(self.fluent_universe)
+            for i, bits in enumerate(states):
+                action = self.operator_action(ops[i]) if i < len(ops) else None
+                trace.append_bits(bits, action, i + 1)
+            return trace
+        trace = Trace()
+        for i in range(len(states)):
+            trace.append(self._walk_step(states, ops, i))
+        return trace
+
+    def _random_walk(
+        self, plan_len, deadline: Optional[Deadline] = None
+    ) -> Tuple[List[Any], List[int]]:
+        """Uniformly samples applicable actions until a walk of the given length is found.
+        On a dead end, the walk starts over from the state it got stuck in.
+
+        With `coverage_guided`, actions are only sampled among those whose transitions from
+        the current state are not in the `coverage` index yet, unless there are none. The
+        transitions of the walk are added to the index once it is found.
+
+        The walk runs on the states of the generator's successor generator, see
+        `Generator.get_successor_generator`.
+
+        Args:
+            plan_len (int | Callable):
+                The number of states in the walk, or a function sampling it.
+            deadline (Deadline):
+                Optional; The time budget of the walk, checked at every step. Defaults to
+                no time limit.
+
+        Returns:
+            The states visited and the indices of the operators applied, one less than
+            the states.
+
+        Raises:
+            InvalidPlanLength:
+                Raised if the length of the walk is less than 1.
+        """
+        if not plan_len:
+            plan_len = self.plan_len
+        if callable(plan_len):
+            plan_len = plan_len()
+        plan_len = set_plan_length(plan_len)
+
+        successors = self.get_successor_generator()
+        coverage = self.coverage if self.coverage_guided else None
+        if coverage is not None and not isinstance(successors, SuccessorGenerator):
+            # tarski states are not hashable, so index them by their fluents
+            state_key = successors.packed_bits
+        else:
+            state_key = None
+
+        walk = successors.start(self.problem.init)
+        while True:
+            # checked on every restart too, so that no walk can run past the deadline
+            if deadline is not None:
+                deadline.check()
+            states = []
+            ops = []
+            # add more steps while the walk has not yet reached the desired length
+            for _ in range(plan_len):
+                # if we have not yet reached the last step
+                if deadline is not None:
+                    deadline.check()
+                if len(ops) < plan_len - 1:
+                    # find the next applicable actions
+                    app_act = walk.applicable()
+                    # if the walk reaches a dead lock, disregard it and try again
+                    if not app_act:
+                        break
+                    # prefer the actions leading to transitions not taken yet
+                    if coverage is not None:
+                        key = walk.state if state_key is None else state_key(walk.state)
+                        app_act = coverage.unseen(key, app_act) or app_act
+                    # pick a random applicable action and apply it
+                    act = random.choice(app_act)
+                    states.append(walk.state)
+                    ops.append(act)
+                    walk.apply(act)
+                else:
+                    states.append(walk.state)
+                    if coverage is not None:
+                        coverage.add(
+                            states if state_key is None else [state_key(st) for st in states],
+                            ops,
+                        )
+                    return states, ops
+
     def generate_single_trace_setup(self, num_seconds: float, plan_len = None):
-        @set_timer_throw_exc(
-            num_seconds=num_seconds, exception=TraceSearchTimeOut, max_time=num_seconds
-        )
         def generate_single_trace(self=self, plan_len=plan_len):
             """Generates a single trace using the uniform random sampling technique.
-            Loops until a valid trace is found. The timer wrapper does not allow the function
-            to run past the time specified.
+            Loops until a valid trace is found. The walk checks a deadline at every step,
+            so it does not run past the time specified.
 
-            The outside function is a wrapper that provides parameters for both the timer
-            wrapper and the function.
+            The outside function provides the parameters of both the deadline and the
+            function.
 
             Returns:
                 A Trace object (the valid trace generated).
             """
-
-            if not plan_len:
-                plan_len = self.plan_len
-            if callable(plan_len):
-                plan_len = plan_len()
-
-            trace = Trace()
-
-            state = self.problem.init
-            valid_trace = False
-            while not valid_trace:
-                trace.clear()
-                # add more steps while the trace has not yet reached the desired length
-                for j in range(plan_len):
-                    # if we have not yet reached the last step
-                    if len(trace) < plan_len - 1:
-                        # find the next applicable actions
-                        app_act = list(self.instance.applicable(state))
-                        # if the trace reaches a dead lock, disregard this trace and try again
-                        if not app_act:
-                            break
-                        # pick a random applicable action and apply it
-                        act = random.choice(app_act)
-                        # create the trace and progress the state
-                        macq_action = self.tarski_act_to_macq(act)
-                        macq_state = self.tarski_state_to_macq(state)
-                        step = Step(macq_state, macq_action, j + 1)
-                        trace.append(step)
-                        state = progress(state, act)
-                    else:
-                        macq_state = self.tarski_state_to_macq(state)
-                        step = Step(state=macq_state, action=None, index=j + 1)
-                        trace.append(step)
-                        valid_trace = True
-            return trace
+            deadline = Deadline(num_seconds, TraceSearchTimeOut, max_time=num_seconds)
+            states, ops = self._random_walk(plan_len, deadline)
+            packed_bits = self.get_successor_generator().packed_bits
+            return self._walk_to_trace([packed_bits(state) for state in states], ops)
 
         return generate_single_trace
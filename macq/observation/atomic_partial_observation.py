@@ -1,7 +1,7 @@
 from logging import warning
-from ..trace import Step, Fluent
+from ..trace import Step, Fluent, State
 from . import PartialObservation, Observation
-from typing import Set
+from typing import Optional, Set
 
 
 class PercentError(Exception):
@@ -59,5 +59,13 @@ class AtomicPartialObservation(PartialObservation):
             and self.action == other.action
         )
 
+    @classmethod
+    def _from_state(cls, step: Step, state: Optional[State]) -> "AtomicPartialObservation":
+        obs = cls.__new__(cls)
+        Observation.__init__(obs, index=step.index)
+        obs.state = None if state is None else state.clone(atomic=True)
+        obs.action = None if step.action is None else step.action.clone(atomic=True)
+        return obs
+
     def details(self):
         return f"Obs {str(self.index)}.\n  State: {str(self.state)}\n  Action: {str(self.action)}"
@@ -1,6 +1,8 @@
 import random
+from typing import List, Sequence
+import numpy as np
 from . import Observation
-from ..trace import Step
+from ..trace import Step, PackedState, PackedPartialState
 from ..utils import PercentError
 
 
@@ -37,6 +39,92 @@ class NoisyObservation(Observation):
         self.state = step.state.clone()
         self.action = None if step.action is None else step.action.clone()
 
+    @classmethod
+    def tokenize_steps(
+        cls, steps: Sequence[Step], percent_noisy: float = 0, replace: bool = False
+    ) -> List["NoisyObservation"]:
+        """Tokenizes the steps of a trace.
+
+        If the states of the steps are all packed over the same universe, the noise of
+        the whole trace is drawn at once with a NumPy generator (seeded from `random`, see
+        `extract_fluent_masks`) and applied to the bits of the states (see
+        `noisy_matrix`). Otherwise, the steps are tokenized one at a time.
+
+        Args:
+            steps (Sequence[Step]):
+                The steps to tokenize.
+            percent_noisy (float):
+                The percentage of fluents to randomly make noisy in each observation.
+            replace (bool):
+                Option to replace noisy fluents with the values of other existing fluents instead
+                of just flipping their values.
+
+        Returns:
+            The observation tokens of the steps, in order.
+        """
+        universe = cls._packed_universe(steps)
+        if universe is None:
+            return super().tokenize_steps(
+                steps, percent_noisy=percent_noisy, replace=replace
+            )
+        if percent_noisy > 1 or percent_noisy < 0:
+            raise PercentError()
+
+        bits, unknown, absent = cls._packed_matrices(universe, steps)
+        noisy = cls.noisy_matrix(
+            bits, ~unknown & ~absent, percent_noisy, replace, cls._trace_rng()
+        )
+        states = []
+        for step, noisy_bits in zip(steps, universe.from_matrix(noisy)):
+            state = step.state
+            State = PackedPartialState if state.unknown else PackedState
+            states.append(State(universe, noisy_bits, state.unknown, state.absent))
+        return [cls._from_state(step, state) for step, state in zip(steps, states)]
+
+    @classmethod
+    def noisy_matrix(
+        cls,
+        bits: np.ndarray,
+        visible: np.ndarray,
+        percent_noisy: float,
+        replace: bool,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        """Makes a matrix of states noisy, the way `random_noisy_subset` does for a single
+        state. In `replace` mode, the values noisy fluents take are drawn from the state
+        before any fluent is made noisy.
+
+        Args:
+            bits (np.ndarray):
+                The fluents that are true in each state, as a (states x fluents) boolean
+                matrix.
+            visible (np.ndarray):
+                The fluents that are visible (known and present) in each state, in the
+                same layout. Only visible fluents are made noisy.
+            percent_noisy (float):
+                The percentage of the visible fluents of each state to make noisy.
+            replace (bool):
+                Option to replace noisy fluents with the values of other visible fluents
+                instead of just flipping their values.
+            rng (np.random.Generator):
+                The random number generator the noise is drawn with.
+
+        Returns:
+            The noisy states, as a (states x fluents) boolean matrix.
+        """
+        noisy = cls.extract_fluent_masks(visible, percent_noisy, rng)
+        if not replace:
+            return bits ^ noisy
+        # the visible fluents of each state come first, so a random position among the
+        # first `num_visible` picks a random visible fluent
+        num_visible = visible.sum(axis=1)
+        positions = np.argsort(~visible, axis=1, kind="stable")
+        picks = (rng.random(bits.shape) * num_visible[:, None]).astype(np.int64)
+        picks = np.minimum(picks, np.maximum(num_visible - 1, 0)[:, None])
+        sources = np.take_along_axis(positions, picks, axis=1)
+        replaced = np.take_along_axis(bits, sources, axis=1)
+        return np.where(noisy, replaced, bits)
+
     def random_noisy_subset(
         self, step: Step, percent_noisy: float, replace: bool = False
     ):
@@ -57,19 +145,9 @@ class NoisyObservation(Observation):
         """
         # hidden fluents cannot be made noisy; only use visible fluents
         state = step.state.clone()
-        invisible_f = {f for f in state if state[f] is None}
-        visible_f = state.clone()
-        for f in invisible_f:
-            del visible_f[f]
-        noisy_f = self.extract_fluent_subset(visible_f, percent_noisy)
-        if not replace:
-            for f in state:
-                state[f] = not state[f] if f in noisy_f else state[f]
-        else:
-            for f in state:
-                state[f] = (
-                    state[random.choice(list(visible_f.keys()))]
-                    if f in noisy_f
-                    else state[f]
-                )
+        visible_f = [f for f, v in state.items() if v is not None]
+        noisy_f = set(self.extract_fluent_subset(visible_f, percent_noisy))
+        for f in visible_f:
+            if f in noisy_f:
+                state[f] = state[random.choice(visible_f)] if replace else not state[f]
         return Step(state, step.action, step.index)
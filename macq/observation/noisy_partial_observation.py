@@ -1,7 +1,8 @@
 from macq.observation.noisy_observation import NoisyObservation
-from ..trace import Step, Fluent
+from ..trace import Step, Fluent, PackedPartialState
+from ..utils import PercentError
 from . import PartialObservation
-from typing import Set
+from typing import List, Sequence, Set
 
 
 class NoisyPartialObservation(PartialObservation, NoisyObservation):
@@ -47,3 +48,69 @@ class NoisyPartialObservation(PartialObservation, NoisyObservation):
             percent_noisy=percent_noisy,
             replace=replace,
         )
+
+    @classmethod
+    def tokenize_steps(
+        cls,
+        steps: Sequence[Step],
+        percent_missing: float = 0,
+        hide: Set[Fluent] = None,
+        percent_noisy: float = 0,
+        replace: bool = False,
+    ) -> List["NoisyPartialObservation"]:
+        """Tokenizes the steps of a trace.
+
+        If the states of the steps are all packed over the same universe, the fluents to
+        hide and the noise of the whole trace are drawn at once, and applied to the bits
+        of the states (see `PartialObservation.tokenize_steps` and
+        `NoisyObservation.noisy_matrix`). Hidden fluents are never made noisy. Otherwise,
+        the steps are tokenized one at a time.
+
+        Args:
+            steps (Sequence[Step]):
+                The steps to tokenize.
+            percent_missing (float):
+                The percentage of fluents to randomly hide in each observation.
+            hide (Set[Fluent]):
+                The set of fluents to explicitly hide in the observations.
+            percent_noisy (float):
+                The percentage of fluents to randomly make noisy in each observation.
+            replace (bool):
+                Option to replace noisy fluents with the values of other existing fluents instead
+                of just flipping their values.
+
+        Returns:
+            The observation tokens of the steps, in order.
+        """
+        universe = cls._packed_universe(steps)
+        if universe is None:
+            # skip the batch paths of both parents
+            return super(NoisyObservation, cls).tokenize_steps(
+                steps,
+                percent_missing=percent_missing,
+                hide=hide,
+                percent_noisy=percent_noisy,
+                replace=replace,
+            )
+        for percent in (percent_missing, percent_noisy):
+            if percent > 1 or percent < 0:
+                raise PercentError()
+        if percent_missing == 1:
+            return [cls._from_state(step, None) for step in steps]
+
+        rng = cls._trace_rng()
+        bits, unknown, absent = cls._packed_matrices(universe, steps)
+        masks = cls._hide_masks(universe, absent, percent_missing, hide, rng)
+        unknown |= masks
+        noisy = cls.noisy_matrix(
+            bits & ~masks, ~unknown & ~absent, percent_noisy, replace, rng
+        )
+        states = [
+            PackedPartialState(universe, *packed)
+            for packed in zip(
+                universe.from_matrix(noisy),
+                universe.from_matrix(unknown),
+                (step.state.absent for step in steps),
+            )
+        ]
+        return [cls._from_state(step, state) for step, state in zip(steps, states)]
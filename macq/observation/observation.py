@@ -1,8 +1,9 @@
 from warnings import warn
 from json import dumps
-from typing import Union
+from typing import List, Optional, Sequence, Union
 import random
-from ..trace import State, Action
+import numpy as np
+from ..trace import State, Action, Step, FluentUniverse, PackedState
 
 
 class InvalidQueryParameter(Exception):
@@ -58,6 +59,22 @@ class Observation:
 
         return out
 
+    @classmethod
+    def tokenize_steps(cls, steps: Sequence[Step], **kwargs) -> List["Observation"]:
+        """Tokenizes the steps of a trace, one at a time. Tokens that can tokenize a whole
+        trace at once override this.
+
+        Args:
+            steps (Sequence[Step]):
+                The steps to tokenize.
+            **kwargs:
+                Any extra arguments to be supplied to the Token __init__.
+
+        Returns:
+            The observation tokens of the steps, in order.
+        """
+        return [cls(step=step, **kwargs) for step in steps]
+
     def get_details(self):
         ind = str(self.index) if self.index else "-"
         state = self.state.details() if self.state else "-"
@@ -86,6 +103,76 @@ class Observation:
         random.shuffle(extracted_f)
         return extracted_f[:num_new_f]
 
+    @staticmethod
+    def extract_fluent_masks(
+        eligible: np.ndarray, percent: float, rng: np.random.Generator
+    ) -> np.ndarray:
+        """Randomly extracts a subset of fluents from each row of a matrix of states, the
+        way `extract_fluent_subset` does for a single state.
+
+        Args:
+            eligible (np.ndarray):
+                The fluents that can be extracted, as a (states x fluents) boolean matrix.
+            percent (float):
+                The percent of the eligible fluents of each state to be extracted.
+            rng (np.random.Generator):
+                The random number generator the subsets are drawn with.
+
+        Returns:
+            The random subsets, as a (states x fluents) boolean matrix.
+        """
+        masks = np.zeros(eligible.shape, dtype=bool)
+        if percent <= 0 or not masks.size:
+            return masks
+        num_extracted = (eligible.sum(axis=1) * percent).astype(np.int64)
+        keys = rng.random(eligible.shape)
+        # fluents that are not eligible sort last, so they are never picked
+        keys[~eligible] = 2
+        order = np.argsort(keys, axis=1)
+        picked = np.arange(eligible.shape[1]) < num_extracted[:, None]
+        np.put_along_axis(masks, order, picked, axis=1)
+        return masks
+
+    @staticmethod
+    def _trace_rng() -> np.random.Generator:
+        """Makes the generator a trace is tokenized with, seeded from `random` so that
+        seeding `random` (e.g. with the `seed` of `ObservedTraceList.tokenize`) seeds it."""
+        return np.random.default_rng(random.getrandbits(64))
+
+    @staticmethod
+    def _packed_universe(steps: Sequence[Step]) -> Optional[FluentUniverse]:
+        """Retrieves the universe the states of the steps are all packed over, if any."""
+        universe = getattr(steps[0].state, "universe", None) if steps else None
+        if universe is None or not all(
+            isinstance(step.state, PackedState) and step.state.universe is universe
+            for step in steps
+        ):
+            return None
+        return universe
+
+    @staticmethod
+    def _packed_matrices(universe: FluentUniverse, steps: Sequence[Step]):
+        """Unpacks the `bits`, `unknown` and `absent` bit arrays of packed states into
+        (steps x fluents) boolean matrices."""
+        shape = (len(steps), len(universe))
+        matrices = []
+        for attr in ("bits", "unknown", "absent"):
+            rows = [getattr(step.state, attr) for step in steps]
+            matrices.append(
+                universe.to_matrix(rows) if any(rows) else np.zeros(shape, dtype=bool)
+            )
+        return tuple(matrices)
+
+    @classmethod
+    def _from_state(cls, step: Step, state: Optional[State]) -> "Observation":
+        """Makes the token of a step from its observed state, for tokens that tokenize
+        whole traces at once (see `tokenize_steps`)."""
+        obs = cls.__new__(cls)
+        Observation.__init__(obs, index=step.index)
+        obs.state = state
+        obs.action = None if step.action is None else step.action.clone()
+        return obs
+
     def matches(self, query: dict):
         return all([self._matches(key, value) for key, value in query.items()])
 
@@ -1,9 +1,13 @@
 from __future__ import annotations
+import multiprocessing
+import pickle
+import random
 from collections import defaultdict
 from collections.abc import MutableSequence
 from warnings import warn
-from typing import Callable, Dict, List, Type, Set, TYPE_CHECKING
+from typing import Callable, Dict, List, Optional, Tuple, Type, Set, TYPE_CHECKING
 from inspect import cleandoc
+import numpy as np
 from rich.console import Console
 from rich.table import Table
 from rich.text import Text
@@ -16,6 +20,28 @@ if TYPE_CHECKING:
     from macq.trace import TraceList
 
 
+# the traces, token type and token arguments of a worker process, see
+# `ObservedTraceList.tokenize`
+_worker_tokenize: Optional[Tuple[TraceList, Type[Observation], dict]] = None
+
+
+def _init_worker(trace_list: TraceList, Token: Type[Observation], kwargs: dict):
+    global _worker_tokenize
+    _worker_tokenize = (trace_list, Token, kwargs)
+
+
+def _tokenize_trace(task: Tuple[int, Optional[int]]) -> bytes:
+    """Tokenizes a trace in a worker process, see `ObservedTraceList.tokenize`. Returns
+    the pickled observations."""
+    i, seed = task
+    trace_list, Token, kwargs = _worker_tokenize
+    if seed is not None:
+        random.seed(seed)
+    # the observations are unpickled by the caller: a failure in the result thread of
+    # the pool would be lost, and leave the caller waiting for the result forever
+    return pickle.dumps(trace_list[i].tokenize(Token, **kwargs))
+
+
 class MissingToken(Exception):
     def __init__(self, message=None):
         if message is None:
@@ -50,6 +76,9 @@ class ObservedTraceList(MutableSequence):
 
     observations: List[List[Observation]]
     type: Type[Observation]
+    # action -> (trace, observation index) of every occurrence, built lazily by
+    # `_get_transition_index` and dropped whenever the list is mutated
+    _transition_index: Optional[Dict[Action, List[Tuple[int, int]]]] = None
 
     def __init__(
         self,
@@ -90,6 +119,7 @@ class ObservedTraceList(MutableSequence):
 
     def __setitem__(self, key: int, value: List[Observation]):
         self.observations[key] = value
+        self._transition_index = None
         if self.type == Observation:
             self.type = type(value[0])
         elif type(value[0]) != self.type:
@@ -97,6 +127,7 @@ class ObservedTraceList(MutableSequence):
 
     def __delitem__(self, key: int):
         del self.observations[key]
+        self._transition_index = None
 
     def __iter__(self):
         return iter(self.observations)
@@ -106,19 +137,14 @@ class ObservedTraceList(MutableSequence):
 
     def insert(self, key: int, value: List[Observation]):
         self.observations.insert(key, value)
+        self._transition_index = None
         if self.type == Observation:
             self.type = type(value[0])
         elif type(value[0]) != self.type:
             raise TokenTypeMismatch(self.type, type(value[0]))
 
     def get_actions(self) -> Set[Action]:
-        actions: Set[Action] = set()
-        for obs_trace in self:
-            for obs in obs_trace:
-                action = obs.action
-                if action is not None:
-                    actions.add(action)
-        return actions
+        return set(self._get_transition_index())
 
     def get_fluents(self) -> Set[Fluent]:
         fluents: Set[Fluent] = set()
@@ -128,8 +154,60 @@ class ObservedTraceList(MutableSequence):
                     fluents.update(list(obs.state.keys()))
         return fluents
 
-    def tokenize(self, trace_list: TraceList, **kwargs):
-        for trace in trace_list:
+    def tokenize(
+        self,
+        trace_list: TraceList,
+        workers: int = 1,
+        seed: Optional[int] = None,
+        **kwargs,
+    ):
+        """Tokenizes the traces of a trace list and appends their observations.
+
+        If `workers` is greater than 1, the traces are tokenized by a pool of forked
+        processes, which inherit the trace list so that only the observations are sent
+        back. Each trace is then tokenized with its own seed, spawned from `seed`, so
+        that tokens drawing random numbers (e.g. `PartialObservation`) give the same
+        observations however many workers are used, and as a serial tokenization with
+        the same seed. An exception raised while tokenizing a trace in a worker, or
+        while sending its observations back, is raised by `tokenize`.
+
+        Args:
+            trace_list (TraceList):
+                The traces to tokenize.
+            workers (int):
+                Optional; The number of processes to tokenize the traces with. Defaults
+                to 1 (tokenizing in this process).
+            seed (int):
+                Optional; The seed the seeds of the traces are spawned from. Defaults to
+                no seeding in a single process, and to fresh entropy with workers.
+            **kwargs:
+                Any extra arguments to be supplied to the Token __init__.
+        """
+        seeds = [None] * len(trace_list)
+        if seed is not None or workers > 1:
+            seeds = [
+                int(child.generate_state(1, np.uint64)[0])
+                for child in np.random.SeedSequence(seed).spawn(len(trace_list))
+            ]
+        if workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+            warn(
+                "Tokenizing in a single process, as the 'fork' start method is not available."
+            )
+            workers = 1
+
+        if workers > 1 and len(trace_list) > 1:
+            tasks = list(enumerate(seeds))
+            with multiprocessing.get_context("fork").Pool(
+                workers, initializer=_init_worker, initargs=(trace_list, self.type, kwargs)
+            ) as pool:
+                chunksize = max(1, len(tasks) // (4 * workers))
+                for tokens in pool.imap(_tokenize_trace, tasks, chunksize):
+                    self.append(pickle.loads(tokens))
+            return
+
+        for trace, trace_seed in zip(trace_list, seeds):
+            if trace_seed is not None:
+                random.seed(trace_seed)
             tokens = trace.tokenize(self.type, **kwargs)
             self.append(tokens)
 
@@ -155,18 +233,46 @@ class ObservedTraceList(MutableSequence):
                 windows.append(self[i][start:end])
         return windows
 
+    def _get_transition_index(self) -> Dict[Action, List[Tuple[int, int]]]:
+        """Retrieves the inverted index of the actions in the observations,
+        building it in a single pass if the list changed since it was last built.
+
+        Note that the index cannot see changes made directly to the inner
+        observation traces; reassign the trace (`obs_tracelist[i] = ...`) after
+        modifying it.
+
+        Returns:
+            A mapping of each action to the (trace, observation index) pairs
+            where it occurs.
+        """
+        if self._transition_index is None:
+            index = defaultdict(list)
+            for i, obs_trace in enumerate(self.observations):
+                for obs in obs_trace:
+                    if obs.action is not None:
+                        index[obs.action].append((i, obs.index))
+            self._transition_index = dict(index)
+        return self._transition_index
+
+    def _transition_windows(self, occurrences: List[Tuple[int, int]]):
+        # NOTE: obs.index starts at 1
+        return [self[i][index - 1 : index + 1] for i, index in occurrences]
+
     def get_transitions(self, action: str) -> List[List[Observation]]:
-        query = {"action": action}
-        return self.fetch_observation_windows(query, 0, 1)
+        for act, occurrences in self._get_transition_index().items():
+            try:
+                details = act.details()
+            except AttributeError:
+                details = str(act)
+            if details == action:
+                return self._transition_windows(occurrences)
+        return []
 
     def get_all_transitions(self) -> Dict[Action, List[List[Observation]]]:
-        actions = self.get_actions()
-        try:
-            return {
-                action: self.get_transitions(action.details()) for action in actions
-            }
-        except AttributeError:
-            return {action: self.get_transitions(str(action)) for action in actions}
+        return {
+            action: self._transition_windows(occurrences)
+            for action, occurrences in self._get_transition_index().items()
+        }
 
     def print(self, view="details", filter_func=lambda _: True, wrap=None):
         """Pretty prints the trace list in the specified view.
@@ -298,15 +404,10 @@ class ObservedTraceList(MutableSequence):
 
     @staticmethod
     def get_obs_static_fluents(obs_trace: List[Observation]):
-        fstates = defaultdict(list)
+        # static fluents are either only seen true or only seen false (or unknown)
+        seen_true, seen_false = set(), set()
         for obs in obs_trace:
             if obs.state:
                 for f, v in obs.state.items():
-                    fstates[f].append(v)
-
-        static = set()
-        for f, states in fstates.items():
-            if all(states) or not any(states):
-                static.add(f)
-
-        return static
+                    (seen_true if v else seen_false).add(f)
+        return seen_true ^ seen_false
@@ -1,8 +1,9 @@
 from warnings import warn
-from typing import Set
+from typing import List, Optional, Sequence, Set
+import numpy as np
 from ..utils import PercentError
-from ..trace import Step, Fluent
-from ..trace import PartialState
+from ..trace import Step, Fluent, FluentUniverse
+from ..trace import PartialState, PackedState, PackedPartialState
 from . import Observation, InvalidQueryParameter
 
 
@@ -57,6 +58,75 @@ class PartialObservation(Observation):
     def __hash__(self):
         return hash((self.state, self.action))
 
+    @classmethod
+    def tokenize_steps(
+        cls,
+        steps: Sequence[Step],
+        percent_missing: float = 0,
+        hide: Set[Fluent] = None,
+    ) -> List["PartialObservation"]:
+        """Tokenizes the steps of a trace.
+
+        If the states of the steps are all packed over the same universe, the fluents to
+        hide are drawn for the whole trace at once, as a (steps x fluents) mask drawn with
+        a NumPy generator (seeded from `random`), and the mask is applied to the bits of
+        the states. The observed states are then `PackedPartialState`s. Otherwise, the
+        steps are tokenized one at a time.
+
+        Args:
+            steps (Sequence[Step]):
+                The steps to tokenize.
+            percent_missing (float):
+                The percentage of fluents to randomly hide in each observation.
+            hide (Set[Fluent]):
+                The set of fluents to explicitly hide in the observations.
+
+        Returns:
+            The observation tokens of the steps, in order.
+        """
+        universe = cls._packed_universe(steps)
+        if universe is None:
+            return super().tokenize_steps(
+                steps, percent_missing=percent_missing, hide=hide
+            )
+        if percent_missing > 1 or percent_missing < 0:
+            raise PercentError()
+        if percent_missing == 0 and not hide:
+            warn("Creating a PartialObseration with no missing information.")
+
+        if percent_missing == 1:
+            return [cls._from_state(step, None) for step in steps]
+        bits, unknown, absent = cls._packed_matrices(universe, steps)
+        rng = cls._trace_rng()
+        masks = cls._hide_masks(universe, absent, percent_missing, hide, rng)
+        states = [
+            PackedPartialState(universe, *packed)
+            for packed in zip(
+                universe.from_matrix(bits & ~masks),
+                universe.from_matrix(unknown | masks),
+                (step.state.absent for step in steps),
+            )
+        ]
+        return [cls._from_state(step, state) for step, state in zip(steps, states)]
+
+    @classmethod
+    def _hide_masks(
+        cls,
+        universe: FluentUniverse,
+        absent: np.ndarray,
+        percent_missing: float,
+        hide: Optional[Set[Fluent]],
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        """Draws the fluents to hide in packed states, as a (steps x fluents) boolean
+        matrix. As in `hide_random_subset`, `int(len(state) * percent_missing)` of the
+        fluents of each state are hidden, picked uniformly, on top of those in `hide`."""
+        masks = cls.extract_fluent_masks(~absent, percent_missing, rng)
+        if hide:
+            masks[:, [universe.index[f] for f in hide if f in universe]] = True
+            masks &= ~absent
+        return masks
+
     def hide_random_subset(self, step: Step, percent_missing: float):
         """Hides a random subset of the fluents in the step.
         Args:
@@ -67,11 +137,8 @@ class PartialObservation(Observation):
         Returns:
             A Step whose state is a PartialState with the random fluents hidden.
         """
-        new_fluents = {}
         hidden_f = self.extract_fluent_subset(step.state, percent_missing)
-        for f in step.state:
-            new_fluents[f] = None if f in hidden_f else step.state[f]
-        return Step(PartialState(new_fluents), step.action, step.index)
+        return self._hide(step, hidden_f)
 
     def hide_subset(self, step: Step, hide: Set[Fluent]):
         """Hides the specified set of fluents in the observation.
@@ -83,9 +150,22 @@ class PartialObservation(Observation):
         Returns:
             A Step whose state is a PartialState with the specified fluents hidden.
         """
-        new_fluents = {}
-        for f in step.state.fluents:
-            new_fluents[f] = None if f in hide else step.state[f]
+        return self._hide(step, hide)
+
+    @staticmethod
+    def _hide(step: Step, hidden_f) -> Step:
+        state = step.state
+        if isinstance(state, PackedState):
+            index = state.universe.index
+            mask = state.universe.from_indices(
+                index[f] for f in hidden_f if f in index
+            ) & ~state.absent
+            hidden = PackedPartialState(
+                state.universe, state.bits & ~mask, state.unknown | mask, state.absent
+            )
+            return Step(hidden, step.action, step.index)
+        hidden_f = set(hidden_f)
+        new_fluents = {f: None if f in hidden_f else v for f, v in state.items()}
         return Step(PartialState(new_fluents), step.action, step.index)
 
     def _matches(self, key: str, value: str):
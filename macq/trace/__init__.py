@@ -2,9 +2,14 @@ from .action import Action, PlanningObject
 from .fluent import Fluent
 from .state import State
 from .partial_state import PartialState
+from .fluent_universe import FluentUniverse
+from .packed_state import PackedState, PackedPartialState
 from .step import Step
 from .trace import Trace, SAS
+from .delta_trace import DeltaTrace
+from .trace_list_stats import TraceListStats
 from .trace_list import TraceList
+from .columnar_trace_list import ColumnarTraceList
 from .disordered_parallel_actions_observation_lists import (
     DisorderedParallelActionsObservationLists,
     ActionPair,
@@ -17,10 +22,16 @@ __all__ = [
     "Fluent",
     "State",
     "PartialState",
+    "FluentUniverse",
+    "PackedState",
+    "PackedPartialState",
     "Step",
     "Trace",
     "SAS",
+    "DeltaTrace",
+    "TraceListStats",
     "TraceList",
+    "ColumnarTraceList",
     "DisorderedParallelActionsObservationLists",
     "ActionPair",
 ]
@@ -24,6 +24,16 @@ class Action:
             The set of Fluents that make up the delete effects.
     """
 
+    __slots__ = (
+        "name",
+        "obj_params",
+        "cost",
+        "precond",
+        "add",
+        "delete",
+        "_hash",
+    )
+
     def __init__(
         self,
         name: str,
@@ -56,21 +66,37 @@ class Action:
         self.precond = precond
         self.add = add
         self.delete = delete
+        # the key the hash was computed for, and the hash (see `__hash__`)
+        self._hash = None
 
     def __repr__(self):
         string = f"{self.name} {' '.join(map(str, self.obj_params))}"
         return string
 
     def __eq__(self, other):
-        return (
+        return self is other or (
             isinstance(other, Action)
             and self.name == other.name
             and self.obj_params == other.obj_params
         )
 
     def __hash__(self):
-        # Order of obj_params is important!
-        return hash(self.details())
+        # `name` and `obj_params` are public and `obj_params` is a mutable list, so the
+        # cached hash is only reused while they are unchanged. Order of obj_params is
+        # important!
+        key = (self.name, *self.obj_params)
+        if self._hash is None or self._hash[0] != key:
+            self._hash = (key, hash(key))
+        return self._hash[1]
+
+    def __getstate__(self):
+        # string hashes differ between processes, so the cached hash is not pickled
+        return {slot: getattr(self, slot) for slot in Action.__slots__ if slot != "_hash"}
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+        self._hash = None
 
     def details(self):
         string = f"{self.name} {' '.join([o.details() for o in self.obj_params])}"
@@ -91,7 +117,7 @@ class Action:
 class AtomicAction(Action):
     """An Action where the objects are represented by strings."""
 
+    __slots__ = ()
+
     def __init__(self, name: str, obj_params: List[str], cost: int = 0):
-        self.name = name
-        self.obj_params = obj_params
-        self.cost = cost
+        super().__init__(name, obj_params, cost)
@@ -0,0 +1,384 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+import numpy as np
+
+from . import Action, PlanningObject, Fluent, FluentUniverse
+from . import PackedState, PackedPartialState
+from . import Step, Trace, TraceList, TraceListStats
+from .trace_list_stats import encode_packed
+
+# bump whenever the layout of the columnar files changes
+COLUMNAR_VERSION = 1
+
+HEADER = "header.json"
+
+# name -> dtype of every column, stored as raw little-endian arrays
+COLUMNS = {
+    "offsets": "<i8",
+    "actions": "<i4",
+    "index": "<i4",
+    "states": "u1",
+    "unknown": "u1",
+    "absent": "u1",
+}
+
+
+class ColumnarTraceList(TraceList):
+    """A read-only `TraceList` stored in a binary columnar format.
+
+    The traces live in a directory holding a `header.json` file with the fluent
+    and action dictionaries, and one raw array file per column:
+
+    - `offsets`: the position of the first step of each trace (plus the total number
+      of steps), so the steps of trace `i` are rows `offsets[i]:offsets[i + 1]`.
+    - `actions`: the id of the action of each step in the action dictionary, or -1.
+    - `index`: the index of each step.
+    - `states`: the state of each step, bit-packed over the fluent dictionary (the
+      same layout as the bits of a `PackedState`).
+    - `unknown`, `absent`: the unknown and absent fluents of each state, in the same
+      layout. Only written if some state has unknown or absent fluents.
+
+    The columns are memory-mapped, and traces are only decoded when accessed, into
+    `PackedState`s over a single `FluentUniverse`. Slicing returns another
+    `ColumnarTraceList` over the same files, without decoding any trace.
+
+    Attributes:
+        path (Path):
+            The directory the trace list is stored in.
+        universe (FluentUniverse):
+            The fluent dictionary.
+        actions (List[Action]):
+            The action dictionary.
+        offsets (np.ndarray):
+            The offsets column.
+        action_ids (np.ndarray):
+            The actions column.
+        indices (np.ndarray):
+            The index column.
+        states (np.ndarray):
+            The states column, with one row of packed bits per step.
+        unknown (np.ndarray | None):
+            The unknown column, if stored.
+        absent (np.ndarray | None):
+            The absent column, if stored.
+        trace_ids (np.ndarray):
+            The traces of the files in this (possibly sliced) list.
+    """
+
+    class ReadOnly(Exception):
+        def __init__(
+            self,
+            trace_list,
+            message="ColumnarTraceList cannot be modified. Decode it with `to_trace_list` first.",
+        ):
+            self.trace_list = trace_list
+            self.message = message
+            super().__init__(message)
+
+    def __init__(self, path: Union[str, Path], trace_ids: Sequence[int] = None):
+        """Opens a trace list stored in the columnar format.
+
+        Args:
+            path (str | Path):
+                The directory the trace list is stored in, see `write`.
+            trace_ids (Sequence[int]):
+                Optional; The traces to include, by position in the files. Defaults
+                to all of them.
+
+        Raises:
+            ValueError:
+                Raised if the directory holds a different version of the format.
+        """
+        self.path = Path(path)
+        self.generator = None
+        self._costs = None
+        self._stats = None
+        with open(self.path / HEADER, "r") as f:
+            header = json.load(f)
+        if header.get("version") != COLUMNAR_VERSION:
+            raise ValueError(
+                f"{self.path} holds version {header.get('version')} of the columnar "
+                f"format, expected {COLUMNAR_VERSION}."
+            )
+
+        self.universe = FluentUniverse(
+            Fluent(name, [PlanningObject(obj_type, obj) for obj_type, obj in objects])
+            for name, objects in header["fluents"]
+        )
+        self.actions: List[Action] = [
+            Action(
+                name,
+                [PlanningObject(obj_type, obj) for obj_type, obj in objects],
+                cost,
+            )
+            for name, objects, cost in header["actions"]
+        ]
+
+        num_traces = header["num_traces"]
+        num_steps = header["num_steps"]
+        width = (len(self.universe) + 7) >> 3
+        self.offsets = self._map("offsets", (num_traces + 1,))
+        self.action_ids = self._map("actions", (num_steps,))
+        self.indices = self._map("index", (num_steps,))
+        self.states = self._map("states", (num_steps, width))
+        self.unknown = (
+            self._map("unknown", (num_steps, width)) if header["unknown"] else None
+        )
+        self.absent = (
+            self._map("absent", (num_steps, width)) if header["absent"] else None
+        )
+        self.trace_ids = (
+            np.arange(num_traces)
+            if trace_ids is None
+            else np.asarray(trace_ids, dtype=np.int64)
+        )
+
+    def _map(self, column: str, shape) -> np.ndarray:
+        if 0 in shape:
+            # empty files cannot be memory-mapped
+            return np.zeros(shape, dtype=COLUMNS[column])
+        return np.memmap(
+            self.path / f"{column}.bin", dtype=COLUMNS[column], mode="r", shape=shape
+        )
+
+    @classmethod
+    def write(
+        cls,
+        traces: Iterable[Trace],
+        path: Union[str, Path],
+        universe: Optional[FluentUniverse] = None,
+    ) -> "ColumnarTraceList":
+        """Stores traces in the columnar format. The traces are written one at a time,
+        so they can come from a stream (e.g. `VanillaSampling.iter_traces`).
+
+        Only the name, objects and cost of the actions are stored.
+
+        Args:
+            traces (Iterable[Trace]):
+                The traces to store.
+            path (str | Path):
+                The directory to store the traces in. Created if it does not exist.
+            universe (FluentUniverse):
+                Optional; The fluent dictionary. Defaults to the universe of the first
+                packed state, or else to the (sorted) fluents of the trace list if
+                `traces` is a `TraceList`, or else to the fluents of the first state.
+
+        Returns:
+            The stored traces, opened from `path`.
+
+        Raises:
+            KeyError:
+                Raised if a state has a fluent that is not in the fluent dictionary.
+        """
+        path = Path(path)
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(path / HEADER):
+            os.remove(path / HEADER)
+        files = {
+            column: open(path / f"{column}.bin", "wb")
+            for column in COLUMNS
+            if column != "offsets"
+        }
+        action_ids: Dict[Action, int] = {}
+        actions = []
+        offsets = [0]
+        has_unknown = has_absent = False
+        try:
+            for trace in traces:
+                steps = trace.steps
+                if universe is None and steps:
+                    universe = cls._default_universe(traces, steps[0].state)
+                ids = np.empty(len(steps), dtype=COLUMNS["actions"])
+                indices = np.empty(len(steps), dtype=COLUMNS["index"])
+                rows = {"states": [], "unknown": [], "absent": []}
+                for j, step in enumerate(steps):
+                    action = step.action
+                    if action is None:
+                        ids[j] = -1
+                    else:
+                        aid = action_ids.get(action)
+                        if aid is None:
+                            aid = action_ids[action] = len(actions)
+                            actions.append(action)
+                        ids[j] = aid
+                    indices[j] = step.index
+
+                    state = step.state
+                    if isinstance(state, PackedState) and state.universe is universe:
+                        packed = (state.bits, state.unknown, state.absent)
+                    else:
+                        packed = universe.pack(state)
+                    for column, bits in zip(rows, packed):
+                        rows[column].append(bits)
+
+                width = (len(universe) + 7) >> 3 if universe is not None else 0
+                for column, bits in rows.items():
+                    files[column].write(
+                        b"".join(b.to_bytes(width, "little") for b in bits)
+                    )
+                has_unknown = has_unknown or any(rows["unknown"])
+                has_absent = has_absent or any(rows["absent"])
+                files["actions"].write(ids.tobytes())
+                files["index"].write(indices.tobytes())
+                offsets.append(offsets[-1] + len(steps))
+        finally:
+            for f in files.values():
+                f.close()
+
+        if universe is None:
+            universe = FluentUniverse()
+        for column, stored in (("unknown", has_unknown), ("absent", has_absent)):
+            if not stored:
+                os.remove(path / f"{column}.bin")
+        np.asarray(offsets, dtype=COLUMNS["offsets"]).tofile(path / "offsets.bin")
+
+        header = {
+            "version": COLUMNAR_VERSION,
+            "num_traces": len(offsets) - 1,
+            "num_steps": offsets[-1],
+            "unknown": has_unknown,
+            "absent": has_absent,
+            "fluents": [
+                [f.name, [[o.obj_type, o.name] for o in f.objects]] for f in universe
+            ],
+            "actions": [
+                [a.name, [[o.obj_type, o.name] for o in a.obj_params], a.cost]
+                for a in actions
+            ],
+        }
+        # the header is written last, so a trace list is only readable once complete
+        with open(path / HEADER, "w") as f:
+            json.dump(header, f, separators=(",", ":"))
+        return cls(path)
+
+    @staticmethod
+    def _default_universe(traces, state) -> FluentUniverse:
+        if isinstance(state, PackedState):
+            return state.universe
+        if isinstance(traces, TraceList):
+            return FluentUniverse(sorted(traces.get_fluents()))
+        return FluentUniverse(state.keys())
+
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, slice):
+            return ColumnarTraceList(self.path, self.trace_ids[key])
+        return self._decode(int(self.trace_ids[key]))
+
+    def __setitem__(self, key, value):
+        raise self.ReadOnly(self)
+
+    def __delitem__(self, key):
+        raise self.ReadOnly(self)
+
+    def insert(self, key, value):
+        raise self.ReadOnly(self)
+
+    def sort(self, reverse: bool = False, key=None):
+        raise self.ReadOnly(self)
+
+    def __iter__(self):
+        for i in self.trace_ids:
+            yield self._decode(int(i))
+
+    def __len__(self):
+        return len(self.trace_ids)
+
+    @property
+    def traces(self) -> List[Trace]:
+        return list(self)
+
+    def copy(self):
+        return self.traces
+
+    def to_trace_list(self) -> TraceList:
+        """Decodes every trace into a regular (mutable) `TraceList`.
+
+        Returns:
+            The decoded trace list.
+        """
+        return TraceList(self.traces)
+
+    def _decode(self, i: int) -> Trace:
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        universe = self.universe
+        actions = self.actions
+        states = self._column_bits(self.states, start, end)
+        unknown = self._column_bits(self.unknown, start, end)
+        absent = self._column_bits(self.absent, start, end)
+        steps = []
+        for j, row in enumerate(range(start, end)):
+            aid = int(self.action_ids[row])
+            State = PackedPartialState if unknown[j] else PackedState
+            steps.append(
+                Step(
+                    State(universe, states[j], unknown[j], absent[j]),
+                    actions[aid] if aid >= 0 else None,
+                    int(self.indices[row]),
+                )
+            )
+        return Trace(steps)
+
+    @staticmethod
+    def _column_bits(column: Optional[np.ndarray], start: int, end: int) -> List[int]:
+        if column is None:
+            return [0] * (end - start)
+        rows = np.asarray(column[start:end])
+        return [int.from_bytes(row.tobytes(), "little") for row in rows]
+
+    def costs(self) -> np.ndarray:
+        """Retrieves the cost column, computed from the actions column without decoding
+        any trace. See `TraceList.costs`.
+
+        Returns:
+            The total costs of the traces, as an array. Should not be modified.
+        """
+        if self._costs is None:
+            # the last entry is the cost of the steps without an action (id -1)
+            action_costs = np.array([a.cost for a in self.actions] + [0], dtype=float)
+            cumulative = np.concatenate(
+                ([0.0], np.cumsum(action_costs[np.asarray(self.action_ids)]))
+            )
+            offsets = np.asarray(self.offsets)
+            totals = cumulative[offsets[1:]] - cumulative[offsets[:-1]]
+            self._costs = totals[self.trace_ids]
+        return self._costs
+
+    def stats(self) -> TraceListStats:
+        """Computes the statistics of the traces from the columns, without decoding any
+        trace. See `TraceList.stats`.
+
+        Returns:
+            The statistics of the traces. Should not be modified.
+        """
+        if self._stats is None:
+            num_fluents = len(self.universe)
+            stats = TraceListStats(self.universe, self.actions)
+
+            def unpack(column, start, end):
+                if column is None:
+                    return None
+                rows = np.asarray(column[start:end])
+                return np.unpackbits(
+                    rows, axis=1, count=num_fluents, bitorder="little"
+                ).astype(bool)
+
+            for i in self.trace_ids:
+                start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+                values = encode_packed(
+                    unpack(self.states, start, end),
+                    unpack(self.unknown, start, end),
+                    unpack(self.absent, start, end),
+                )
+                stats.add_encoded(values, np.asarray(self.action_ids[start:end]))
+            self._stats = stats
+        return self._stats
+
+    def _select(self, indices: np.ndarray) -> "ColumnarTraceList":
+        return ColumnarTraceList(self.path, self.trace_ids[indices])
+
+    def get_fluents(self):
+        if self.absent is None:
+            return set(self.universe.fluents)
+        return super().get_fluents()
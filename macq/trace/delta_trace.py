@@ -0,0 +1,279 @@
+from array import array
+from typing import Iterable, Iterator, List, Optional
+
+from . import Action, FluentUniverse, PackedState, Step, Trace
+
+
+class DeltaTrace(Trace):
+    """A `Trace` that stores its states as deltas: the fluents that become true (added)
+    and false (deleted) at each step, over a shared `FluentUniverse`.
+
+    Steps are decoded on demand into `PackedState` steps. The full state is also kept
+    every `checkpoint_interval` steps, so that decoding any step only replays the deltas
+    since the last checkpoint, while iterating over the trace replays one delta per step.
+
+    The trace can only be extended at the end (see `append`, `extend` and `append_bits`)
+    or shortened from the end (see `pop` and `clear`). Other edits require converting it
+    to a regular trace with `to_trace` first.
+
+    Attributes:
+        universe (FluentUniverse):
+            The fluents the states range over.
+        checkpoint_interval (int):
+            The number of steps between two full states.
+        fluents (set):
+            The set of fluents in the trace.
+        actions (set):
+            The set of actions in the trace.
+    """
+
+    class AppendOnly(Exception):
+        def __init__(
+            self,
+            trace,
+            message="DeltaTrace can only be edited at the end. Convert it with `to_trace` first.",
+        ):
+            self.trace = trace
+            self.message = message
+            super().__init__(message)
+
+    def __init__(
+        self,
+        universe: FluentUniverse,
+        steps: Iterable[Step] = None,
+        checkpoint_interval: int = 64,
+    ):
+        """Initializes a DeltaTrace with an optional list of steps.
+
+        Args:
+            universe (FluentUniverse):
+                The fluents the states range over.
+            steps (Iterable[Step]):
+                Optional; The steps of the trace, encoded as they are added. Defaults to
+                no steps.
+            checkpoint_interval (int):
+                Optional; The number of steps between two full states. Defaults to 64.
+
+        Raises:
+            ValueError:
+                Raised if the checkpoint interval is not positive.
+        """
+        if checkpoint_interval <= 0:
+            raise ValueError("The checkpoint interval must be positive.")
+        self.universe = universe
+        self.checkpoint_interval = checkpoint_interval
+        # the fluents changed by each step, as their indices for added fluents and as the
+        # complement (~i) of their indices for deleted ones
+        self._deltas = array("i")
+        # the position of the deltas of each step in `_deltas`
+        self._offsets = array("q", [0])
+        self._actions: List[Optional[Action]] = []
+        self._indices = array("i")
+        self._checkpoints: List[int] = []
+        # the state of the last step
+        self._last = 0
+        self._action_index = None
+        self._cost_prefix = None
+        self.fluents = set()
+        self.actions = set()
+        if steps is not None:
+            self.extend(steps)
+
+    def __eq__(self, other):
+        # decoded steps are new objects, so compare their contents
+        return (
+            isinstance(other, Trace)
+            and len(self) == len(other)
+            and all(
+                step.state == other_step.state
+                and step.action == other_step.action
+                and step.index == other_step.index
+                for step, other_step in zip(self, other)
+            )
+        )
+
+    def __len__(self):
+        return len(self._actions)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("DeltaTrace index out of range")
+        checkpoint = key // self.checkpoint_interval
+        bits = self._checkpoints[checkpoint]
+        for i in range(checkpoint * self.checkpoint_interval + 1, key + 1):
+            bits = self._apply(bits, i)
+        return self._step(key, bits)
+
+    def __setitem__(self, key, value):
+        raise self.AppendOnly(self)
+
+    def __delitem__(self, key):
+        raise self.AppendOnly(self)
+
+    def __iter__(self) -> Iterator[Step]:
+        bits = 0
+        for i in range(len(self)):
+            bits = self._apply(bits, i) if i else self._checkpoints[0]
+            yield self._step(i, bits)
+
+    def __reversed__(self):
+        return reversed(self.steps)
+
+    def __contains__(self, step: Step):
+        return next(self._matches(step), None) is not None
+
+    def _matches(self, value: Step) -> Iterator[int]:
+        """Finds the steps with the same index, action and state as `value`. Decoded
+        steps are new objects every time, so they are compared by value."""
+        if not isinstance(value, Step):
+            return
+        key = (value.index, value.action, value.state)
+        for i, step in enumerate(self):
+            if (step.index, step.action, step.state) == key:
+                yield i
+
+    @property
+    def steps(self) -> List[Step]:
+        """The decoded steps of the trace."""
+        return list(self)
+
+    def _step(self, i: int, bits: int) -> Step:
+        return Step(PackedState(self.universe, bits), self._actions[i], self._indices[i])
+
+    def _apply(self, bits: int, i: int) -> int:
+        """Applies the deltas of step `i` to the state of step `i - 1`."""
+        for fluent in self._deltas[self._offsets[i] : self._offsets[i + 1]]:
+            if fluent >= 0:
+                bits |= 1 << fluent
+            else:
+                bits &= ~(1 << ~fluent)
+        return bits
+
+    def append_bits(self, bits: int, action: Optional[Action], index: int):
+        """Appends a step given the bits of its state over the universe (see
+        `PackedState.bits`), without building the state.
+
+        Args:
+            bits (int):
+                The fluents that are true in the state of the step.
+            action (Action | None):
+                The action taken from the state.
+            index (int):
+                The index of the step in the trace.
+        """
+        i = len(self)
+        if i % self.checkpoint_interval == 0:
+            self._checkpoints.append(bits)
+        if i:
+            changed = self._last ^ bits
+            while changed:
+                low = changed & -changed
+                fluent = low.bit_length() - 1
+                self._deltas.append(fluent if bits & low else ~fluent)
+                changed ^= low
+        else:
+            self.fluents.update(self.universe)
+        self._offsets.append(len(self._deltas))
+        self._actions.append(action)
+        self._indices.append(index)
+        self._last = bits
+        if action:
+            self.actions.add(action)
+            if self._action_index is not None:
+                self._action_index.setdefault(action, []).append(i)
+        if self._cost_prefix is not None:
+            self._cost_prefix.append(self._cost_prefix[-1] + (action.cost if action else 0))
+
+    def append(self, step: Step):
+        """Appends a step, encoding its state as the delta from the previous state.
+
+        Args:
+            step (Step):
+                The step to append.
+
+        Raises:
+            ValueError:
+                Raised if the state of the step does not give a value to every fluent of
+                the universe.
+            KeyError:
+                Raised if the state of the step has a fluent that is not in the universe.
+        """
+        state = step.state
+        if isinstance(state, PackedState) and state.universe is self.universe:
+            bits, unknown, absent = state.bits, state.unknown, state.absent
+        else:
+            bits, unknown, absent = self.universe.pack(state)
+        if unknown or absent:
+            raise ValueError("DeltaTrace can only store states over its whole universe.")
+        self.append_bits(bits, step.action, step.index)
+
+    def extend(self, iterable: Iterable[Step]):
+        for step in iterable:
+            self.append(step)
+
+    def clear(self):
+        self._deltas = array("i")
+        self._offsets = array("q", [0])
+        self._actions.clear()
+        self._indices = array("i")
+        self._checkpoints.clear()
+        self._last = 0
+        self.reindex()
+        self.fluents = set()
+        self.actions = set()
+
+    def pop(self):
+        result = self[-1]
+        i = len(self) - 1
+        del self._deltas[self._offsets[i] :]
+        self._offsets.pop()
+        self._actions.pop()
+        self._indices.pop()
+        if i % self.checkpoint_interval == 0:
+            self._checkpoints.pop()
+        if i:
+            self._last = self[i - 1].state.bits
+            self.actions = {action for action in self._actions if action}
+            self.reindex()
+        else:
+            self.clear()
+        return result
+
+    def _step_actions(self):
+        return self._actions
+
+    def copy(self):
+        return self.steps
+
+    def count(self, value: Step):
+        return sum(1 for _ in self._matches(value))
+
+    def index(self, value: Step):
+        i = next(self._matches(value), None)
+        if i is None:
+            raise ValueError(f"{value} is not in the trace")
+        return i
+
+    def insert(self, index: int, item: Step):
+        raise self.AppendOnly(self)
+
+    def remove(self, value: Step):
+        raise self.AppendOnly(self)
+
+    def reverse(self):
+        raise self.AppendOnly(self)
+
+    def sort(self, reverse: bool = False, key=None):
+        raise self.AppendOnly(self)
+
+    def to_trace(self) -> Trace:
+        """Decodes every step into a regular (mutable) `Trace`.
+
+        Returns:
+            The decoded trace.
+        """
+        return Trace(self.steps)
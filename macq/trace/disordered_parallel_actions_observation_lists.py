@@ -23,7 +23,7 @@ class ActionPair:
         # order of actions is irrelevant; {a_x, a_y} == {a_y, a_x}
         sum = 0
         for a in self.actions:
-            sum += hash(a.details())
+            sum += hash(a)
         return sum
 
     def __repr__(self):
@@ -1,9 +1,14 @@
 from typing import List
+from weakref import WeakValueDictionary
 
 
 class PlanningObject:
     """An object of a planning domain.
 
+    PlanningObjects are interned: creating an object with the same type and
+    name as a live one returns that same instance. They should be treated as
+    immutable.
+
     Attributes:
         obj_type (str):
             The type of object in the problem domain.
@@ -13,8 +18,13 @@ class PlanningObject:
             Example: "A"
     """
 
-    def __init__(self, obj_type: str, name: str):
-        """Initializes a PlanningObject with a type and a name.
+    __slots__ = ("obj_type", "name", "_hash", "__weakref__")
+
+    _interned: "WeakValueDictionary[tuple, PlanningObject]" = WeakValueDictionary()
+
+    def __new__(cls, obj_type: str, name: str):
+        """Returns the PlanningObject with the given type and name, creating it
+        if it does not exist yet.
 
         Args:
             obj_type (str):
@@ -22,14 +32,26 @@ class PlanningObject:
             name (str):
                 The name of the object.
         """
-        self.obj_type = obj_type
-        self.name = name
+        key = (cls, obj_type, name)
+        obj = cls._interned.get(key)
+        if obj is None:
+            obj = super().__new__(cls)
+            obj.obj_type = obj_type
+            obj.name = name
+            obj._hash = hash(name)
+            cls._interned[key] = obj
+        return obj
+
+    def __reduce__(self):
+        return (self.__class__, (self.obj_type, self.name))
 
     def __hash__(self):
-        return hash(self.name)
+        return self._hash
 
     def __eq__(self, other):
-        return isinstance(other, PlanningObject) and self.name == other.name
+        return self is other or (
+            isinstance(other, PlanningObject) and self.name == other.name
+        )
 
     def details(self):
         return " ".join([self.obj_type, self.name])
@@ -44,6 +66,10 @@ class PlanningObject:
 class Fluent:
     """Fluents of a planning domain.
 
+    Fluents are interned: creating a fluent with the same name and objects as a
+    live one returns that same instance, so equal fluents are usually
+    identical and compare by identity. They should be treated as immutable.
+
     Attributes:
         name (str):
             The name of the fluent.
@@ -53,8 +79,13 @@ class Fluent:
             Example: Block A.
     """
 
-    def __init__(self, name: str, objects: List[PlanningObject]):
-        """Initializes a Fluent with a name and a list of objects.
+    __slots__ = ("name", "objects", "_hash", "_str", "__weakref__")
+
+    _interned: "WeakValueDictionary[tuple, Fluent]" = WeakValueDictionary()
+
+    def __new__(cls, name: str, objects: List[PlanningObject]):
+        """Returns the Fluent with the given name and list of objects, creating
+        it if it does not exist yet.
 
         Args:
             name (str):
@@ -62,22 +93,36 @@ class Fluent:
             objects (list):
                 The objects this fluent applies to.
         """
-        self.name = name
-        self.objects = objects
+        # objects are interned themselves, so their identities make up the key
+        key = (cls, name, *map(id, objects))
+        fluent = cls._interned.get(key)
+        if fluent is None:
+            fluent = super().__new__(cls)
+            fluent.name = name
+            fluent.objects = list(objects)
+            # Order of objects is important!
+            fluent._hash = hash((name, *(o.name for o in objects)))
+            fluent._str = None
+            cls._interned[key] = fluent
+        return fluent
+
+    def __reduce__(self):
+        return (self.__class__, (self.name, self.objects))
 
     def __hash__(self):
-        # Order of objects is important!
-        return hash(str(self))
+        return self._hash
 
     def __repr__(self):
-        return (
-            f"({self.name} {' '.join([o.details() for o in self.objects])})"
-            if self.objects
-            else f"({self.name})"
-        )
+        if self._str is None:
+            self._str = (
+                f"({self.name} {' '.join([o.details() for o in self.objects])})"
+                if self.objects
+                else f"({self.name})"
+            )
+        return self._str
 
     def __eq__(self, other):
-        return (
+        return self is other or (
             isinstance(other, Fluent)
             and self.name == other.name
             and self.objects == other.objects
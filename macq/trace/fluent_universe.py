@@ -0,0 +1,178 @@
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+import numpy as np
+from .fluent import Fluent
+
+
+class FluentUniverse:
+    """An ordered, indexed collection of fluents.
+
+    A fluent universe is built once per problem (by a `Generator`, or when a
+    `TraceList` is loaded) and shared by every `PackedState` over that problem.
+    Each state then only stores packed bit arrays, with bit `i` referring to
+    the `i`-th fluent of the universe.
+
+    Attributes:
+        fluents (List[Fluent]):
+            The fluents in the universe, in index order.
+        index (Dict[Fluent, int]):
+            A mapping of each fluent to its bit position.
+        mask (int):
+            A bit array with every fluent of the universe set.
+    """
+
+    __slots__ = ("fluents", "index", "mask")
+
+    def __init__(self, fluents: Iterable[Fluent] = ()):
+        """Initializes a FluentUniverse with the fluents provided. Duplicate
+        fluents are only indexed once.
+
+        Args:
+            fluents (Iterable[Fluent]):
+                Optional; The fluents in the universe. Defaults to no fluents.
+        """
+        self.fluents: List[Fluent] = []
+        self.index: Dict[Fluent, int] = {}
+        for fluent in fluents:
+            if fluent not in self.index:
+                self.index[fluent] = len(self.fluents)
+                self.fluents.append(fluent)
+        self.mask = (1 << len(self.fluents)) - 1
+
+    def __len__(self):
+        return len(self.fluents)
+
+    def __iter__(self) -> Iterator[Fluent]:
+        return iter(self.fluents)
+
+    def __getitem__(self, i: int) -> Fluent:
+        return self.fluents[i]
+
+    def __contains__(self, fluent: Fluent):
+        return fluent in self.index
+
+    def __repr__(self):
+        return f"FluentUniverse({len(self)} fluents)"
+
+    def from_indices(self, indices: Iterable[int]) -> int:
+        """Packs a collection of fluent indices into a bit array.
+
+        Args:
+            indices (Iterable[int]):
+                The indices of the bits to set.
+
+        Returns:
+            The bit array, as an `int`.
+        """
+        buf = bytearray((len(self.fluents) + 7) >> 3)
+        for i in indices:
+            buf[i >> 3] |= 1 << (i & 7)
+        return int.from_bytes(buf, "little")
+
+    def unpack(self, bits: int) -> str:
+        """Unpacks a bit array into a string of "0" and "1" characters, where
+        character `i` is the value of bit `i`.
+
+        Args:
+            bits (int):
+                The bit array to unpack.
+
+        Returns:
+            The unpacked bits, one character per fluent in the universe.
+        """
+        return format(bits, "b")[::-1].ljust(len(self.fluents), "0")
+
+    def to_array(self, bits: int) -> np.ndarray:
+        """Converts a bit array into a boolean NumPy vector over the universe.
+
+        Args:
+            bits (int):
+                The bit array to convert.
+
+        Returns:
+            A boolean vector of length `len(self)`.
+        """
+        n = len(self.fluents)
+        raw = np.frombuffer(bits.to_bytes((n + 7) >> 3, "little"), dtype=np.uint8)
+        return np.unpackbits(raw, count=n, bitorder="little").astype(bool)
+
+    def from_array(self, values: np.ndarray) -> int:
+        """Converts a boolean NumPy vector over the universe into a bit array.
+
+        Args:
+            values (np.ndarray):
+                A boolean vector of length `len(self)`.
+
+        Returns:
+            The bit array, as an `int`.
+        """
+        return int.from_bytes(
+            np.packbits(np.asarray(values, dtype=bool), bitorder="little").tobytes(),
+            "little",
+        )
+
+    def to_matrix(self, bits: Iterable[int]) -> np.ndarray:
+        """Converts bit arrays into a boolean NumPy matrix over the universe, with one row
+        per bit array.
+
+        Args:
+            bits (Iterable[int]):
+                The bit arrays to convert.
+
+        Returns:
+            A boolean matrix with `len(self)` columns.
+        """
+        bits = list(bits)
+        n = len(self.fluents)
+        width = (n + 7) >> 3
+        data = b"".join(b.to_bytes(width, "little") for b in bits)
+        rows = np.frombuffer(data, dtype=np.uint8).reshape(len(bits), width)
+        return np.unpackbits(rows, axis=1, count=n, bitorder="little").astype(bool)
+
+    def from_matrix(self, values: np.ndarray) -> List[int]:
+        """Converts a boolean NumPy matrix over the universe into bit arrays, one per row.
+
+        Args:
+            values (np.ndarray):
+                A boolean matrix with `len(self)` columns.
+
+        Returns:
+            The bit arrays, as `int`s.
+        """
+        rows = np.packbits(np.asarray(values, dtype=bool), axis=1, bitorder="little")
+        return [int.from_bytes(row.tobytes(), "little") for row in rows]
+
+    def pack(self, values: Mapping[Fluent, Optional[bool]]) -> Tuple[int, int, int]:
+        """Packs a fluent-value mapping into bit arrays.
+
+        Args:
+            values (Mapping[Fluent, Optional[bool]]):
+                The mapping to pack. Every fluent must be in the universe.
+
+        Returns:
+            A tuple of three bit arrays `(bits, unknown, absent)`: the fluents
+            that are true, the fluents whose value is `None`, and the fluents
+            of the universe that are missing from the mapping.
+
+        Raises:
+            KeyError:
+                Raised if a fluent of the mapping is not in the universe.
+        """
+        true_i = []
+        unknown_i = []
+        present = 0
+        for fluent, value in values.items():
+            i = self.index[fluent]
+            present += 1
+            if value is None:
+                unknown_i.append(i)
+            elif value:
+                true_i.append(i)
+        bits = self.from_indices(true_i)
+        unknown = self.from_indices(unknown_i) if unknown_i else 0
+        if present == len(self.fluents):
+            absent = 0
+        else:
+            absent = self.mask & ~self.from_indices(
+                self.index[fluent] for fluent in values.keys()
+            )
+        return bits, unknown, absent
@@ -0,0 +1,217 @@
+from __future__ import annotations
+from collections.abc import ItemsView, KeysView, ValuesView
+from typing import Dict, Optional, Union
+from . import Fluent, State, PartialState
+from .fluent_universe import FluentUniverse
+from .state import AtomicState
+
+
+class PackedKeysView(KeysView):
+    # State.__contains__ tests the value of a fluent, so membership in the keys
+    # view has to be answered by `has_key` instead.
+    def __contains__(self, key):
+        return self._mapping.has_key(key)
+
+
+class PackedValuesView(ValuesView):
+    def __iter__(self):
+        for _, value in self._mapping._iter_items():
+            yield value
+
+
+class PackedItemsView(ItemsView):
+    def __iter__(self):
+        return self._mapping._iter_items()
+
+
+class PackedState(State):
+    """A compact State stored as packed bit arrays over a shared `FluentUniverse`.
+
+    Behaves like a `State` (the dict-like API, `fluents`, `details`, `clone`,
+    ...), but instead of a `dict` it only stores a few integers used as bit
+    arrays, with bit `i` referring to the `i`-th fluent of the universe.
+
+    Attributes:
+        universe (FluentUniverse):
+            The fluents this state ranges over.
+        bits (int):
+            The fluents that are true in this state.
+        unknown (int):
+            The fluents whose value is unknown (`None`) in this state.
+        absent (int):
+            The fluents of the universe that have been removed from this state.
+    """
+
+    __slots__ = ("universe", "bits", "unknown", "absent", "_hash")
+
+    def __init__(
+        self,
+        universe: FluentUniverse,
+        bits: int = 0,
+        unknown: int = 0,
+        absent: int = 0,
+    ):
+        """Initializes a PackedState over a fluent universe.
+
+        Args:
+            universe (FluentUniverse):
+                The fluents this state ranges over.
+            bits (int):
+                Optional; The fluents that are true. Defaults to none.
+            unknown (int):
+                Optional; The fluents whose value is unknown. Defaults to none.
+            absent (int):
+                Optional; The fluents of the universe missing from this state.
+                Defaults to none.
+        """
+        self.universe = universe
+        self.bits = bits
+        self.unknown = unknown
+        self.absent = absent
+        # the bits the hash was computed for, and the hash
+        self._hash = None
+
+    @classmethod
+    def from_state(
+        cls,
+        state: Union[State, Dict[Fluent, Optional[bool]]],
+        universe: FluentUniverse = None,
+    ):
+        """Packs an existing state or fluent-value mapping.
+
+        Args:
+            state (State | dict):
+                The state to pack.
+            universe (FluentUniverse):
+                Optional; The universe to pack the state over. Defaults to a
+                new universe made of the fluents of the state.
+
+        Returns:
+            The packed state.
+        """
+        if universe is None:
+            universe = FluentUniverse(state.keys())
+        return cls(universe, *universe.pack(state))
+
+    @property
+    def fluents(self):
+        # Lets code written against `State.fluents` use the packed state directly.
+        return self
+
+    def __eq__(self, other):
+        if isinstance(other, PackedState) and other.universe is self.universe:
+            return (
+                self.bits == other.bits
+                and self.unknown == other.unknown
+                and self.absent == other.absent
+            )
+        if isinstance(other, (State, dict)):
+            return self.copy() == dict(other.items())
+        return False
+
+    def __hash__(self):
+        # hashes like a `State` with the same values, which it is equal to; the hash only
+        # depends on the true fluents, so it is kept until the bits change
+        if self._hash is None or self._hash[0] != self.bits:
+            universe = self.universe
+            true = universe.unpack(self.bits)
+            self._hash = (
+                self.bits,
+                hash(frozenset(f for f, t in zip(universe.fluents, true) if t == "1")),
+            )
+        return self._hash[1]
+
+    def __reduce__(self):
+        return (self.__class__, (self.universe, self.bits, self.unknown, self.absent))
+
+    def __len__(self):
+        return len(self.universe) - bin(self.absent).count("1")
+
+    def __getitem__(self, key: Fluent):
+        i = self._position(key)
+        if (self.unknown >> i) & 1:
+            return None
+        return bool((self.bits >> i) & 1)
+
+    def __setitem__(self, key: Fluent, value: Optional[bool]):
+        i = self.universe.index.get(key)
+        if i is None:
+            raise KeyError(key)
+        bit = 1 << i
+        self.absent &= ~bit
+        if value is None:
+            self.unknown |= bit
+            self.bits &= ~bit
+        else:
+            self.unknown &= ~bit
+            self.bits = self.bits | bit if value else self.bits & ~bit
+
+    def __delitem__(self, key: Fluent):
+        bit = 1 << self._position(key)
+        self.absent |= bit
+        self.bits &= ~bit
+        self.unknown &= ~bit
+
+    def __iter__(self):
+        if not self.absent:
+            return iter(self.universe.fluents)
+        absent = self.universe.unpack(self.absent)
+        return (f for f, a in zip(self.universe.fluents, absent) if a == "0")
+
+    def __contains__(self, key):
+        return self[key]
+
+    def _position(self, key: Fluent) -> int:
+        i = self.universe.index.get(key)
+        if i is None or (self.absent >> i) & 1:
+            raise KeyError(key)
+        return i
+
+    def _iter_items(self):
+        universe = self.universe
+        bits = universe.unpack(self.bits)
+        unknown = universe.unpack(self.unknown) if self.unknown else None
+        absent = universe.unpack(self.absent) if self.absent else None
+        for i, fluent in enumerate(universe.fluents):
+            if absent is not None and absent[i] == "1":
+                continue
+            if unknown is not None and unknown[i] == "1":
+                yield fluent, None
+            else:
+                yield fluent, bits[i] == "1"
+
+    def clear(self):
+        self.bits = 0
+        self.unknown = 0
+        self.absent = self.universe.mask
+
+    def copy(self):
+        return dict(self._iter_items())
+
+    def has_key(self, k):
+        i = self.universe.index.get(k)
+        return i is not None and not (self.absent >> i) & 1
+
+    def update(self, *args, **kwargs):
+        for fluent, value in dict(*args, **kwargs).items():
+            self[fluent] = value
+
+    def keys(self):
+        return PackedKeysView(self)
+
+    def values(self):
+        return PackedValuesView(self)
+
+    def items(self):
+        return PackedItemsView(self)
+
+    def clone(self, atomic=False):
+        if atomic:
+            return AtomicState({str(fluent): value for fluent, value in self.items()})
+        return PackedState(self.universe, self.bits, self.unknown, self.absent)
+
+
+class PackedPartialState(PackedState, PartialState):
+    """A PackedState where the value of some fluents are unknown."""
+
+    __slots__ = ()
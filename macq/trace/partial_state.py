@@ -6,6 +6,8 @@ from typing import Dict, Union
 class PartialState(State):
     """A Partial State where the value of some fluents are unknown."""
 
+    __slots__ = ()
+
     def __init__(self, fluents: Dict[Fluent, Union[bool, None]] = {}):
         """
         Args:
@@ -15,6 +15,8 @@ class State:
             A mapping of `Fluent` objects to their value in this state.
     """
 
+    __slots__ = ("fluents",)
+
     def __init__(self, fluents: Dict[Fluent, bool] = None):
         """Initializes State with an optional fluent-value mapping.
 
@@ -32,7 +34,7 @@ class State:
         return ", ".join([str(fluent) for (fluent, value) in self.items() if value])
 
     def __hash__(self):
-        return hash(str(self.details()))
+        return hash(frozenset(fluent for fluent, value in self.items() if value))
 
     def __len__(self):
         return len(self.fluents)
@@ -95,5 +97,7 @@ class State:
 class AtomicState(State):
     """A State where the fluents are represented by strings."""
 
+    __slots__ = ()
+
     def __init__(self, fluents: Dict[str, bool] = None):
         self.fluents = fluents if fluents is not None else {}
@@ -1,6 +1,7 @@
+from bisect import bisect_left
 from collections import defaultdict
 from dataclasses import dataclass
-from typing import List, Type, Iterable, Callable, Set
+from typing import Dict, List, Optional, Type, Iterable, Callable, Set
 from inspect import cleandoc
 from warnings import warn
 from rich.table import Table
@@ -20,11 +21,7 @@ class SAS:
     post_state: State
 
     def __hash__(self):
-        return hash(
-            str(self.pre_state.details())
-            + self.action.details()
-            + str(self.post_state.details())
-        )
+        return hash((self.pre_state, self.action, self.post_state))
 
 
 class Trace:
@@ -32,6 +29,13 @@ class Trace:
 
     A `list`-like object, where each element is a step of the state trace.
 
+    The positions of the steps of each action are indexed on the first query by action
+    (e.g. `get_pre_states`), and the cumulative cost of the steps on the first query by
+    cost (e.g. `get_slice_cost`). Both indices are kept up to date as steps are appended.
+    Editing or removing steps discards them, and they are rebuilt by the next query.
+    Changes made to `steps` (or to the cost of their actions) directly are not tracked, so
+    call `reindex` after them.
+
     Attributes:
         steps (list):
             The list of Step objcts constituting the trace.
@@ -56,6 +60,10 @@ class Trace:
                 `list`.
         """
         self.steps = steps if steps is not None else []
+        # the positions of the steps of each action, see `_action_positions`
+        self._action_index: Optional[Dict[Action, List[int]]] = None
+        # the cost of the steps before each position, see `_cumulative_costs`
+        self._cost_prefix: Optional[List[int]] = None
         self.__reinit_actions_and_fluents()
 
     def __eq__(self, other):
@@ -66,12 +74,14 @@ class Trace:
 
     def __setitem__(self, key: int, value: Step):
         self.steps[key] = value
+        self.reindex()
 
     def __getitem__(self, key: int):
         return self.steps[key]
 
     def __delitem__(self, key: int):
         del self.steps[key]
+        self.reindex()
 
     def __iter__(self):
         return iter(self.steps)
@@ -85,11 +95,13 @@ class Trace:
     def append(self, step: Step):
         self.steps.append(step)
         self.__update_actions_and_fluents(step)
+        self._index_step(len(self.steps) - 1, step)
 
     def clear(self):
         self.steps.clear()
         self.fluents = set()
         self.actions = set()
+        self.reindex()
 
     def copy(self):
         return self.steps.copy()
@@ -98,9 +110,11 @@ class Trace:
         return self.steps.count(value)
 
     def extend(self, iterable: Iterable[Step]):
+        start = len(self.steps)
         self.steps.extend(iterable)
-        for step in iterable:
-            self.__update_actions_and_fluents(step)
+        for i in range(start, len(self.steps)):
+            self.__update_actions_and_fluents(self.steps[i])
+            self._index_step(i, self.steps[i])
 
     def index(self, value: Step):
         return self.steps.index(value)
@@ -108,6 +122,17 @@ class Trace:
     def insert(self, index: int, item: Step):
         self.steps.insert(index, item)
         self.__update_actions_and_fluents(item)
+        # the cumulative costs of all the later steps change
+        self._cost_prefix = None
+        if self._action_index is not None:
+            # normalize the index the way `list.insert` does
+            size = len(self.steps) - 1
+            index = min(index, size) if index >= 0 else max(index + size, 0)
+            # the steps after the new one move one position further
+            for positions in self._action_index.values():
+                for j in range(bisect_left(positions, index), len(positions)):
+                    positions[j] += 1
+            self._index_step(index, item)
 
     def pop(self):
         result = self.steps.pop()
@@ -120,9 +145,57 @@ class Trace:
 
     def reverse(self):
         self.steps.reverse()
+        self.reindex()
 
     def sort(self, reverse: bool = False, key: Callable = lambda e: e.action.cost):
         self.steps.sort(reverse=reverse, key=key)
+        self.reindex()
+
+    def reindex(self):
+        """Discards the index of the steps of each action and the cumulative costs, so the
+        next queries rebuild them. Required after changing `steps` directly."""
+        self._action_index = None
+        self._cost_prefix = None
+
+    def _index_step(self, i: int, step: Step):
+        """Adds the step at position `i` to the index of the steps of each action and to the
+        cumulative costs, if they are built."""
+        if self._action_index is not None and step.action is not None:
+            positions = self._action_index.setdefault(step.action, [])
+            positions.insert(bisect_left(positions, i), i)
+        if self._cost_prefix is not None:
+            # only appended steps extend the prefix, insertions discard it
+            self._cost_prefix.append(
+                self._cost_prefix[-1] + (step.action.cost if step.action else 0)
+            )
+
+    def _cumulative_costs(self) -> List[int]:
+        """Retrieves the cumulative costs of the trace, building them if needed.
+
+        Returns:
+            The cost of the steps before each position, from 0 for the empty prefix to the
+            total cost of the trace.
+        """
+        if self._cost_prefix is None:
+            prefix = [0]
+            for action in self._step_actions():
+                prefix.append(prefix[-1] + (action.cost if action else 0))
+            self._cost_prefix = prefix
+        return self._cost_prefix
+
+    def _step_actions(self) -> Iterable[Optional[Action]]:
+        return (step.action for step in self.steps)
+
+    def _action_positions(self, action: Action) -> List[int]:
+        """Retrieves the positions of the steps of an action, in order, building the index
+        of the steps of each action if needed."""
+        if self._action_index is None:
+            index = {}
+            for i, step_action in enumerate(self._step_actions()):
+                if step_action is not None:
+                    index.setdefault(step_action, []).append(i)
+            self._action_index = index
+        return self._action_index.get(action, [])
 
     def details(self, wrap=False):
         indent = " " * 2
@@ -239,17 +312,12 @@ class Trace:
         print()
 
     def get_static_fluents(self):
-        fstates = defaultdict(list)
+        # static fluents are either only seen true or only seen false (or unknown)
+        seen_true, seen_false = set(), set()
         for step in self:
             for f, v in step.state.items():
-                fstates[f].append(v)
-
-        static = set()
-        for f, states in fstates.items():
-            if all(states) or not any(states):
-                static.add(f)
-
-        return static
+                (seen_true if v else seen_false).add(f)
+        return seen_true ^ seen_false
 
     def __update_actions_and_fluents(self, step: Step):
         """Updates the actions and fluents stored in this trace with any new ones from
@@ -269,6 +337,7 @@ class Trace:
         """
         self.fluents = set()
         self.actions = set()
+        self.reindex()
         for step in self.steps:
             self.__update_actions_and_fluents(step)
 
@@ -283,11 +352,7 @@ class Trace:
             The set of states prior to the action being performed in this
             trace.
         """
-        prev_states = set()
-        for step in self:
-            if step.action == action:
-                prev_states.add(step.state)
-        return prev_states
+        return {self[i].state for i in self._action_positions(action)}
 
     def get_post_states(self, action: Action):
         """Retrieves the list of states after the action in this trace.
@@ -299,11 +364,7 @@ class Trace:
         Returns:
             The set of states after the action was performed in this trace.
         """
-        post_states = set()
-        for i, step in enumerate(self):
-            if step.action == action:
-                post_states.add(self[i + 1].state)
-        return post_states
+        return {self[i + 1].state for i in self._action_positions(action)}
 
     def get_sas_triples(self, action: Action) -> List[SAS]:
         """Retrieves the list of (S,A,S') triples for the action in this trace.
@@ -319,12 +380,29 @@ class Trace:
             A `SAS` object, containing the `pre_state`, `action`, and
             `post_state`.
         """
-        sas_triples = []
-        for i, step in enumerate(self):
-            if step.action == action:
-                triple = SAS(step.state, action, self[i + 1].state)
-                sas_triples.append(triple)
-        return sas_triples
+        return [
+            SAS(self[i].state, action, self[i + 1].state)
+            for i in self._action_positions(action)
+        ]
+
+    def get_all_sas_triples(self) -> Dict[Action, List[SAS]]:
+        """Retrieves the (S,A,S') triples of every action in this trace, in a single
+        pass over the steps.
+
+        Returns:
+            A dictionary mapping each action to its `SAS` triples, in the order of the
+            trace. The last step is left out, as it has no post-state.
+        """
+        sas_triples = defaultdict(list)
+        steps = iter(self)
+        step = next(steps, None)
+        for next_step in steps:
+            if step.action is not None:
+                sas_triples[step.action].append(
+                    SAS(step.state, step.action, next_step.state)
+                )
+            step = next_step
+        return dict(sas_triples)
 
     def get_total_cost(self):
         """Calculates the total cost of this trace.
@@ -332,11 +410,7 @@ class Trace:
         Returns:
             The total cost of all actions performed in the trace.
         """
-        sum = 0
-        for step in self.steps:
-            if step.action:
-                sum += step.action.cost
-        return sum
+        return self._cumulative_costs()[-1]
 
     def get_slice_cost(self, start: int, end: int):
         """Calculates the total cost of a slice of this trace.
@@ -361,11 +435,8 @@ class Trace:
                 "The start boundary must be smaller than the end boundary."
             )
 
-        sum = 0
-        for i in range(start - 1, end):
-            if self[i].action:
-                sum += self[i].action.cost
-        return sum
+        prefix = self._cumulative_costs()
+        return prefix[end] - prefix[start - 1]
 
     def get_steps(self, action: Action):
         """Retrieves all the Steps in the trace that use the specified action.
@@ -378,11 +449,7 @@ class Trace:
             The set of steps that use the specified action.
 
         """
-        steps = set()
-        for step in self:
-            if step.action == action:
-                steps.add(action)
-        return steps
+        return {self[i] for i in self._action_positions(action)}
 
     def get_usage(self, action: Action):
         """Calculates how often an action was performed in this trace.
@@ -396,7 +463,7 @@ class Trace:
             as the number of occurences of the action divided by the length of
             the trace (number of steps).
         """
-        return len(self.get_steps(action)) / len(self)
+        return len(self._action_positions(action)) / len(self)
 
     def tokenize(self, Token: Type[Observation], **kwargs):
         """Tokenizes the steps in this trace.
@@ -414,4 +481,4 @@ class Trace:
         """
         if Token == NoisyPartialDisorderedParallelObservation:
             raise TokenizationError(Token)
-        return [Token(step=step, **kwargs) for step in self]
+        return Token.tokenize_steps(self.steps, **kwargs)
@@ -1,9 +1,10 @@
 from collections.abc import MutableSequence
-from typing import Callable, List, Type, Union
+from typing import Callable, List, Optional, Tuple, Type, Union
 from warnings import warn
+import numpy as np
 
 from ..observation import Observation, ObservedTraceList
-from . import Action, Trace
+from . import Action, Trace, TraceListStats
 
 
 class TraceList(MutableSequence):
@@ -12,6 +13,12 @@ class TraceList(MutableSequence):
     A `list`-like object, where each element is a `Trace` of the same planning
     problem.
 
+    The total costs of the traces are kept in a cost column (see `costs`), used to sort
+    the traces and answer cost queries without going through their steps. The column
+    is kept up to date as traces are added, replaced or removed, as are the statistics
+    of the traces (see `stats`) that `get_usage` and `get_fluents` are answered from.
+    Call `reindex` after editing the traces themselves.
+
     Attributes:
         traces (List[Trace]):
             The list of `Trace` objects.
@@ -47,15 +54,19 @@ class TraceList(MutableSequence):
         """
         self.traces = [] if traces is None else traces
         self.generator = generator
+        self._costs: Optional[np.ndarray] = None
+        self._stats: Optional[TraceListStats] = None
 
     def __getitem__(self, key: int):
         return self.traces[key]
 
     def __setitem__(self, key: int, value: Trace):
         self.traces[key] = value
+        self.reindex()
 
     def __delitem__(self, key: int):
         del self.traces[key]
+        self.reindex()
 
     def __iter__(self):
         return iter(self.traces)
@@ -68,9 +79,109 @@ class TraceList(MutableSequence):
 
     def insert(self, key: int, value: Trace):
         self.traces.insert(key, value)
+        if key >= len(self.traces) - 1:
+            # appended traces are added to the cost column and the statistics
+            if self._costs is not None:
+                self._costs = np.append(self._costs, value.get_total_cost())
+            if self._stats is not None:
+                self._stats.add_trace(value)
+        else:
+            self.reindex()
+
+    def sort(self, reverse: bool = False, key: Callable = None):
+        """Sorts the traces in place, by total cost by default. The sort is stable.
+
+        Args:
+            reverse (bool):
+                Optional; Whether to sort in descending order. Defaults to False.
+            key (Callable):
+                Optional; A function computing the sort key of a trace. Defaults to
+                sorting by total cost, using the cost column.
+        """
+        if key is not None:
+            self.traces.sort(reverse=reverse, key=key)
+            self.reindex()
+            return
+        costs = self.costs()
+        # negating the costs keeps the order of equal costs, as `list.sort` does
+        order = np.argsort(-costs if reverse else costs, kind="stable")
+        self.traces[:] = [self.traces[i] for i in order]
+        self._costs = costs[order]
+        self._stats = None
+
+    def reindex(self):
+        """Discards the cost column and the statistics, so the next queries rebuild them.
+        Required after editing the traces of the list."""
+        self._costs = None
+        self._stats = None
+
+    def stats(self) -> TraceListStats:
+        """Computes the statistics of the traces (action usage, fluent flips, static and
+        constant fluents, distinct states and lengths) in a single pass over their steps.
+        The statistics are kept until the list is changed, and extended as traces are
+        appended.
+
+        Returns:
+            The statistics of the traces. Should not be modified.
+        """
+        if self._stats is None or len(self._stats) != len(self):
+            stats = TraceListStats()
+            for trace in self:
+                stats.add_trace(trace)
+            self._stats = stats
+        return self._stats
+
+    def costs(self) -> np.ndarray:
+        """Retrieves the cost column: the total cost of each trace, in order.
+
+        Returns:
+            The total costs of the traces, as an array. Should not be modified.
+        """
+        if self._costs is None or len(self._costs) != len(self):
+            self._costs = np.array(
+                [trace.get_total_cost() for trace in self.traces], dtype=float
+            )
+        return self._costs
 
-    def sort(self, reverse: bool = False, key: Callable = lambda e: e.get_total_cost()):
-        self.traces.sort(reverse=reverse, key=key)
+    def top_k(self, k: int, largest: bool = False) -> "TraceList":
+        """Selects the k traces of lowest (or highest) total cost. Traces of the same cost
+        are kept in the order of the list, including those tied at the k-th cost.
+
+        Args:
+            k (int):
+                The number of traces to select.
+            largest (bool):
+                Optional; Whether to select the traces of highest cost instead. Defaults
+                to False.
+
+        Returns:
+            The selected traces, sorted by cost (ascending, or descending if `largest`).
+        """
+        costs = self.costs()
+        k = max(min(k, len(costs)), 0)
+        keys = -costs if largest else costs
+        selected = np.argsort(keys, kind="stable")[:k]
+        return self._select(selected)
+
+    def _select(self, indices: np.ndarray) -> "TraceList":
+        return TraceList([self.traces[i] for i in indices])
+
+    def cost_histogram(
+        self, bins: Union[int, List[float]] = 10, range: Tuple[float, float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Computes the histogram of the total costs of the traces.
+
+        Args:
+            bins (int | List[float]):
+                Optional; The number of equal-width bins, or the bin edges. Defaults to 10.
+            range (Tuple[float, float]):
+                Optional; The lower and upper range of the bins. Defaults to the minimum
+                and maximum costs.
+
+        Returns:
+            The number of traces in each bin, and the bin edges (see `numpy.histogram`).
+        """
+        return np.histogram(self.costs(), bins=bins, range=range)
 
     def generate_more(self, num: int):
         """Generates more traces using the generator function.
@@ -87,6 +198,7 @@ class TraceList(MutableSequence):
             raise self.MissingGenerator(self)
 
         self.traces.extend([self.generator() for _ in range(num)])
+        self.reindex()
 
     def get_usage(self, action: Action):
         """Calculates how often an action was performed in each of the traces.
@@ -100,10 +212,7 @@ class TraceList(MutableSequence):
             calculated as the number of occurences of the action divided by the
             length of the trace (number of steps).
         """
-        usages = []
-        for trace in self:
-            usages.append(trace.get_usage(action))
-        return usages
+        return self.stats().get_usage(action)
 
     def get_fluents(self):
         """Retrieves a set of all fluents used in child traces.
@@ -111,11 +220,7 @@ class TraceList(MutableSequence):
         Returns:
             A set of all fluents used in child traces.
         """
-        fluents = set()
-        for trace in self.traces:
-            for step in trace:
-                fluents.update(step.state.fluents)
-        return fluents
+        return self.stats().get_fluents()
 
     def tokenize(
         self,
@@ -131,6 +236,9 @@ class TraceList(MutableSequence):
                 for the steps.
             ObsLists (Type[ObservationLists]):
                 The type of `ObservationLists` to be used. Defaults to the base `ObservationLists`.
+            **kwargs:
+                Extra arguments to the `ObservationLists`, such as the `workers` and `seed`
+                of `ObservedTraceList.tokenize`, and to the Token __init__.
         """
         return ObsLists(self, Token, **kwargs)
 
@@ -0,0 +1,312 @@
+from typing import Dict, Iterable, List, Optional, Set
+import numpy as np
+
+from . import Action, Fluent, FluentUniverse, PackedState, Trace
+
+# the codes of the values of the fluents in an encoded trace
+ABSENT = -1
+FALSE = 0
+TRUE = 1
+UNKNOWN = 2
+
+# the value of `_constant` for columns no trace has been added to yet
+_UNSET = 3
+
+
+def _unpack_rows(rows: np.ndarray, num_fluents: int) -> np.ndarray:
+    """Unpacks rows of packed bits (see `PackedState.bits`) into a boolean matrix."""
+    return np.unpackbits(rows, axis=1, count=num_fluents, bitorder="little").astype(bool)
+
+
+def encode_packed(
+    bits: np.ndarray,
+    unknown: Optional[np.ndarray] = None,
+    absent: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Encodes the packed states of a trace into a matrix of value codes.
+
+    Args:
+        bits (np.ndarray):
+            The fluents that are true in each state, as a (steps x fluents) boolean
+            matrix.
+        unknown (np.ndarray):
+            Optional; The fluents whose value is unknown, in the same layout. Defaults
+            to none.
+        absent (np.ndarray):
+            Optional; The fluents missing from each state, in the same layout. Defaults
+            to none.
+
+    Returns:
+        The values of the fluents, as a (steps x fluents) matrix of `TRUE`, `FALSE`,
+        `UNKNOWN` and `ABSENT` codes.
+    """
+    values = bits.astype(np.int8)
+    if unknown is not None:
+        values[unknown] = UNKNOWN
+    if absent is not None:
+        values[absent] = ABSENT
+    return values
+
+
+class TraceListStats:
+    """Statistics over the traces of a `TraceList`, computed in a single streaming pass.
+
+    Each trace is encoded as a matrix of value codes, with one row per step and one
+    column per fluent (see `encode_packed`), and every statistic of the trace is then
+    computed from the matrix with array operations. Traces of `PackedState`s are
+    encoded from their bits directly, without going through their fluents.
+
+    Fluents and actions are given columns as they are first seen, so traces can be
+    added one at a time (see `add_trace`). The per-trace statistics range over the
+    fluents and actions known when they are read, with fluents a trace has not seen
+    counted as absent from it.
+
+    Attributes:
+        fluents (List[Fluent]):
+            The fluents, in column order.
+        actions (List[Action]):
+            The actions, in column order.
+        static_fluents (List[Set[Fluent]]):
+            The static fluents of each trace: the fluents that are either always true or
+            never true in it (see `Trace.get_static_fluents`).
+    """
+
+    def __init__(self, fluents: Iterable[Fluent] = (), actions: Iterable[Action] = ()):
+        """Initializes statistics without any trace.
+
+        Args:
+            fluents (Iterable[Fluent]):
+                Optional; The first fluent columns. Defaults to none.
+            actions (Iterable[Action]):
+                Optional; The first action columns. Defaults to none.
+        """
+        self.fluents: List[Fluent] = []
+        self.actions: List[Action] = []
+        self.static_fluents: List[Set[Fluent]] = []
+        self._fluent_ids: Dict[Fluent, int] = {}
+        self._action_ids: Dict[Action, int] = {}
+        # the columns of the fluents of each universe seen, by universe
+        self._universes: Dict[int, np.ndarray] = {}
+        self._lengths: List[int] = []
+        self._action_counts: List[np.ndarray] = []
+        self._flips: List[np.ndarray] = []
+        self._distinct: List[int] = []
+        # the states of all traces, as their rows without the trailing absent fluents
+        self._states: Set[bytes] = set()
+        self._present = np.zeros(0, dtype=bool)
+        # the value of each fluent if it is the same in every state so far, or ABSENT
+        self._constant = np.zeros(0, dtype=np.int8)
+        for fluent in fluents:
+            self._fluent_id(fluent)
+        for action in actions:
+            self._action_id(action)
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def _fluent_id(self, fluent: Fluent) -> int:
+        fid = self._fluent_ids.get(fluent)
+        if fid is None:
+            fid = self._fluent_ids[fluent] = len(self.fluents)
+            self.fluents.append(fluent)
+        return fid
+
+    def _action_id(self, action: Optional[Action]) -> int:
+        if action is None:
+            return -1
+        aid = self._action_ids.get(action)
+        if aid is None:
+            aid = self._action_ids[action] = len(self.actions)
+            self.actions.append(action)
+        return aid
+
+    def _universe_columns(self, universe: FluentUniverse) -> np.ndarray:
+        columns = self._universes.get(id(universe))
+        if columns is None:
+            columns = np.array([self._fluent_id(f) for f in universe], dtype=np.int64)
+            self._universes[id(universe)] = columns
+        return columns
+
+    def _encode(self, trace: Trace) -> np.ndarray:
+        steps = trace.steps
+        first = steps[0].state if steps else None
+        universe = first.universe if isinstance(first, PackedState) else None
+        if universe is not None and all(
+            isinstance(step.state, PackedState) and step.state.universe is universe
+            for step in steps
+        ):
+            columns = self._universe_columns(universe)
+            width = (len(universe) + 7) >> 3
+
+            def unpack(attr, optional=True):
+                rows = [getattr(step.state, attr) for step in steps]
+                if optional and not any(rows):
+                    return None
+                data = b"".join(bits.to_bytes(width, "little") for bits in rows)
+                packed = np.frombuffer(data, dtype=np.uint8).reshape(len(steps), width)
+                return _unpack_rows(packed, len(universe))
+
+            packed = encode_packed(
+                unpack("bits", False), unpack("unknown"), unpack("absent")
+            )
+            values = np.full((len(steps), len(self.fluents)), ABSENT, dtype=np.int8)
+            values[:, columns] = packed
+            return values
+
+        rows, columns, codes = [], [], []
+        for i, step in enumerate(steps):
+            for fluent, value in step.state.items():
+                rows.append(i)
+                columns.append(self._fluent_id(fluent))
+                codes.append(UNKNOWN if value is None else TRUE if value else FALSE)
+        values = np.full((len(steps), len(self.fluents)), ABSENT, dtype=np.int8)
+        values[rows, columns] = codes
+        return values
+
+    def add_trace(self, trace: Trace):
+        """Adds the statistics of a trace.
+
+        Args:
+            trace (Trace):
+                The trace to add.
+        """
+        values = self._encode(trace)
+        action_ids = np.fromiter(
+            (self._action_id(action) for action in trace._step_actions()),
+            dtype=np.int64,
+            count=len(trace),
+        )
+        self.add_encoded(values, action_ids)
+
+    def add_encoded(self, values: np.ndarray, action_ids: np.ndarray):
+        """Adds the statistics of an encoded trace.
+
+        Args:
+            values (np.ndarray):
+                The values of the fluents in each step, as a (steps x fluents) matrix of
+                codes (see `encode_packed`), with the fluents in column order.
+            action_ids (np.ndarray):
+                The column of the action of each step, or -1 for steps without one.
+        """
+        num_steps, width = values.shape
+        present = values != ABSENT
+
+        # fluents first seen in this trace were absent from the previous ones
+        grow = width - len(self._constant)
+        if grow > 0:
+            self._present = np.concatenate((self._present, np.zeros(grow, dtype=bool)))
+            self._constant = np.concatenate(
+                (self._constant, np.full(grow, ABSENT if self._states else _UNSET, np.int8))
+            )
+
+        self._lengths.append(num_steps)
+        self._action_counts.append(
+            np.bincount(action_ids[action_ids >= 0], minlength=len(self.actions))
+        )
+        changed = (values[1:] != values[:-1]) & present[1:] & present[:-1]
+        self._flips.append(changed.sum(axis=0))
+
+        seen_true = (values == TRUE).any(axis=0)
+        seen_false = ((values == FALSE) | (values == UNKNOWN)).any(axis=0)
+        self.static_fluents.append(
+            {self.fluents[i] for i in np.flatnonzero(seen_true ^ seen_false)}
+        )
+
+        if num_steps:
+            self._present[:width] |= present.any(axis=0)
+            first = values[0]
+            same = (values == first).all(axis=0) & ((first == TRUE) | (first == FALSE))
+            constant = np.where(same, first, ABSENT)
+            previous = self._constant[:width]
+            self._constant[:width] = np.where(
+                (previous == _UNSET) | (previous == constant), constant, ABSENT
+            )
+            # the fluents the trace does not range over are absent from its states
+            self._constant[width:] = ABSENT
+
+            if width:
+                rows = np.ascontiguousarray(values).view(np.dtype((np.void, width)))
+                unique = [row.tobytes() for row in np.unique(rows.ravel())]
+            else:
+                unique = [b""]
+            self._distinct.append(len(unique))
+            # states are compared without their trailing absent fluents, as the traces
+            # read before a fluent was first seen have no column for it
+            self._states.update(row.rstrip(b"\xff") for row in unique)
+        else:
+            self._distinct.append(0)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """The number of steps of each trace."""
+        return np.array(self._lengths, dtype=np.int64)
+
+    @property
+    def action_counts(self) -> np.ndarray:
+        """The number of steps taking each action in each trace, as a (traces x actions)
+        matrix."""
+        counts = np.zeros((len(self), len(self.actions)), dtype=np.int64)
+        for i, row in enumerate(self._action_counts):
+            counts[i, : len(row)] = row
+        return counts
+
+    @property
+    def flips(self) -> np.ndarray:
+        """The number of times each fluent changes value between two consecutive steps
+        of each trace, as a (traces x fluents) matrix. Steps the fluent is absent from
+        are skipped."""
+        flips = np.zeros((len(self), len(self.fluents)), dtype=np.int64)
+        for i, row in enumerate(self._flips):
+            flips[i, : len(row)] = row
+        return flips
+
+    @property
+    def distinct_states(self) -> np.ndarray:
+        """The number of distinct states of each trace."""
+        return np.array(self._distinct, dtype=np.int64)
+
+    @property
+    def num_distinct_states(self) -> int:
+        """The number of distinct states over all the traces."""
+        return len(self._states)
+
+    @property
+    def constant_fluents(self) -> Dict[Fluent, bool]:
+        """The fluents that have the same (known) value in every state of every trace,
+        with that value."""
+        return {
+            self.fluents[i]: bool(self._constant[i])
+            for i in np.flatnonzero((self._constant == TRUE) | (self._constant == FALSE))
+        }
+
+    def get_fluents(self) -> Set[Fluent]:
+        """Retrieves the fluents present in some state of the traces.
+
+        Returns:
+            The set of fluents present in some state.
+        """
+        return {self.fluents[i] for i in np.flatnonzero(self._present)}
+
+    def get_usage(self, action: Action) -> List[float]:
+        """Calculates how often an action was performed in each of the traces.
+
+        Args:
+            action (Action):
+                The action to find the usage of.
+
+        Returns:
+            The frequency of the action in each of the traces (see `Trace.get_usage`),
+            or 0 for empty traces.
+        """
+        aid = self._action_ids.get(action)
+        lengths = self.lengths
+        if aid is None:
+            return [0.0] * len(self)
+        counts = np.array(
+            [row[aid] if aid < len(row) else 0 for row in self._action_counts],
+            dtype=np.int64,
+        )
+        usage = np.divide(
+            counts, lengths, out=np.zeros(len(self)), where=lengths > 0
+        )
+        return usage.tolist()
@@ -1,4 +1,10 @@
-from .timer import set_timer_throw_exc, basic_timer, TraceSearchTimeOut, InvalidTime
+from .timer import (
+    Deadline,
+    set_timer_throw_exc,
+    basic_timer,
+    TraceSearchTimeOut,
+    InvalidTime,
+)
 from .complex_encoder import ComplexEncoder
 from .common_errors import PercentError
 from .trace_errors import InvalidPlanLength, InvalidNumberOfTraces
@@ -9,6 +15,7 @@ from .progress import progress
 # from .tokenization_utils import extract_fluent_subset
 
 __all__ = [
+    "Deadline",
     "set_timer_throw_exc",
     "basic_timer",
     "TraceSearchTimeOut",
@@ -1,5 +1,113 @@
+import signal
+import threading
+from contextlib import contextmanager
 from multiprocessing.pool import ThreadPool
-from typing import Union
+from time import monotonic
+from typing import Optional, Type, Union
+
+
+class Deadline:
+    """A time budget that long-running loops check cooperatively, e.g. once per step of a
+    walk, so that the work actually stops when the budget runs out.
+
+    Checking a deadline only reads the monotonic clock, so it is cheap enough to be done in
+    inner loops. Code that cannot check the deadline itself (e.g. a call to a planner) can
+    be interrupted by running it under `hard`.
+
+    Attributes:
+        num_seconds (float | None):
+            The length of the budget, or None for an unlimited budget.
+        expires_at (float):
+            The value of `time.monotonic` at which the budget runs out.
+    """
+
+    __slots__ = (
+        "num_seconds",
+        "expires_at",
+        "exception",
+        "exception_args",
+        "exception_kwargs",
+    )
+
+    def __init__(
+        self,
+        num_seconds: Optional[Union[float, int]],
+        exception: Type[Exception] = TimeoutError,
+        *exception_args,
+        **exception_kwargs,
+    ):
+        """Starts a time budget.
+
+        Args:
+            num_seconds (float | int | None):
+                The length of the budget, in seconds, or None for an unlimited budget.
+            exception (Type[Exception]):
+                Optional; The exception raised when the budget runs out. Defaults to
+                `TimeoutError`.
+            *exception_args, **exception_kwargs:
+                The arguments to build the exception with.
+        """
+        self.num_seconds = num_seconds
+        self.expires_at = (
+            float("inf") if num_seconds is None else monotonic() + num_seconds
+        )
+        self.exception = exception
+        self.exception_args = exception_args
+        self.exception_kwargs = exception_kwargs
+
+    def remaining(self) -> float:
+        """Retrieves the time left in the budget, in seconds (0 once it has run out)."""
+        return max(self.expires_at - monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        """Whether the budget has run out."""
+        return monotonic() >= self.expires_at
+
+    def check(self):
+        """Raises the exception of the deadline if the budget has run out."""
+        if monotonic() >= self.expires_at:
+            raise self.exception(*self.exception_args, **self.exception_kwargs)
+
+    @staticmethod
+    def can_interrupt() -> bool:
+        """Whether `hard` can interrupt code on this platform and thread (it relies on
+        `SIGALRM`, which is only delivered to the main thread)."""
+        return (
+            hasattr(signal, "setitimer")
+            and threading.current_thread() is threading.main_thread()
+        )
+
+    @contextmanager
+    def hard(self):
+        """Interrupts the code run under this context with the exception of the deadline
+        once the budget runs out, whether or not it checks the deadline.
+
+        The interruption is delivered with a `SIGALRM` timer. If that is not possible (see
+        `can_interrupt`), or if another timer is already running, the code is not
+        interrupted and only the cooperative checks apply.
+        """
+        if (
+            self.num_seconds is None
+            or not self.can_interrupt()
+            or signal.getitimer(signal.ITIMER_REAL)[0] > 0
+        ):
+            yield self
+            return
+
+        def interrupt(signum, frame):
+            self.check()
+
+        previous = signal.signal(signal.SIGALRM, interrupt)
+        try:
+            # the timer interval makes it fire again should the first signal arrive early
+            signal.setitimer(signal.ITIMER_REAL, max(self.remaining(), 1e-6), 0.01)
+            yield self
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(
+                signal.SIGALRM, signal.SIG_DFL if previous is None else previous
+            )
 
 
 def set_timer_throw_exc(
@@ -12,6 +120,9 @@ def set_timer_throw_exc(
         """
         Checks that a function runs within the specified time and raises an exception if it doesn't.
 
+        The function is interrupted once the time is up (see `Deadline.hard`). Where it cannot be
+        interrupted, it is run in a separate thread that is abandoned once the time is up.
+
         Args:
             function (function reference):
                 The generator function to be wrapped with this time-checker.
@@ -21,18 +132,14 @@ def set_timer_throw_exc(
         """
 
         def wrapper(*args, **kwargs):
-            pool = ThreadPool(processes=1)
-
-            thr = pool.apply_async(function, args=args, kwds=kwargs)
-            # run the function for the specified seconds
-            thr.wait(num_seconds)
-            # return successful results, if ready
-            if thr.ready():
-                pool.terminate()
-                return thr.get()
-            else:
-                # otherwise, raise an exception if the function takes too long
-                raise exception(*exception_args, **exception_kwargs)
+            deadline = Deadline(num_seconds, exception, *exception_args, **exception_kwargs)
+            if not deadline.can_interrupt():
+                finished, result = _run_in_thread(function, num_seconds, args, kwargs)
+                if not finished:
+                    raise exception(*exception_args, **exception_kwargs)
+                return result
+            with deadline.hard():
+                return function(*args, **kwargs)
 
         return wrapper
 
@@ -44,24 +151,51 @@ def basic_timer(num_seconds: Union[float, int]):
         """
         Runs a function for a specified time.
 
+        The function is interrupted once the time is up (see `Deadline.hard`). Where it cannot be
+        interrupted, it is run in a separate thread that is abandoned once the time is up.
+
+        The wrapped function returns None whether or not the time runs out, but an exception
+        raised by the function before the time is up is propagated to the caller rather than
+        being swallowed.
+
         Returns:
             The wrapped function.
         """
 
         def wrapper(*args, **kwargs):
-            pool = ThreadPool(processes=1)
-
-            thr = pool.apply_async(function, args=args, kwds=kwargs)
-            # run the function for the specified seconds and exit without checking for/returning results
-            thr.wait(num_seconds)
-            pool.terminate()
-            return
+            deadline = Deadline(num_seconds, _TimeUp)
+            if not deadline.can_interrupt():
+                _run_in_thread(function, num_seconds, args, kwargs)
+                return
+            try:
+                with deadline.hard():
+                    function(*args, **kwargs)
+            except _TimeUp:
+                pass
+            # exit without returning results
 
         return wrapper
 
     return timer
 
 
+class _TimeUp(Exception):
+    """Interrupts the functions run by `basic_timer`."""
+
+
+def _run_in_thread(function, num_seconds: Union[float, int], args, kwargs):
+    """Runs a function in a separate thread for the specified seconds. Returns whether it
+    finished, and its result if it did."""
+    pool = ThreadPool(processes=1)
+    thr = pool.apply_async(function, args=args, kwds=kwargs)
+    thr.wait(num_seconds)
+    if thr.ready():
+        pool.terminate()
+        return True, thr.get()
+    pool.terminate()
+    return False, None
+
+
 class TraceSearchTimeOut(Exception):
     """
     Raised when the time it takes to generate (or attempt to generate) a single trace is
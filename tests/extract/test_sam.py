@@ -243,3 +243,49 @@ class TestSAMgenerator(TestCase):
                           'log00_x',
                           domain_filename=model_dom,
                           problem_filename=model_prob)
+
+    def test_update(self):
+        base = Path(__file__).parent.parent
+        dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+        prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+        vanilla = VanillaSampling(dom=dom, prob=prob, plan_len=10, num_traces=5, seed=1,
+                                  observe_pres_effs=True, observe_static_fluents=True)
+        obs_trace_list = vanilla.traces.tokenize(Token=IdentityObservation)
+
+        def learned(model: Model):
+            return sorted((act.name, sorted(map(str, act.precond)), sorted(map(str, act.add)),
+                           sorted(map(str, act.delete))) for act in model.actions)
+
+        batch_model = sam.SAMgenerator(obs_trace_list=obs_trace_list).generate_model()
+        sam_generator = sam.SAMgenerator()
+        first_model = None
+        for obs_trace in obs_trace_list:
+            sam_generator.update(obs_trace)
+            if first_model is None:
+                first_model = sam_generator.generate_model()
+                first = learned(first_model)
+        # feeding the traces one at a time learns the same model as learning from all of them
+        self.assertEqual(learned(sam_generator.generate_model()), learned(batch_model))
+        # models generated earlier are not affected by later updates
+        self.assertEqual(learned(first_model), first)
+
+    def test_update_sorts(self):
+        base = Path(__file__).parent.parent
+        dom = str((base / "pddl_testing_files/playlist_domain_modified.pddl").resolve())
+        prob = str((base / "pddl_testing_files/playlist_problem_modified.pddl").resolve())
+        vanilla = VanillaSampling(dom=dom, prob=prob, plan_len=5, num_traces=4, seed=1,
+                                  observe_pres_effs=True, observe_static_fluents=True)
+        obs_trace_list = vanilla.traces.tokenize(Token=IdentityObservation)
+
+        def sorts(model: Model):
+            return sorted((act.name, act.param_sorts) for act in model.actions)
+
+        batch_generator = sam.SAMgenerator(obs_trace_list=obs_trace_list)
+        sam_generator = sam.SAMgenerator()
+        for obs_trace in obs_trace_list:
+            sam_generator.update(obs_trace)
+        # the streamed traces are typed like the traces given on initialization
+        self.assertEqual(sam_generator.action_2_sort, batch_generator.action_2_sort)
+        self.assertEqual(sam_generator.sort_dict, batch_generator.sort_dict)
+        self.assertTrue(batch_generator.sort_dict)
+        self.assertEqual(sorts(sam_generator.generate_model()), sorts(batch_generator.generate_model()))
@@ -17,6 +17,19 @@ def test_fd_random_samples():
     assert len(sampler.traces) == 3
 
 
+def test_fd_random_samples_short_walks():
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+
+    # init_h=1 makes walks of no steps, which are sampled as the initial state alone
+    sampler = FDRandomWalkSampling(dom=dom, prob=prob, init_h=1, num_traces=2, max_time=2)
+    assert [len(trace) for trace in sampler.traces] == [1, 1]
+
+    sampler.plan_len = lambda: 0
+    with pytest.raises(InvalidPlanLength):
+        sampler.generate_traces()
+
 
 if __name__ == "__main__":
     # exit out to the base macq folder so we can get to /tests
@@ -0,0 +1,50 @@
+from pathlib import Path
+from macq.generate.pddl import VanillaSampling
+
+
+def test_grounding_cache(tmp_path):
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+    cache_dir = str(tmp_path / "groundings")
+
+    for observe_static_fluents in (False, True):
+        uncached = VanillaSampling(
+            dom=dom,
+            prob=prob,
+            observe_static_fluents=observe_static_fluents,
+            cache_dir=cache_dir,
+            seed=5,
+        )
+        cached = VanillaSampling(
+            dom=dom,
+            prob=prob,
+            observe_static_fluents=observe_static_fluents,
+            cache_dir=cache_dir,
+            seed=5,
+        )
+
+        assert cached.grounded_fluents == uncached.grounded_fluents
+        assert [str(op) for op in cached.instance.operators] == [
+            str(op) for op in uncached.instance.operators
+        ]
+        assert list(cached.op_dict) == list(uncached.op_dict)
+
+        # the cached grounding generates the same traces
+        for generator in (cached, uncached):
+            generator.plan_len = 8
+            generator.num_traces = 3
+            generator.workers = 2
+        assert [
+            [str(step.action) for step in trace]
+            for trace in cached.generate_traces()
+        ] == [
+            [str(step.action) for step in trace]
+            for trace in uncached.generate_traces()
+        ]
+        assert [
+            [step.state for step in trace] for trace in cached.traces
+        ] == [[step.state for step in trace] for trace in uncached.traces]
+
+    # one grounding for each observe_static_fluents value
+    assert len(list(Path(cache_dir).glob("*.json"))) == 2
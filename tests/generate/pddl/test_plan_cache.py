@@ -0,0 +1,70 @@
+from pathlib import Path
+from macq.generate.pddl import LocalPlanner, PlanCache, VanillaSampling
+from macq.generate.pddl.planners import Planner
+from macq.trace import Fluent, PlanningObject
+
+
+class CountingPlanner(Planner):
+    def __init__(self):
+        self.planner = LocalPlanner()
+        self.calls = 0
+
+    def solve(self, generator):
+        self.calls += 1
+        return self.planner.solve(generator)
+
+
+def test_plan_cache(tmp_path):
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+    planner = CountingPlanner()
+    cache = PlanCache(capacity=1, cache_dir=str(tmp_path / "plans"))
+    vanilla = VanillaSampling(
+        dom=dom,
+        prob=prob,
+        plan_len=5,
+        num_traces=0,
+        observe_static_fluents=True,
+        planner=planner,
+        plan_cache=cache,
+    )
+
+    plan = vanilla.generate_plan()
+    assert vanilla.generate_plan() == plan
+    assert planner.calls == 1
+    assert cache.stats() == {
+        "hits": 1,
+        "disk_hits": 0,
+        "misses": 1,
+        "hit_rate": 0.5,
+        "size": 1,
+    }
+
+    # a new goal evicts the first plan from memory, but it is still on disk
+    goal = vanilla.problem.goal
+    vanilla.change_goal(
+        {Fluent("holding", [PlanningObject("object", "c")])},
+        str(tmp_path / "new_blocks_dom.pddl"),
+        str(tmp_path / "new_blocks_prob.pddl"),
+    )
+    assert vanilla.generate_plan() != plan
+    assert planner.calls == 2
+    vanilla.problem.goal = goal
+    assert vanilla.generate_plan() == plan
+    assert planner.calls == 2
+    assert cache.disk_hits == 1
+    assert len(cache) == 1
+
+    # plans are found again by other generators and later runs
+    other = VanillaSampling(
+        dom=dom,
+        prob=prob,
+        plan_len=5,
+        num_traces=0,
+        planner=planner,
+        plan_cache=PlanCache(cache_dir=str(tmp_path / "plans")),
+    )
+    assert str(other.generate_plan()) == str(plan)
+    assert other.plan_cache.hit_rate == 1.0
+    assert planner.calls == 2
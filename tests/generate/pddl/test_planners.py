@@ -0,0 +1,94 @@
+from pathlib import Path
+import pytest
+from tarski.evaluators.simple import evaluate
+from tarski.search.operations import is_applicable, progress
+from macq.generate.pddl import LocalPlanner, TraceFromGoal, VanillaSampling
+from macq.generate.pddl.planners import PlanNotFound
+from macq.trace import Fluent, PlanningObject
+
+
+def check_plan(generator, plan):
+    state = generator.problem.init
+    for op in plan.actions:
+        assert is_applicable(state, op)
+        state = progress(state, op)
+    assert evaluate(generator.problem.goal, state)
+
+
+def test_local_planner(tmp_path):
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+    vanilla = VanillaSampling(
+        dom=dom,
+        prob=prob,
+        plan_len=5,
+        num_traces=0,
+        observe_static_fluents=True,
+        planner=LocalPlanner(),
+    )
+    plan = vanilla.generate_plan()
+    assert plan.actions
+    check_plan(vanilla, plan)
+    check_plan(vanilla, vanilla.generate_plan(planner=LocalPlanner("add")))
+
+    vanilla.change_goal(
+        {
+            Fluent("on", [PlanningObject("object", "a"), PlanningObject("object", "b")]),
+            Fluent("holding", [PlanningObject("object", "c")]),
+        },
+        str(tmp_path / "new_blocks_dom.pddl"),
+        str(tmp_path / "new_blocks_prob.pddl"),
+    )
+    plan = vanilla.generate_plan()
+    check_plan(vanilla, plan)
+    trace = vanilla.generate_single_trace_from_plan(plan)
+    assert len(trace) == len(plan.actions) + 1
+
+    with pytest.raises(PlanNotFound):
+        vanilla.generate_plan(planner=LocalPlanner(max_expansions=1))
+
+    # a block cannot be held while another one is
+    vanilla.change_goal(
+        {
+            Fluent("holding", [PlanningObject("object", "a")]),
+            Fluent("holding", [PlanningObject("object", "b")]),
+        },
+        str(tmp_path / "new_blocks_dom.pddl"),
+        str(tmp_path / "new_blocks_prob.pddl"),
+    )
+    with pytest.raises(PlanNotFound):
+        vanilla.generate_plan(planner=LocalPlanner(max_expansions=500))
+
+    with pytest.raises(ValueError):
+        LocalPlanner("blind")
+
+    # offline trace from the goal of the problem
+    trace = TraceFromGoal(dom=dom, prob=prob, planner=LocalPlanner()).trace
+    assert trace[-1].action is None
+
+
+def test_change_problem_in_memory(tmp_path, monkeypatch):
+    base = Path(__file__).parent.parent.parent
+    monkeypatch.chdir(tmp_path)
+    vanilla = VanillaSampling(
+        dom=str((base / "pddl_testing_files/blocks_domain.pddl").resolve()),
+        prob=str((base / "pddl_testing_files/blocks_problem.pddl").resolve()),
+        plan_len=5,
+        num_traces=0,
+        observe_static_fluents=True,
+        planner=LocalPlanner(),
+    )
+    assert not vanilla.modified
+    holding_c = Fluent("holding", [PlanningObject("object", "c")])
+    vanilla.change_goal({holding_c})
+    vanilla.change_init(
+        [f for f, value in vanilla.tarski_state_to_macq(vanilla.problem.init).items() if value]
+    )
+    assert vanilla.modified
+    assert not list(tmp_path.iterdir())
+    check_plan(vanilla, vanilla.generate_plan())
+
+    vanilla.write_pddl()
+    assert vanilla.pddl_prob == "new_prob.pddl"
+    assert "holding c" in (tmp_path / "new_prob.pddl").read_text()
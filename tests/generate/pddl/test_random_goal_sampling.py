@@ -1,5 +1,42 @@
 from pathlib import Path
-from macq.generate.pddl import RandomGoalSampling
+from tarski.evaluators.simple import evaluate
+from tarski.search.operations import is_applicable, progress
+from macq.generate.pddl import LocalPlanner, RandomGoalSampling
+
+
+def test_random_goal_sampling_concurrently():
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+
+    for workers, num_chains in ((2, 1), (1, 2), (2, 2)):
+        sampler = RandomGoalSampling(
+            dom=dom,
+            prob=prob,
+            observe_static_fluents=True,
+            steps_deep=5,
+            subset_size_perc=0.2,
+            enforced_hill_climbing_sampling=num_chains > 1,
+            max_time=1,
+            seed=1,
+            workers=workers,
+            num_chains=num_chains,
+            planner=LocalPlanner(),
+        )
+        init = sampler.problem.init
+        goals = sampler.goal_sampling(3)
+        assert goals
+        assert sampler.problem.init is init
+        for goal, goal_init_plan in goals.items():
+            state = goal_init_plan["initial state"]
+            for op in goal_init_plan["plan"].actions:
+                assert is_applicable(state, op)
+                state = progress(state, op)
+            sampler.change_goal([f for f in goal if goal[f]])
+            assert evaluate(sampler.problem.goal, state)
+
+        # every pass samples new candidate goals
+        assert set(sampler.goal_sampling(3)) != set(goals)
 
 if __name__ == "__main__":
     # exit out to the base macq folder so we can get to /tests
@@ -0,0 +1,140 @@
+import random
+from pathlib import Path
+from tarski.search.operations import is_applicable, progress
+from macq.generate.pddl import Generator
+from macq.generate.pddl.successor_generator import (
+    SuccessorGenerator,
+    TarskiSuccessorGenerator,
+)
+
+SWITCH_DOMAIN = """
+(define (domain switches)
+    (:requirements :strips :typing :negative-preconditions)
+    (:types switch)
+    (:predicates (on ?s - switch) (locked ?s - switch))
+    (:action turn-on
+        :parameters (?s - switch)
+        :precondition (and (not (on ?s)) (not (locked ?s)))
+        :effect (and (on ?s)))
+    (:action turn-off
+        :parameters (?s - switch)
+        :precondition (and (on ?s))
+        :effect (and (not (on ?s))))
+    (:action lock
+        :parameters (?s - switch)
+        :precondition (and (not (locked ?s)))
+        :effect (and (locked ?s)))
+    (:action unlock
+        :parameters (?s - switch)
+        :precondition (and (locked ?s))
+        :effect (and (not (locked ?s)))))
+"""
+
+SWITCH_PROBLEM = """
+(define (problem switches-3)
+    (:domain switches)
+    (:objects a b c - switch)
+    (:init (on a) (locked b))
+    (:goal (and (on b))))
+"""
+
+
+def check_walks(generator: Generator):
+    successors = generator.get_successor_generator()
+    assert isinstance(successors, SuccessorGenerator)
+    operators = generator.instance.operators
+    state = generator.problem.init
+    walk = successors.start(state)
+    for _ in range(50):
+        expected = [i for i, op in enumerate(operators) if is_applicable(state, op)]
+        assert walk.applicable() == expected
+        assert successors.applicable_in(walk.state) == expected
+        assert successors.packed_bits(walk.state) == generator.tarski_state_to_macq(state).bits
+        if not expected:
+            break
+        op = random.choice(expected)
+        state = progress(state, operators[op])
+        walk.apply(op)
+
+
+def test_successor_generator(tmp_path):
+    base = Path(__file__).parent.parent.parent
+    random.seed(2)
+    for observe_static_fluents in (False, True):
+        check_walks(
+            Generator(
+                dom=str((base / "pddl_testing_files/blocks_domain.pddl").resolve()),
+                prob=str((base / "pddl_testing_files/blocks_problem.pddl").resolve()),
+                observe_static_fluents=observe_static_fluents,
+            )
+        )
+    # (in)equalities are evaluated when compiling
+    check_walks(
+        Generator(
+            dom=str((base / "pddl_testing_files/playlist_domain.pddl").resolve()),
+            prob=str((base / "pddl_testing_files/playlist_problem.pddl").resolve()),
+        )
+    )
+
+    dom = tmp_path / "switch_domain.pddl"
+    prob = tmp_path / "switch_problem.pddl"
+    dom.write_text(SWITCH_DOMAIN)
+    prob.write_text(SWITCH_PROBLEM)
+    generator = Generator(dom=str(dom), prob=str(prob), observe_static_fluents=True)
+    check_walks(generator)
+
+    # walks are independent of each other
+    successors = generator.get_successor_generator()
+    first = successors.start(generator.problem.init)
+    second = successors.start(generator.problem.init)
+    first.apply(first.applicable()[0])
+    assert second.applicable() != first.applicable()
+    assert successors.start(generator.problem.init).applicable() == second.applicable()
+
+    # the tarski fallback walks the same way
+    fallback = TarskiSuccessorGenerator(
+        generator.instance.operators,
+        lambda state: generator.tarski_state_to_macq(state).bits,
+    )
+    walk = fallback.start(generator.problem.init)
+    for _ in range(5):
+        assert walk.applicable() == second.applicable()
+        op = walk.applicable()[-1]
+        walk.apply(op)
+        second.apply(op)
+        assert fallback.packed_bits(walk.state) == successors.packed_bits(second.state)
+
+
+def test_tarski_state_to_macq():
+    base = Path(__file__).parent.parent.parent
+    generator = Generator(
+        dom=str((base / "pddl_testing_files/blocks_domain.pddl").resolve()),
+        prob=str((base / "pddl_testing_files/blocks_problem.pddl").resolve()),
+        observe_static_fluents=True,
+    )
+    tarski_state = generator.problem.init
+    state = generator.tarski_state_to_macq(tarski_state)
+
+    assert state.universe is generator.fluent_universe
+    assert {
+        (f.name, tuple(o.name for o in f.objects)) for f, value in state.items() if value
+    } == {
+        (atom.predicate.name, tuple(t.name for t in atom.subterms))
+        for atom in tarski_state.as_atoms()
+    }
+
+
+def test_tarski_act_to_macq():
+    base = Path(__file__).parent.parent.parent
+    generator = Generator(
+        dom=str((base / "pddl_testing_files/blocks_domain.pddl").resolve()),
+        prob=str((base / "pddl_testing_files/blocks_problem.pddl").resolve()),
+        observe_pres_effs=True,
+    )
+    op = generator.instance.operators[3]
+    action = generator.tarski_act_to_macq(op)
+
+    assert generator.tarski_act_to_macq(op) is action
+    assert generator.operator_action(3) is action
+    assert f"{action.name}({', '.join(o.name for o in action.obj_params)})" == op.name
+    assert action.precond and (action.add or action.delete)
@@ -1,9 +1,12 @@
+import numpy as np
 import pytest
+from itertools import islice
 from pathlib import Path
-from macq.generate.pddl import VanillaSampling
+from macq.generate.pddl import BatchedWalker, VanillaSampling
 from macq.generate.pddl.generator import InvalidGoalFluent
 from macq.utils import InvalidNumberOfTraces, InvalidPlanLength
 from macq.trace import Fluent, PlanningObject, TraceList
+from macq.observation import IdentityObservation
 from macq.utils import TraceSearchTimeOut, InvalidTime
 
 
@@ -39,6 +42,186 @@ def test_invalid_vanilla_sampling():
         VanillaSampling(dom=dom, prob=prob, plan_len=10, num_traces=1, max_time=0)
 
 
+def test_vanilla_sampling_workers():
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+
+    def actions(traces: TraceList):
+        return [[str(step.action) for step in trace] for trace in traces]
+
+    vanilla = VanillaSampling(
+        dom=dom, prob=prob, plan_len=5, num_traces=6, seed=3, workers=3
+    )
+    traces = vanilla.traces
+    assert len(traces) == 6
+    assert all(len(trace) == 5 for trace in traces)
+    assert traces[0][0].state.universe is vanilla.fluent_universe
+
+    # successive calls keep generating new traces
+    more = actions(vanilla.generate_traces())
+    assert more != actions(traces)
+
+    # the traces only depend on the seed, not on the number of workers
+    for workers in (1, 2):
+        same = VanillaSampling(
+            dom=dom, prob=prob, plan_len=5, num_traces=6, seed=3, workers=workers
+        )
+        assert actions(same.traces) == actions(traces)
+        assert actions(same.generate_traces()) == more
+
+
+def test_vanilla_sampling_iter_traces():
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+
+    def actions(traces):
+        return [[str(step.action) for step in trace] for trace in traces]
+
+    def sampler(**kwargs):
+        return VanillaSampling(
+            dom=dom, prob=prob, plan_len=5, seed=3, observe_static_fluents=True, **kwargs
+        )
+
+    vanilla = sampler()
+    assert vanilla.traces is None
+
+    streamed = list(vanilla.iter_traces(4))
+    vanilla = sampler()
+    vanilla.num_traces = 4
+    assert actions(vanilla.generate_traces()) == actions(streamed)
+
+    steps = list(sampler().iter_steps(4))
+    assert [i for i, _ in steps] == [i for i in range(4) for _ in range(5)]
+    assert [str(step.action) for _, step in steps] == sum(actions(streamed), [])
+    assert [step.state for _, step in steps] == [
+        step.state for trace in streamed for step in trace
+    ]
+
+    # streams can be tokenized and are unbounded by default
+    observed = list(islice(vanilla.iter_traces(Token=IdentityObservation), 3))
+    assert len(observed) == 3
+    assert all(isinstance(obs, IdentityObservation) for obs in observed[0])
+
+    vanilla = sampler(workers=2)
+    assert actions(vanilla.iter_traces(4)) == actions(streamed)
+    assert len(list(islice(vanilla.iter_traces(), 100))) == 100
+
+
+def test_vanilla_sampling_batched():
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+
+    vanilla = VanillaSampling(
+        dom=dom,
+        prob=prob,
+        plan_len=6,
+        num_traces=10,
+        seed=5,
+        observe_static_fluents=True,
+        batch_size=4,
+    )
+    assert len(vanilla.fluent_universe) > 0
+    traces = vanilla.traces
+    assert len(traces) == 10
+    assert all(len(trace) == 6 for trace in traces)
+
+    # replay the batched walks one step at a time
+    successors = vanilla.get_successor_generator()
+    for visited, ops in vanilla.iter_walk_batches(5, batch_size=3):
+        assert visited.shape[1:] == (6, len(vanilla.fluent_universe))
+        for states, walk_ops in zip(visited, ops):
+            state = successors.encode(vanilla.problem.init)
+            for i, op in enumerate(walk_ops):
+                bits = successors.packed_bits(state)
+                assert [bool(bits >> f & 1) for f in range(len(states[i]))] == states[i].tolist()
+                assert op in successors.applicable_in(state)
+                state = successors.successor(state, op)
+
+    with pytest.raises(ValueError):
+        BatchedWalker(successors).walk(
+            successors.encode(vanilla.problem.init), 2, 0, np.random.default_rng(0)
+        )
+
+    # successive calls keep drawing new walks
+    _, first = next(vanilla.iter_walk_batches(8, batch_size=8))
+    _, second = next(vanilla.iter_walk_batches(8, batch_size=8))
+    assert not np.array_equal(first, second)
+
+    # the batches only depend on the seed
+    same = VanillaSampling(
+        dom=dom,
+        prob=prob,
+        plan_len=6,
+        num_traces=10,
+        seed=5,
+        observe_static_fluents=True,
+        batch_size=4,
+    ).traces
+    for trace, other in zip(traces, same):
+        assert [str(step.action) for step in trace] == [str(step.action) for step in other]
+        assert [step.state for step in trace] == [step.state for step in other]
+
+    playlist_dom = str((base / "pddl_testing_files/playlist_domain.pddl").resolve())
+    playlist_prob = str((base / "pddl_testing_files/playlist_problem.pddl").resolve())
+    with pytest.raises(TraceSearchTimeOut):
+        VanillaSampling(
+            dom=playlist_dom,
+            prob=playlist_prob,
+            plan_len=10,
+            num_traces=1,
+            max_time=1,
+            batch_size=8,
+        )
+
+
+def test_vanilla_sampling_coverage_guided():
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+
+    def distinct_transitions(traces: TraceList):
+        return {
+            (step.state, str(step.action))
+            for trace in traces
+            for step in trace
+            if step.action is not None
+        }
+
+    kwargs = dict(
+        dom=dom, prob=prob, plan_len=15, num_traces=30, seed=2, observe_static_fluents=True
+    )
+    uniform = VanillaSampling(**kwargs)
+    assert uniform.coverage is None
+    guided = VanillaSampling(**kwargs, coverage_guided=True)
+    stats = guided.coverage.stats()
+    assert stats["steps"] == 30 * 14
+    assert stats["transitions"] == len(distinct_transitions(guided.traces))
+    assert 0 < stats["novelty"] <= 1
+
+    def early_repeats(sampler: VanillaSampling):
+        """Counts the transitions taken again while their state had actions not taken yet."""
+        successors = sampler.get_successor_generator()
+        taken = set()
+        repeats = 0
+        for _ in range(30):
+            states, ops = sampler._random_walk(15)
+            for state, op in zip(states, ops):
+                if (state, op) in taken and any(
+                    (state, other) not in taken for other in successors.applicable_in(state)
+                ):
+                    repeats += 1
+            taken.update(zip(states, ops))
+        return repeats
+
+    # guided walks only take a transition again once every action from its state was taken
+    guided.coverage.clear()
+    assert early_repeats(guided) == 0
+    assert early_repeats(uniform) > 0
+
+
 if __name__ == "__main__":
     # exit out to the base macq folder so we can get to /tests
     base = Path(__file__).parent.parent.parent
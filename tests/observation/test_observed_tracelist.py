@@ -0,0 +1,135 @@
+from pathlib import Path
+import pytest
+from tests.utils.generators import generate_test_trace_list
+from macq.generate.pddl import VanillaSampling
+from macq.observation import (
+    AtomicPartialObservation,
+    IdentityObservation,
+    NoisyObservation,
+    NoisyPartialObservation,
+    PartialObservation,
+)
+from macq.trace import PackedPartialState
+
+
+def check_transitions(observations):
+    transitions = observations.get_all_transitions()
+    assert set(transitions) == observations.get_actions()
+    for action, windows in transitions.items():
+        expected = observations.fetch_observation_windows(
+            {"action": action.details()}, 0, 1
+        )
+        assert windows == expected
+        assert observations.get_transitions(action.details()) == windows
+
+
+def test_get_all_transitions():
+    observations = generate_test_trace_list(5).tokenize(IdentityObservation)
+    check_transitions(observations)
+    assert observations.get_transitions("missing") == []
+
+    # mutating the list drops the cached index
+    removed = observations[0]
+    del observations[0]
+    check_transitions(observations)
+    observations.insert(0, removed)
+    check_transitions(observations)
+    observations[1] = removed
+    check_transitions(observations)
+
+
+def test_tokenize_workers():
+    trace_list = generate_test_trace_list(6)
+    serial = trace_list.tokenize(PartialObservation, percent_missing=0.5, seed=7)
+    parallel = trace_list.tokenize(
+        PartialObservation, percent_missing=0.5, seed=7, workers=3
+    )
+    assert list(parallel) == list(serial)
+    assert list(trace_list.tokenize(PartialObservation, percent_missing=0.5, seed=7)) == list(serial)
+    assert list(trace_list.tokenize(PartialObservation, percent_missing=0.5, seed=8)) != list(serial)
+
+
+def blocks_sampler():
+    base = Path(__file__).parent.parent
+    return VanillaSampling(
+        dom=str((base / "pddl_testing_files/blocks_domain.pddl").resolve()),
+        prob=str((base / "pddl_testing_files/blocks_problem.pddl").resolve()),
+        plan_len=7,
+        num_traces=3,
+        seed=1,
+        observe_static_fluents=True,
+    )
+
+
+def _unpickle_error():
+    raise RuntimeError("cannot unpickle")
+
+
+class UnpicklableObservation(IdentityObservation):
+    def __reduce__(self):
+        return _unpickle_error, ()
+
+
+def test_tokenize_workers_packed():
+    traces = blocks_sampler().traces
+    for Token, kwargs in ((IdentityObservation, {}), (PartialObservation, {"percent_missing": 0.5})):
+        serial = traces.tokenize(Token, seed=3, **kwargs)
+        parallel = traces.tokenize(Token, seed=3, workers=2, **kwargs)
+        assert list(parallel) == list(serial)
+
+    # failures in the workers are raised instead of waiting for their results forever
+    with pytest.raises(TypeError):
+        traces.tokenize(PartialObservation, missing=0.5, workers=2)
+    with pytest.raises(RuntimeError):
+        traces.tokenize(UnpicklableObservation, workers=2)
+
+
+def test_tokenize_packed_partial():
+    sampler = blocks_sampler()
+    universe = sampler.fluent_universe
+    hide = set(universe.fluents[:2])
+    observations = sampler.traces.tokenize(
+        PartialObservation, percent_missing=0.25, hide=hide, seed=1
+    )
+    for obs_trace, trace in zip(observations, sampler.traces):
+        for obs, step in zip(obs_trace, trace):
+            assert isinstance(obs.state, PackedPartialState)
+            values = dict(obs.state.items())
+            hidden = {f for f, v in values.items() if v is None}
+            assert hide <= hidden
+            assert len(hidden - hide) >= int(len(universe) * 0.25) - len(hide)
+            assert len(hidden) <= int(len(universe) * 0.25) + len(hide)
+            assert all(v == step.state[f] for f, v in values.items() if v is not None)
+            assert obs.action == step.action and obs.index == step.index
+
+    atomic = sampler.traces.tokenize(AtomicPartialObservation, percent_missing=1)
+    assert all(obs.state is None for obs_trace in atomic for obs in obs_trace)
+
+
+def test_tokenize_packed_noisy():
+    sampler = blocks_sampler()
+    num_fluents = len(sampler.fluent_universe)
+    for replace in (False, True):
+        observations = sampler.traces.tokenize(
+            NoisyObservation, percent_noisy=0.25, replace=replace, seed=1
+        )
+        for obs_trace, trace in zip(observations, sampler.traces):
+            for obs, step in zip(obs_trace, trace):
+                wrong = sum(obs.state[f] != v for f, v in step.state.items())
+                if replace:
+                    assert wrong <= int(num_fluents * 0.25)
+                else:
+                    assert wrong == int(num_fluents * 0.25)
+                assert obs.action == step.action and obs.index == step.index
+
+    hide = set(sampler.fluent_universe.fluents[:2])
+    observations = sampler.traces.tokenize(
+        NoisyPartialObservation, percent_missing=0.25, hide=hide, percent_noisy=0.5
+    )
+    for obs_trace, trace in zip(observations, sampler.traces):
+        for obs, step in zip(obs_trace, trace):
+            values = dict(obs.state.items())
+            hidden = {f for f, v in values.items() if v is None}
+            assert hide <= hidden
+            wrong = sum(v != step.state[f] for f, v in values.items() if v is not None)
+            assert wrong == int((num_fluents - len(hidden)) * 0.5)
@@ -1,4 +1,5 @@
-from macq.trace import PlanningObject
+import pickle
+from macq.trace import Action, Fluent, PlanningObject
 from tests.utils.generators import generate_test_actions
 
 
@@ -15,3 +16,26 @@ def test_action():
     obj = PlanningObject("test_obj", "test")
     a1.obj_params.append(obj)
     assert obj in a1.obj_params
+
+
+
+def test_action_hash():
+    a1, a2 = generate_test_actions(2)
+    assert hash(a1) == hash(a1.clone())
+    assert hash(a1) != hash(a2)
+    assert a1.clone(atomic=True) == a1.clone(atomic=True)
+    assert hash(a1.clone(atomic=True)) == hash(a1.clone(atomic=True))
+    assert pickle.loads(pickle.dumps(a2)) == a2
+
+    fluent = Fluent("clear", [a1.obj_params[0]])
+    full = Action(a1.name, a1.obj_params, a1.cost, {fluent}, set(), set())
+    assert full == a1
+    assert hash(full) == hash(a1)
+
+    # the hash follows changes to the objects of the action
+    clone = a1.clone()
+    hash(a1), hash(clone)
+    obj = PlanningObject("test_obj", "hash")
+    a1.obj_params.append(obj)
+    clone.obj_params.append(obj)
+    assert a1 == clone and hash(a1) == hash(clone) and a1 in {clone}
@@ -0,0 +1,101 @@
+import pytest
+from tests.utils.generators import generate_test_trace_list, generate_test_trace
+from macq.trace import (
+    ColumnarTraceList,
+    FluentUniverse,
+    PackedState,
+    PartialState,
+    Step,
+    Trace,
+    TraceList,
+)
+from macq.observation import IdentityObservation
+
+ReadOnly = ColumnarTraceList.ReadOnly
+
+
+def assert_same_traces(traces, stored_traces):
+    assert len(traces) == len(stored_traces)
+    for trace, stored in zip(traces, stored_traces):
+        assert len(trace) == len(stored)
+        for step, stored_step in zip(trace, stored):
+            assert stored_step.state == step.state
+            assert stored_step.action == step.action
+            assert stored_step.index == step.index
+
+
+def test_columnar_trace_list(tmp_path):
+    trace_list = generate_test_trace_list(5)
+    columnar = ColumnarTraceList.write(trace_list, tmp_path / "traces")
+
+    assert len(columnar) == 5
+    assert columnar.unknown is None
+    assert_same_traces(trace_list, columnar)
+    for trace, stored in zip(trace_list, columnar):
+        for step, stored_step in zip(trace, stored):
+            assert isinstance(stored_step.state, PackedState)
+            assert stored_step.state.universe is columnar.universe
+            if step.action is not None:
+                assert stored_step.action.cost == step.action.cost
+    assert columnar.get_fluents() == trace_list.get_fluents()
+
+    # slicing keeps the trace list columnar
+    sliced = columnar[1:4:2]
+    assert isinstance(sliced, ColumnarTraceList)
+    assert_same_traces([trace_list[1], trace_list[3]], sliced)
+    assert_same_traces([trace_list[3]], [sliced[-1]])
+
+    assert list(columnar.costs()) == [t.get_total_cost() for t in trace_list]
+    assert list(sliced.costs()) == [trace_list[1].get_total_cost(), trace_list[3].get_total_cost()]
+    cheapest = columnar.top_k(2)
+    assert isinstance(cheapest, ColumnarTraceList)
+    assert list(cheapest.costs()) == sorted(columnar.costs())[:2]
+
+    reopened = ColumnarTraceList(tmp_path / "traces")
+    assert_same_traces([trace_list[2]], [reopened[2]])
+    assert isinstance(reopened.to_trace_list(), TraceList)
+
+    obs = columnar.tokenize(IdentityObservation)
+    assert len(obs) == 5
+    assert obs.get_all_transitions().keys() == (
+        trace_list.tokenize(IdentityObservation).get_all_transitions().keys()
+    )
+
+    with pytest.raises(ReadOnly):
+        columnar[0] = trace_list[0]
+    with pytest.raises(ReadOnly):
+        columnar.append(trace_list[0])
+    with pytest.raises(ReadOnly):
+        del columnar[0]
+
+
+def test_columnar_trace_list_partial(tmp_path):
+    trace_list = TraceList([generate_test_trace(4) for _ in range(2)])
+    fluents = sorted(trace_list.get_fluents())
+    universe = FluentUniverse(fluents)
+    partial = {fluents[0]: None, fluents[1]: True, fluents[2]: False}
+    trace_list.append(Trace([Step(PartialState(partial), None, 0)]))
+
+    columnar = ColumnarTraceList.write(iter(trace_list), tmp_path, universe)
+    assert columnar.universe.fluents == fluents
+    assert columnar.unknown is not None and columnar.absent is not None
+    state = columnar[2][0].state
+    assert isinstance(state, PartialState)
+    assert state == PartialState(partial)
+    assert_same_traces(trace_list, columnar)
+
+
+def test_columnar_trace_list_stats(tmp_path):
+    trace_list = generate_test_trace_list(4)
+    columnar = ColumnarTraceList.write(trace_list, tmp_path)
+    stats, stored = trace_list.stats(), columnar.stats()
+
+    assert list(stored.lengths) == list(stats.lengths)
+    assert list(stored.distinct_states) == list(stats.distinct_states)
+    assert stored.num_distinct_states == stats.num_distinct_states
+    assert stored.static_fluents == stats.static_fluents
+    assert stored.constant_fluents == stats.constant_fluents
+    columns = [stored.fluents.index(f) for f in stats.fluents]
+    assert (stored.flips[:, columns] == stats.flips).all()
+    for action in stats.actions:
+        assert columnar.get_usage(action) == trace_list.get_usage(action)
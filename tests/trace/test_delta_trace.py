@@ -0,0 +1,75 @@
+from pathlib import Path
+import pytest
+from macq.generate.pddl import VanillaSampling
+from macq.trace import DeltaTrace, PackedState, PartialState, Step, Trace
+from macq.observation import IdentityObservation
+
+AppendOnly = DeltaTrace.AppendOnly
+
+
+def blocks_sampler(**kwargs):
+    base = Path(__file__).parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+    return VanillaSampling(
+        dom=dom,
+        prob=prob,
+        plan_len=7,
+        num_traces=3,
+        seed=1,
+        observe_static_fluents=True,
+        **kwargs,
+    )
+
+
+def test_delta_trace():
+    sampler = blocks_sampler()
+    trace = sampler.traces[0]
+    universe = sampler.fluent_universe
+    delta = DeltaTrace(universe, trace, checkpoint_interval=3)
+
+    assert len(delta) == len(trace)
+    assert delta == trace
+    assert delta.fluents == trace.fluents
+    assert delta.actions == trace.actions
+    # random access replays the deltas since the last checkpoint
+    for i in reversed(range(len(trace))):
+        assert delta[i].state == trace[i].state
+        assert delta[i].action == trace[i].action
+        assert isinstance(delta[i].state, PackedState)
+    assert delta[-1].state == trace[-1].state
+    assert [step.index for step in delta[1:3]] == [step.index for step in trace[1:3]]
+    # decoded steps are found by value
+    for i in range(len(trace)):
+        assert delta[i] in delta and trace[i] in delta
+        assert delta.index(delta[i]) == i
+        assert delta.count(delta[i]) == 1
+    assert trace[0].state not in delta
+    with pytest.raises(ValueError):
+        delta.index(Step(trace[0].state, trace[0].action, len(trace) + 1))
+    assert len(delta.tokenize(IdentityObservation)) == len(trace)
+    action = trace[0].action
+    assert delta.get_usage(action) == trace.get_usage(action)
+    assert delta.get_all_sas_triples().keys() == trace.get_all_sas_triples().keys()
+
+    last = delta.pop()
+    assert last.state == trace[-1].state
+    assert len(delta) == len(trace) - 1
+    delta.append(trace[-1])
+    assert delta == trace
+    assert isinstance(delta.to_trace(), Trace)
+
+    with pytest.raises(AppendOnly):
+        delta[0] = trace[0]
+    with pytest.raises(AppendOnly):
+        delta.insert(0, trace[0])
+    with pytest.raises(ValueError):
+        delta.append(Step(PartialState({universe[0]: None}), None, 0))
+
+
+def test_generated_delta_traces():
+    traces = blocks_sampler().traces
+    delta_traces = blocks_sampler(delta_traces=True).traces
+    for trace, delta in zip(traces, delta_traces):
+        assert isinstance(delta, DeltaTrace)
+        assert delta == trace
@@ -1,3 +1,5 @@
+import pickle
+from macq.trace import Fluent, PlanningObject
 from tests.utils.generators import generate_test_fluents
 
 
@@ -5,3 +7,21 @@ def test_compare():
     fluent1 = generate_test_fluents(3)
     fluent2 = generate_test_fluents(3)
     assert fluent1 == fluent2
+
+
+def test_interning():
+    fluent1 = generate_test_fluents(3)
+    fluent2 = generate_test_fluents(3)
+    for f1, f2 in zip(fluent1, fluent2):
+        assert f1 is f2
+        assert f1.objects[0] is f2.objects[0]
+    assert pickle.loads(pickle.dumps(fluent1)) == fluent1
+    assert pickle.loads(pickle.dumps(fluent1))[0] is fluent1[0]
+
+    # objects only differing by type are equal, but not the same object
+    typed = Fluent("on", [PlanningObject("block", "a")])
+    untyped = Fluent("on", [PlanningObject("object", "a")])
+    assert typed is not untyped
+    assert typed == untyped
+    assert hash(typed) == hash(untyped)
+    assert str(typed) == "(on block a)"
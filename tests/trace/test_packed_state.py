@@ -0,0 +1,110 @@
+import pickle
+import pytest
+from macq.trace import (
+    State,
+    PartialState,
+    FluentUniverse,
+    PackedState,
+    PackedPartialState,
+)
+from tests.utils.generators import generate_test_fluents
+
+
+def test_fluent_universe():
+    fluents = generate_test_fluents(10)
+    universe = FluentUniverse(fluents + fluents[:3])
+
+    assert len(universe) == 10
+    assert list(universe) == fluents
+    assert universe.index[fluents[4]] == 4
+    assert fluents[9] in universe
+
+    bits = universe.from_indices([0, 3, 9])
+    assert bits == 0b1000001001
+    assert universe.unpack(bits) == "1001000001"
+    assert universe.from_array(universe.to_array(bits)) == bits
+
+
+def test_packed_state():
+    fluents = generate_test_fluents(5)
+    universe = FluentUniverse(fluents)
+    values = {f: i % 2 == 0 for i, f in enumerate(fluents)}
+    s1 = PackedState.from_state(values, universe)
+    s2 = PackedState.from_state(State(values), universe)
+
+    assert s1 == s2
+    assert hash(s1) == hash(s2)
+    assert s1 == State(values)
+    assert State(values) == s1
+    assert s1 == State(s1.copy())
+    assert s1 == s1.clone()
+    assert s1 != "test"
+    # equal states hash alike, whatever their type
+    assert hash(s1) == hash(State(values))
+    assert len({s1, State(values)}) == 1
+    s1[fluents[1]] = True
+    assert hash(s1) == hash(State(s1.copy()))
+    s1[fluents[1]] = False
+
+    restored = pickle.loads(pickle.dumps(s1))
+    assert type(restored) is PackedState
+    assert restored == s1 and hash(restored) == hash(s1)
+    assert len(s1) == 5
+    assert s1.details()
+    assert str(s1) == str(State(values))
+    assert dict(s1.items()) == values
+    assert list(s1.keys()) == fluents
+    assert s1.fluents[fluents[0]]
+    assert fluents[0] in s1.fluents.keys()
+
+    fluent = fluents[0]
+    assert s1.holds(fluent.name)
+    s1[fluent] = False
+    assert not s1[fluent]
+    assert fluent not in s1
+    assert s1 != s2
+
+    del s1[fluent]
+    with pytest.raises(KeyError):
+        s1[fluent]
+    assert not s1.has_key(fluent)
+    assert fluent not in s1.keys()
+    assert len(s1) == 4
+    s1[fluent] = True
+    assert s1.has_key(fluent)
+
+    for v in s1.values():
+        assert isinstance(v, bool)
+
+    s1.clear()
+    assert len(s1) == 0
+    s1.update(values)
+    assert s1 == s2
+
+
+def test_packed_partial_state():
+    fluents = generate_test_fluents(4)
+    universe = FluentUniverse(fluents)
+    values = {fluents[0]: True, fluents[1]: None, fluents[2]: False, fluents[3]: None}
+    state = PackedPartialState.from_state(values, universe)
+
+    assert isinstance(state, PartialState)
+    assert state[fluents[1]] is None
+    assert state == PartialState(values)
+    assert state.copy() == values
+    assert state.clone() == values
+
+    state[fluents[1]] = True
+    assert state[fluents[1]]
+    state[fluents[0]] = None
+    assert state[fluents[0]] is None
+
+
+def test_packed_state_pickle():
+    fluents = generate_test_fluents(4)
+    universe = FluentUniverse(fluents)
+    state = PackedPartialState(universe, 0b0001, 0b0010, 0b1000)
+    restored = pickle.loads(pickle.dumps(state))
+    assert type(restored) is PackedPartialState
+    assert (restored.bits, restored.unknown, restored.absent) == (1, 2, 8)
+    assert restored == state
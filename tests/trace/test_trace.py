@@ -97,6 +97,15 @@ def test_trace_usage():
     assert isinstance(action1, Action)
     assert trace.get_usage(action1) == 1 / 3
 
+    # every step taking the action is counted, not just whether it was taken
+    steps = generate_test_trace(4).steps
+    repeated = Trace(
+        [Step(step.state, action1, step.index) for step in steps[:3]] + [steps[3]]
+    )
+    assert repeated.get_steps(action1) == set(repeated.steps[:3])
+    assert repeated.get_usage(action1) == 3 / 4
+    assert TraceList([trace, repeated]).get_usage(action1) == [1 / 3, 3 / 4]
+
 
 # test trace tokenize function
 def test_trace_tokenize():
@@ -144,3 +153,56 @@ def test_trace_list_methods():
 
     trace.remove(step)
     assert step not in trace
+
+
+# test the index of the steps of each action
+def test_trace_action_index():
+    trace = generate_test_trace(4)
+    steps = trace.steps.copy()
+    action = steps[1].action
+    assert trace.get_steps(action) == {steps[1]}
+    assert trace.get_usage(action) == 1 / 4
+
+    # appended and inserted steps are indexed
+    trace.append(Step(steps[0].state, action, 5))
+    assert trace.get_usage(action) == 2 / 5
+    trace.insert(0, Step(steps[2].state, action, 0))
+    trace.append(Step(steps[3].state, None, 6))
+    assert trace.get_pre_states(action) == {steps[2].state, steps[1].state, steps[0].state}
+    assert trace.get_post_states(action) == {
+        steps[0].state,
+        steps[2].state,
+        steps[3].state,
+    }
+    assert [triple.pre_state for triple in trace.get_sas_triples(action)] == [
+        steps[2].state,
+        steps[1].state,
+        steps[0].state,
+    ]
+
+    # removals rebuild the index
+    trace.pop()
+    trace.pop()
+    del trace[0]
+    assert trace.get_steps(action) == {steps[1]}
+
+    all_triples = trace.get_all_sas_triples()
+    assert all_triples.keys() == {step.action for step in steps[:-1]}
+    for act, triples in all_triples.items():
+        assert triples == trace.get_sas_triples(act)
+
+
+# test that the cumulative costs follow the changes to the trace
+def test_trace_cost_index():
+    trace = generate_test_trace(5)
+    action = trace[3].action
+    assert trace.get_slice_cost(2, 4) == 9
+    trace.append(Step(trace[0].state, action, 6))
+    assert trace.get_total_cost() == 14
+    assert trace.get_slice_cost(4, 6) == 8
+    trace.insert(0, Step(trace[0].state, action, 0))
+    assert trace.get_slice_cost(1, 2) == 5
+    del trace[0]
+    assert trace.get_slice_cost(1, 2) == 3
+    trace.pop()
+    assert trace.get_total_cost() == 10
@@ -71,3 +71,67 @@ def test_trace_list_csv_load():
     assert trace_list[2][2].state[Fluent("holding object i", [])] == False
     assert trace_list[2][2].state[Fluent("ontable object g", [])] == False
     assert trace_list[2][2].state[Fluent("ontable object c", [])] == True
+
+
+def test_trace_list_costs():
+    trace_list = TraceList([generate_test_trace(n) for n in (4, 2, 5, 3)])
+    assert list(trace_list.costs()) == [6, 1, 10, 3]
+
+    trace_list.append(generate_test_trace(1))
+    assert list(trace_list.costs()) == [6, 1, 10, 3, 0]
+    assert [t.get_total_cost() for t in trace_list.top_k(2)] == [0, 1]
+    assert [t.get_total_cost() for t in trace_list.top_k(2, largest=True)] == [10, 6]
+    assert len(trace_list.top_k(10)) == 5
+
+    # ties are kept in list order
+    tied = TraceList([generate_test_trace(n) for n in (3, 2, 3, 1, 3, 3)])
+    positions = {id(t): i for i, t in enumerate(tied)}
+    assert [positions[id(t)] for t in tied.top_k(3)] == [3, 1, 0]
+    assert [positions[id(t)] for t in tied.top_k(2, largest=True)] == [0, 2]
+
+    counts, edges = trace_list.cost_histogram(bins=2, range=(0, 10))
+    assert list(counts) == [3, 2] and list(edges) == [0, 5, 10]
+
+    trace_list.sort()
+    assert [t.get_total_cost() for t in trace_list] == [0, 1, 3, 6, 10]
+    trace_list.sort(reverse=True)
+    assert list(trace_list.costs()) == [10, 6, 3, 1, 0]
+    trace_list.sort(key=len)
+    assert [len(t) for t in trace_list] == [1, 2, 3, 4, 5]
+    assert list(trace_list.costs()) == [0, 1, 3, 6, 10]
+
+    # edits to the traces themselves require a reindex
+    trace_list[0].append(trace_list[1][0])
+    trace_list.reindex()
+    assert trace_list.costs()[0] == 1
+
+
+def test_trace_list_stats():
+    trace_list = TraceList([generate_test_trace(n) for n in (4, 2, 5)])
+    stats = trace_list.stats()
+    assert trace_list.stats() is stats
+    assert list(stats.lengths) == [4, 2, 5]
+    assert stats.get_fluents() == {f for t in trace_list for s in t for f in s.state}
+
+    for i, trace in enumerate(trace_list):
+        assert stats.static_fluents[i] == trace.get_static_fluents()
+        assert stats.distinct_states[i] == len({frozenset(s.state.items()) for s in trace})
+        for j, action in enumerate(stats.actions):
+            assert stats.action_counts[i, j] == len(trace.get_steps(action))
+        for j, fluent in enumerate(stats.fluents):
+            values = [s.state[fluent] for s in trace if fluent in s.state.fluents]
+            flips = sum(a != b for a, b in zip(values, values[1:]))
+            assert stats.flips[i, j] == flips
+    action = trace_list[0][0].action
+    assert trace_list.get_usage(action) == [t.get_usage(action) for t in trace_list]
+
+    # appended traces extend the statistics, other changes discard them
+    trace = generate_test_trace(3)
+    trace_list.append(trace)
+    assert trace_list.stats() is stats and list(stats.lengths) == [4, 2, 5, 3]
+    assert stats.static_fluents[3] == trace.get_static_fluents()
+    del trace_list[0]
+    assert list(trace_list.stats().lengths) == [2, 5, 3]
+    constant = trace_list.stats().constant_fluents
+    for fluent, value in constant.items():
+        assert all(s.state[fluent] == value for t in trace_list for s in t)
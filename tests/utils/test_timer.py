@@ -0,0 +1,66 @@
+import threading
+import time
+import pytest
+from macq.utils import Deadline, TraceSearchTimeOut, basic_timer, set_timer_throw_exc
+
+
+def spin(seconds: float):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+    return "done"
+
+
+def test_deadline():
+    deadline = Deadline(0.05, TraceSearchTimeOut, max_time=0.05)
+    assert not deadline.expired
+    assert 0 < deadline.remaining() <= 0.05
+    deadline.check()
+    time.sleep(0.06)
+    assert deadline.expired
+    assert deadline.remaining() == 0
+    with pytest.raises(TraceSearchTimeOut):
+        deadline.check()
+
+    unlimited = Deadline(None)
+    unlimited.check()
+    assert not unlimited.expired
+    with unlimited.hard():
+        pass
+
+
+@pytest.mark.skipif(not Deadline.can_interrupt(), reason="SIGALRM is not available")
+def test_hard_deadline():
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        with Deadline(0.1).hard():
+            spin(5)
+    assert time.monotonic() - start < 1
+
+    # nothing is interrupted once the context is left
+    with Deadline(0.05).hard():
+        pass
+    assert spin(0.1) == "done"
+
+
+def test_timers():
+    assert set_timer_throw_exc(1, TraceSearchTimeOut, max_time=1)(spin)(0.01) == "done"
+    start = time.monotonic()
+    with pytest.raises(TraceSearchTimeOut):
+        set_timer_throw_exc(0.1, TraceSearchTimeOut, max_time=0.1)(spin)(2)
+    assert basic_timer(0.1)(spin)(2) is None
+    assert time.monotonic() - start < 4.5
+
+    # the functions timed from another thread still time out
+    errors = []
+
+    def timed():
+        try:
+            set_timer_throw_exc(0.1, TraceSearchTimeOut, max_time=0.1)(spin)(1)
+        except TraceSearchTimeOut as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=timed)
+    thread.start()
+    thread.join()
+    assert len(errors) == 1